@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Async load generator replaying the app's alquran.cloud request patterns
+against a base URL (normally api_standin.py), reporting throughput and
+p50/p95/p99 latency per pattern.
+
+Patterns, as QuranApiService and NotificationService issue them:
+  all_languages       getVerseInAllLanguages: 3 parallel /ayah gets
+                      (ar, en.sahih, fr.hamidullah), no retry
+  surah_translation   getSurahWithTranslation: 2 parallel /surah gets
+  random_surah        getRandomSurahVerses: 1 /surah get with retry
+  surah_list          getSurahs: /surah
+  notifications       scheduleNotifications: 35 getRandomVerse calls in
+                      batches of 7, 1.5 s between batches, each with
+                      _fetchWithRetry's backoff (2/4/8 s after a 429,
+                      1/2/4 s after other errors)
+Each request uses a fresh connection, as Dart's top-level http.get does,
+and carries an X-Client-Id so the stand-in rate-limits every simulated
+device separately.
+--time-scale shrinks the batch delay and backoffs for quick runs.
+
+    python3 api_standin.py --rate 5 --burst 10 &
+    python3 api_loadgen.py --clients 20 --duration 30 --patterns notifications all_languages
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from common_io import percentiles
+from mini_http import fetch
+
+ARABIC, ENGLISH, FRENCH = 'ar', 'en.sahih', 'fr.hamidullah'
+TOTAL_AYAHS = 6236
+SURAH_COUNT = 114
+
+NOTIFICATION_VERSES = 35  # 7 days x 5 prayer times
+NOTIFICATION_BATCH = 7
+BATCH_DELAY = 1.5
+RETRIES = 3
+
+
+class Stats:
+    def __init__(self):
+        self.requests = []     # seconds per HTTP request
+        self.operations = []   # seconds per pattern iteration
+        self.statuses = Counter()
+        self.failed_operations = 0
+
+
+class Client:
+    def __init__(self, base_url, stats, rng, client_id, time_scale=1.0):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'X-Client-Id': client_id}
+        self.stats = stats
+        self.rng = rng
+        self.time_scale = time_scale
+
+    async def get(self, path):
+        start = time.perf_counter()
+        try:
+            response = await fetch(self.base_url + path, self.headers)
+            status = response.status
+        except (OSError, asyncio.TimeoutError, ConnectionError):
+            status = 'error'
+        self.stats.requests.append(time.perf_counter() - start)
+        self.stats.statuses[status] += 1
+        return status
+
+    async def get_with_retry(self, path):
+        """QuranApiService._fetchWithRetry around one request."""
+        for attempt in range(RETRIES + 1):
+            status = await self.get(path)
+            if status == 200:
+                return True
+            if attempt >= RETRIES:
+                return False
+            backoff = 2 ** attempt * (2 if status == 429 else 1)
+            await asyncio.sleep(backoff * self.time_scale)
+
+    async def all_languages(self):
+        n = self.rng.randint(1, TOTAL_AYAHS)
+        results = await asyncio.gather(*(self.get(f'/ayah/{n}/{e}') for e in (ARABIC, ENGLISH, FRENCH)))
+        return all(status == 200 for status in results)
+
+    async def surah_translation(self):
+        n = self.rng.randint(1, SURAH_COUNT)
+        edition = self.rng.choice((ENGLISH, FRENCH))
+        results = await asyncio.gather(self.get(f'/surah/{n}/{ARABIC}'), self.get(f'/surah/{n}/{edition}'))
+        return all(status == 200 for status in results)
+
+    async def random_surah(self):
+        return await self.get_with_retry(f'/surah/{self.rng.randint(1, SURAH_COUNT)}/{ENGLISH}')
+
+    async def surah_list(self):
+        return await self.get('/surah') == 200
+
+    async def notifications(self):
+        # Failed verses fall back to a built-in one in the app; count them here
+        ok = True
+        for i in range(0, NOTIFICATION_VERSES, NOTIFICATION_BATCH):
+            batch = min(NOTIFICATION_BATCH, NOTIFICATION_VERSES - i)
+            results = await asyncio.gather(*(
+                self.get_with_retry(f'/ayah/{self.rng.randint(1, TOTAL_AYAHS)}/{ENGLISH}')
+                for _ in range(batch)))
+            ok = ok and all(results)
+            if i + NOTIFICATION_BATCH < NOTIFICATION_VERSES:
+                await asyncio.sleep(BATCH_DELAY * self.time_scale)
+        return ok
+
+
+PATTERNS = ('all_languages', 'surah_translation', 'random_surah', 'surah_list', 'notifications')
+
+
+async def run_pattern(pattern, base_url, clients, duration, iterations, time_scale, seed):
+    stats = Stats()
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def user(index):
+        client = Client(base_url, stats, random.Random(f'{seed}:{pattern}:{index}'),
+                        f'loadgen-{index}', time_scale)
+        operation = getattr(client, pattern)
+        done = 0
+        while (iterations is None or done < iterations) and \
+                (deadline is None or time.perf_counter() < deadline):
+            start = time.perf_counter()
+            if not await operation():
+                stats.failed_operations += 1
+            stats.operations.append(time.perf_counter() - start)
+            done += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(clients)))
+    return stats, time.perf_counter() - start
+
+
+def report(pattern, stats, elapsed):
+    p50, p95, p99 = percentiles(stats.requests)
+    op50, op95, op99 = percentiles(stats.operations)
+    statuses = ' '.join(f'{status}:{count}' for status, count in sorted(stats.statuses.items(), key=str))
+    print(f"{pattern:<18} {len(stats.requests):>7} {len(stats.requests) / elapsed:>8.1f} "
+          f"{p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {p99 * 1000:>8.1f} "
+          f"{len(stats.operations):>6} {op50 * 1000:>9.1f} {op99 * 1000:>9.1f} "
+          f"{stats.failed_operations:>6}  {statuses}")
+
+
+async def run(args):
+    print(f"{'pattern':<18} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'ops':>6} {'op p50 ms':>9} {'op p99 ms':>9} {'failed':>6}  statuses")
+    for pattern in args.patterns:
+        stats, elapsed = await run_pattern(pattern, args.base_url, args.clients, args.duration,
+                                           args.iterations, args.time_scale, args.seed)
+        report(pattern, stats, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the app's API request patterns.")
+    parser.add_argument('--base-url', default='http://127.0.0.1:8080/v1')
+    parser.add_argument('--patterns', nargs='+', choices=PATTERNS, default=list(PATTERNS))
+    parser.add_argument('--clients', type=int, default=10, help='concurrent simulated devices')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per pattern')
+    parser.add_argument('--iterations', type=int, help='iterations per client (overrides --duration)')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='multiplier for batch delays and retry backoff')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.iterations:
+        args.duration = None
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
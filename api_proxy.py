@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Caching, request-coalescing reverse proxy for Quran API traffic, so a
+fleet of emulators and CI runs share one warm cache instead of each
+downloading the same surahs from api.alquran.cloud.
+
+  - successful GET responses are kept in a size-bounded in-memory LRU,
+    backed by an on-disk store that survives restarts (Quran text and
+    edition payloads do not change)
+  - concurrent identical requests that miss are coalesced into a single
+    upstream fetch
+  - every cached response carries a strong ETag; If-None-Match is
+    answered with 304 Not Modified
+  - /__proxy_stats reports hit ratio, coalescing and latency percentiles
+Errors (429, 5xx, dropped connections) are passed through, never cached.
+
+Point the app's _baseUrl, or api_loadgen.py's --base-url, at
+http://<host>:8081/v1.
+
+    python3 api_proxy.py                                  # in front of the live API
+    python3 api_proxy.py --upstream http://127.0.0.1:8080 --memory-mb 64
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter, OrderedDict, deque
+
+from common_io import percentiles
+from mini_http import Connection, Response, json_response, serve
+
+DEFAULT_UPSTREAM = 'https://api.alquran.cloud'
+DEFAULT_STORE = '.api_cache'
+LATENCY_SAMPLES = 10000
+UPSTREAM_CONNECTIONS = 32
+UPSTREAM_TIMEOUT = 30
+
+# Response headers worth keeping from upstream
+KEPT_HEADERS = ('content-type',)
+
+
+class Entry:
+    def __init__(self, body, headers, etag=None):
+        self.body = body
+        self.headers = headers
+        self.etag = etag or '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class LRU:
+    """Entries by key, evicting least recently used beyond `max_bytes` of bodies."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old.body)
+        self.entries[key] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+
+class DiskStore:
+    """One body file plus one JSON metadata file per key, named by its hash."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key):
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.body'), os.path.join(self.directory, name + '.json')
+
+    def get(self, key):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get('key') != key:
+            return None
+        return Entry(body, meta['headers'], meta['etag'])
+
+    def put(self, key, entry):
+        body_path, meta_path = self._paths(key)
+        for path, data in ((body_path, entry.body),
+                           (meta_path, json.dumps({'key': key, 'etag': entry.etag,
+                                                   'headers': entry.headers}).encode('utf-8'))):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+
+class Upstream:
+    """A small pool of keep-alive connections to the upstream origin."""
+
+    def __init__(self, origin, size=UPSTREAM_CONNECTIONS, timeout=UPSTREAM_TIMEOUT):
+        self.origin = origin
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.timeout = timeout
+
+    async def _request(self, conn, target):
+        # A failed, timed-out or cancelled request leaves the connection unusable
+        try:
+            return await asyncio.wait_for(
+                conn.request('GET', target, {'Accept': 'application/json'}), self.timeout)
+        except BaseException:
+            await conn.close()
+            raise
+
+    async def get(self, target):
+        async with self.slots:
+            reused = bool(self.idle)
+            conn = self.idle.pop() if reused else Connection(self.origin)
+            try:
+                response = await self._request(conn, target)
+            except asyncio.TimeoutError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # The server may have closed an idle connection; retry once on a new one
+                conn = Connection(self.origin)
+                response = await self._request(conn, target)
+            self.idle.append(conn)
+            return response
+
+
+class CachingProxy:
+    def __init__(self, upstream, memory_bytes, store_dir=DEFAULT_STORE,
+                 connections=UPSTREAM_CONNECTIONS, timeout=UPSTREAM_TIMEOUT):
+        self.upstream = Upstream(upstream, connections, timeout)
+        self.memory = LRU(memory_bytes)
+        self.disk = DiskStore(store_dir) if store_dir else None
+        self.inflight = {}
+        self.counters = Counter()
+        self.latency = {kind: deque(maxlen=LATENCY_SAMPLES)
+                        for kind in ('memory', 'disk', 'upstream', 'coalesced')}
+
+    async def lookup(self, key):
+        """(entry or error Response, how it was served)."""
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry, 'memory'
+
+        pending = self.inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), 'coalesced'
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result, source = await self._fill(key)
+            future.set_result(result)
+            return result, source
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if not future.done():
+                # Cancelled (shutdown, or the owning client went away): fail the waiters too
+                future.set_exception(ConnectionError(f'upstream fetch of {key} was cancelled'))
+            # Nobody else may be waiting; don't leave an exception unretrieved
+            future.exception()
+            del self.inflight[key]
+
+    async def _fill(self, key):
+        if self.disk is not None:
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None:
+                self.memory.put(key, entry)
+                return entry, 'disk'
+
+        response = await self.upstream.get(key)
+        if response.status != 200:
+            return response, 'upstream'
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        entry = Entry(response.body, headers)
+        self.memory.put(key, entry)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.put, key, entry)
+        return entry, 'upstream'
+
+    def stats(self):
+        hits = self.counters['memory'] + self.counters['disk'] + self.counters['coalesced']
+        total = hits + self.counters['upstream']
+        report = {
+            'requests': total,
+            'hit_ratio': round(hits / total, 4) if total else None,
+            'counters': dict(self.counters),
+            'memory_entries': len(self.memory.entries),
+            'memory_bytes': self.memory.size,
+            'latency_ms': {},
+        }
+        for kind, samples in self.latency.items():
+            p50, p95, p99 = percentiles(samples)
+            report['latency_ms'][kind] = {'p50': round(p50 * 1000, 3), 'p95': round(p95 * 1000, 3),
+                                          'p99': round(p99 * 1000, 3), 'samples': len(samples)}
+        return report
+
+    async def handle(self, request, peer):
+        if request.path == '/__proxy_stats':
+            return json_response(200, self.stats())
+        if request.method != 'GET':
+            self.counters['rejected'] += 1
+            return json_response(405, {'code': 405, 'status': 'Method Not Allowed', 'data': None})
+
+        start = time.perf_counter()
+        try:
+            result, source = await self.lookup(request.target)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            self.counters['upstream_errors'] += 1
+            return json_response(502, {'code': 502, 'status': 'Bad Gateway', 'data': None})
+        self.counters[source] += 1
+
+        if isinstance(result, Response):
+            # Upstream error: pass it through uncached
+            self.counters[f'upstream_{result.status}'] += 1
+            headers = {name: value for name, value in result.headers.items()
+                       if name in KEPT_HEADERS + ('retry-after',)}
+            response = Response(result.status, result.body, headers)
+        elif result.etag in request.headers.get('if-none-match', ''):
+            self.counters['not_modified'] += 1
+            response = Response(304, b'', {'ETag': result.etag})
+        else:
+            response = Response(200, result.body, dict(result.headers, ETag=result.etag))
+        self.latency[source].append(time.perf_counter() - start)
+        return response
+
+
+async def run(proxy, host, port):
+    server = await serve(proxy.handle, host, port)
+    print(f"Caching proxy on http://{host}:{port} -> {proxy.upstream.origin}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Caching, coalescing proxy for the Quran API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--upstream', default=DEFAULT_UPSTREAM)
+    parser.add_argument('--memory-mb', type=float, default=128, help='in-memory LRU size')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='on-disk store directory')
+    parser.add_argument('--no-store', action='store_true', help='memory only')
+    parser.add_argument('--upstream-connections', type=int, default=UPSTREAM_CONNECTIONS,
+                        help='concurrent upstream fetches')
+    parser.add_argument('--upstream-timeout', type=float, default=UPSTREAM_TIMEOUT,
+                        help='seconds before an upstream fetch fails with 502')
+    args = parser.parse_args()
+
+    proxy = CachingProxy(args.upstream, int(args.memory_mb * 1024 * 1024),
+                         None if args.no_store else args.store, args.upstream_connections,
+                         args.upstream_timeout)
+    try:
+        asyncio.run(run(proxy, args.host, args.port))
+    except KeyboardInterrupt:
+        print(json.dumps(proxy.stats(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Local asyncio stand-in for api.alquran.cloud, for load-testing the app's
+request patterns without touching the live API.
+
+Serves, from local data, the routes QuranApiService uses:
+    /v1/ayah/{n}/{edition}
+    /v1/surah
+    /v1/surah/{n}/{edition}
+    /v1/surah/{n}/editions/{edition},{edition},...
+plus /__stats with per-route counters.
+
+Every response can be shaped:
+  - per-route latency distributions (--latency ayah=lognormal:120:0.5)
+  - a token bucket per client (the X-Client-Id header, else the address);
+    requests over it get a 429 with Retry-After, as the live API does
+  - fault injection: a fraction of requests answered with a 500 or 503,
+    or dropped without a response
+
+Data comes from alquran.cloud dumps (--dumps) or, by default, from the
+synthetic fixtures in quran_fixtures.py.
+
+    python3 api_standin.py --port 8080 --rate 5 --burst 10 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import math
+import random
+import re
+import time
+from collections import Counter
+
+from mini_http import json_response, serve
+from quran_corpus import DEFAULT_EDITIONS, load_dump
+from quran_fixtures import edition_info, make_surahs
+
+# Rough medians for a phone talking to the live API; override with --latency
+DEFAULT_LATENCY = {
+    'ayah': 'lognormal:120:0.5',
+    'surah_list': 'lognormal:150:0.4',
+    'surah': 'lognormal:250:0.5',
+    'surah_editions': 'lognormal:400:0.5',
+}
+
+ROUTES = [
+    ('ayah', re.compile(r'^/v1/ayah/(\d+)/([\w.-]+)$')),
+    ('surah_list', re.compile(r'^/v1/surah/?$')),
+    ('surah', re.compile(r'^/v1/surah/(\d+)/([\w.-]+)$')),
+    ('surah_editions', re.compile(r'^/v1/surah/(\d+)/editions/([\w.,-]+)$')),
+]
+
+SURAH_KEYS = ('number', 'name', 'englishName', 'englishNameTranslation',
+              'revelationType', 'numberOfAyahs')
+
+
+def parse_latency(spec):
+    """
+    A sampler (rng -> seconds) for `const:MS`, `uniform:LO:HI`,
+    `normal:MEAN:SD` or `lognormal:MEDIAN:SIGMA`; all times in ms.
+    """
+    kind, *args = spec.split(':')
+    args = [float(a) for a in args]
+    if kind == 'const':
+        return lambda rng: args[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1])) / 1000
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1]) / 1000
+    raise ValueError(f"unknown latency distribution {spec!r}")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """True if a request may pass; otherwise the seconds until it could."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return (1 - self.tokens) / self.rate
+
+
+class ApiData:
+    """The API's payloads for a set of editions, built once from surah lists."""
+
+    def __init__(self, editions):
+        self.editions = {}
+        self.surahs = {}
+        self.ayahs = {}
+        for identifier, surahs in editions:
+            self.editions[identifier] = edition_info(identifier)
+            for surah in surahs:
+                self.surahs[identifier, surah['number']] = surah
+                meta = {key: surah.get(key) for key in SURAH_KEYS}
+                for ayah in surah['ayahs']:
+                    self.ayahs[identifier, ayah['number']] = (ayah, meta)
+        first = editions[0][1]
+        self.surah_list = [{key: surah.get(key) for key in SURAH_KEYS} for surah in first]
+
+    def ayah(self, number, edition):
+        ayah, meta = self.ayahs[edition, number]
+        return dict(ayah, edition=self.editions[edition], surah=meta)
+
+    def surah(self, number, edition):
+        return dict(self.surahs[edition, number], edition=self.editions[edition])
+
+
+class StandIn:
+    def __init__(self, data, latency=None, rate=0, burst=10, error_rate=0.0,
+                 drop_rate=0.0, seed=None):
+        self.data = data
+        self.latency = {route: parse_latency(spec)
+                        for route, spec in dict(DEFAULT_LATENCY, **(latency or {})).items()}
+        self.rate = rate
+        self.burst = burst
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+        self.buckets = {}
+        self.stats = Counter()
+
+    def route(self, path):
+        for name, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                return name, match.groups()
+        return None, ()
+
+    def payload(self, name, args):
+        """(status, data) for a matched route."""
+        try:
+            if name == 'ayah':
+                return 200, self.data.ayah(int(args[0]), args[1])
+            if name == 'surah_list':
+                return 200, self.data.surah_list
+            if name == 'surah':
+                return 200, self.data.surah(int(args[0]), args[1])
+            if name == 'surah_editions':
+                return 200, [self.data.surah(int(args[0]), e) for e in args[1].split(',')]
+        except KeyError:
+            pass
+        return 404, 'Not found.'
+
+    async def handle(self, request, peer):
+        if request.path == '/__stats':
+            return json_response(200, {' '.join(map(str, k)): v for k, v in self.stats.items()})
+
+        name, args = self.route(request.path)
+        if name is None:
+            self.stats['unknown', 404] += 1
+            return json_response(404, {'code': 404, 'status': 'NOT FOUND', 'data': 'Not found.'})
+
+        if self.rate > 0:
+            client = request.headers.get('x-client-id') or peer[0]
+            bucket = self.buckets.setdefault(client, TokenBucket(self.rate, self.burst))
+            allowed = bucket.take()
+            if allowed is not True:
+                self.stats[name, 429] += 1
+                return json_response(
+                    429, {'code': 429, 'status': 'Too Many Requests', 'data': 'Rate limit exceeded.'},
+                    {'Retry-After': str(math.ceil(allowed))})
+
+        await asyncio.sleep(self.latency[name](self.rng))
+
+        roll = self.rng.random()
+        if roll < self.drop_rate:
+            self.stats[name, 'drop'] += 1
+            return None
+        if roll < self.drop_rate + self.error_rate:
+            status = self.rng.choice((500, 503))
+            self.stats[name, status] += 1
+            return json_response(status, {'code': status, 'status': 'ERROR', 'data': 'Injected fault.'})
+
+        status, data = self.payload(name, args)
+        self.stats[name, status] += 1
+        return json_response(status, {'code': status, 'status': 'OK' if status == 200 else 'NOT FOUND',
+                                      'data': data})
+
+
+def load_data(dumps=None, seed=0):
+    if dumps:
+        return ApiData([load_dump(path) for path in dumps])
+    return ApiData([(identifier, make_surahs(identifier, seed)) for identifier in DEFAULT_EDITIONS])
+
+
+def parse_routes(items):
+    latency = {}
+    for item in items or []:
+        route, _, spec = item.partition('=')
+        if route not in DEFAULT_LATENCY:
+            raise SystemExit(f"Unknown route {route!r}; expected one of {', '.join(DEFAULT_LATENCY)}")
+        parse_latency(spec)
+        latency[route] = spec
+    return latency
+
+
+async def run(standin, host, port):
+    server = await serve(standin.handle, host, port)
+    print(f"Serving the alquran.cloud stand-in on http://{host}:{port}/v1")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for api.alquran.cloud.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--dumps', nargs='+', help='alquran.cloud edition dumps (default: synthetic)')
+    parser.add_argument('--latency', action='append', metavar='ROUTE=DIST',
+                        help='e.g. ayah=lognormal:120:0.5, surah=const:0 (repeatable)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='requests per second per client before 429s (0 = unlimited)')
+    parser.add_argument('--burst', type=int, default=10, help='token bucket size')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction answered 500/503')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='fraction dropped unanswered')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    standin = StandIn(load_data(args.dumps), parse_routes(args.latency), args.rate, args.burst,
+                      args.error_rate, args.drop_rate, args.seed)
+    try:
+        asyncio.run(run(standin, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nroute/status counts:")
+        for (route, status), count in sorted(standin.stats.items(), key=str):
+            print(f"  {route:<16} {status!s:>5} {count:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Dependency-graph scheduler with content-addressed intermediates.
+
+Every stage declares its inputs and outputs. A name starting with '@' is
+an intermediate, which only exists inside the store; any other name is
+a file: a source when no stage produces it, a deliverable when one does.
+A stage never reads or writes a deliverable path. It reads the store
+copies of its inputs and writes into a fresh directory that becomes
+.asset_store/<key>/, where the key is the SHA-256 of the stage's name,
+function, parameters and input bytes, and of the source of the module
+defining the function and of every local module it imports, so editing
+a stage or a helper it calls misses the store. Nothing is ever mutated in place,
+so results do not depend on run order. A stage whose key is already in
+the store is a hit and is not run.
+
+Stages run on a process pool as soon as their inputs exist, so
+independent branches proceed concurrently. Deliverables are copied out
+of the store when they differ from what was last delivered (the build
+cache tracks them, so png_optimize.py's in-place rewrites are kept).
+
+    graph = Graph()
+    graph.add('flatten', flatten, ['assets/icon.png'], ['@ios_master'], {'zoom': None})
+    graph.add('ios_icons', save_icons, ['@ios_master'], ['ios/.../Icon-App-20x20@1x.png', ...])
+    graph.run(workers=4)
+
+Stage functions are module-level (so they can be pickled) and are called
+as fn(inputs, outputs, **params); they read and write through
+shm_frames.load() and save(). With handoff='png' every input and output
+is a path. With handoff='shm' intermediates are shared memory frames
+instead: no PNG is encoded or decoded for them, and the store keeps
+only their digests (frames.json). When a stage has to run but an
+intermediate it needs came from a cache hit, and so was never built in
+this run, its producer is run again first.
+"""
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from collections import Counter, namedtuple
+
+import shm_frames
+import stage_trace
+from build_cache import BuildCache
+from shm_frames import FrameRef, FrameSlot
+
+STORE_DIR = '.asset_store'
+DELIVER_STAGE = 'asset_graph'
+FRAMES_FILE = 'frames.json'
+HANDOFFS = ('png', 'shm')
+
+# An intermediate frame known from the store by digest but not built in this run
+Recorded = namedtuple('Recorded', 'digest')
+
+_code_digests = {}
+
+
+def _local_imports(path):
+    """Files of the modules `path` imports (anywhere, lazily too) from its own directory."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module)
+    directory = os.path.dirname(path)
+    found = (os.path.join(directory, name.split('.')[0] + '.py') for name in names)
+    return sorted(f for f in found if os.path.exists(f))
+
+
+def code_digest(fn):
+    """SHA-256 of the source of `fn`'s module and the local modules it imports, transitively."""
+    root = os.path.abspath(sys.modules[fn.__module__].__file__)
+    if root not in _code_digests:
+        h, seen, pending = hashlib.sha256(), set(), [root]
+        while pending:
+            path = pending.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            pending.extend(_local_imports(path))
+        for path in sorted(seen):
+            with open(path, 'rb') as f:
+                h.update(os.path.basename(path).encode('utf-8') + b'\0' + f.read())
+        _code_digests[root] = h.hexdigest()
+    return _code_digests[root]
+
+
+def _timed(name, fn, inputs, outputs, params):
+    """
+    Worker: run one stage. Returns its own run time (excluding queueing),
+    its handoff I/O counters and the frames it created.
+    """
+    shm_frames.STATS.clear()
+    shm_frames.OUTPUTS.clear()
+    start = time.perf_counter()
+    with stage_trace.span(name):
+        fn(inputs, outputs, **params)
+    seconds = time.perf_counter() - start
+    shm_frames.detach()
+    return seconds, dict(shm_frames.STATS), dict(shm_frames.OUTPUTS)
+
+
+class Stage:
+    def __init__(self, name, fn, inputs, outputs, params=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+
+    def store_names(self):
+        """File names of the outputs inside the stage's store directory."""
+        names = []
+        for i, output in enumerate(self.outputs):
+            base = os.path.basename(output.lstrip('@'))
+            names.append(f'{i:02d}-{base}' if '.' in base else f'{i:02d}-{base}.png')
+        return names
+
+
+class Graph:
+    def __init__(self, store=STORE_DIR, cache=None, handoff='png'):
+        if handoff not in HANDOFFS:
+            raise ValueError(f"Unknown handoff {handoff!r}")
+        self.store = store
+        self.cache = cache or BuildCache()
+        self.handoff = handoff
+        self.stages = {}
+        self.io_stats = Counter()
+
+    def add(self, name, fn, inputs, outputs, params=None):
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage {name}")
+        self.stages[name] = Stage(name, fn, inputs, outputs, params)
+
+    def producers(self):
+        producer = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producer:
+                    raise ValueError(f"{output} is produced by both {producer[output]} and {stage.name}")
+                producer[output] = stage.name
+        return producer
+
+    def order(self):
+        """Stages in dependency order; raises ValueError on a cycle or a missing source."""
+        producer = self.producers()
+        deps = {}
+        for stage in self.stages.values():
+            deps[stage.name] = set()
+            for name in stage.inputs:
+                if name in producer:
+                    deps[stage.name].add(producer[name])
+                elif name.startswith('@'):
+                    raise ValueError(f"{stage.name}: no stage produces {name}")
+
+        ordered, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dep in sorted(deps[name]):
+                visit(dep, path + [name])
+            state[name] = 'done'
+            ordered.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name, [])
+        return ordered, producer
+
+    def key(self, stage, resolved):
+        h = hashlib.sha256()
+        h.update(stage.name.encode('utf-8'))
+        # Not the module, which is __main__ when a pipeline script runs itself
+        h.update(stage.fn.__qualname__.encode('utf-8'))
+        h.update(code_digest(stage.fn).encode('ascii'))
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode('utf-8'))
+        h.update(json.dumps(stage.outputs).encode('utf-8'))
+        for name in stage.inputs:
+            h.update(name.encode('utf-8'))
+            value = resolved[name]
+            digest = value.digest if isinstance(value, (FrameRef, Recorded)) else self.cache.digest(value)
+            h.update(digest.encode('ascii'))
+        h.update(self.handoff.encode('ascii'))
+        return h.hexdigest()
+
+    def _in_memory(self, output):
+        return self.handoff == 'shm' and output.startswith('@')
+
+    def _entry_complete(self, stage, entry):
+        files = [name for output, name in zip(stage.outputs, stage.store_names())
+                 if not self._in_memory(output)]
+        if any(self._in_memory(output) for output in stage.outputs):
+            files.append(FRAMES_FILE)
+        return all(os.path.exists(os.path.join(entry, name)) for name in files)
+
+    def _deliver(self, stage, entry, resolved, dry_run, frames=None):
+        """
+        Point `resolved` at the store copies (or at this run's frames, or
+        their recorded digests); copy out changed deliverables.
+        """
+        recorded = None
+        delivered = []
+        for i, (output, name) in enumerate(zip(stage.outputs, stage.store_names())):
+            if self._in_memory(output):
+                if frames is not None:
+                    resolved[output] = frames[i]
+                else:
+                    if recorded is None:
+                        with open(os.path.join(entry, FRAMES_FILE), 'r', encoding='utf-8') as f:
+                            recorded = json.load(f)
+                    resolved[output] = Recorded(recorded[output])
+                continue
+            stored = os.path.join(entry, name)
+            resolved[output] = stored
+            if output.startswith('@'):
+                continue
+            params = {'stage': DELIVER_STAGE}
+            if self.cache.up_to_date([output], [stored], params):
+                continue
+            delivered.append(output)
+            if dry_run:
+                continue
+            os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+            tmp_path = output + '.tmp'
+            shutil.copyfile(stored, tmp_path)
+            os.replace(tmp_path, output)
+            self.cache.record([output], [stored], params)
+        return delivered
+
+    def _launch(self, pool, stage, entry, resolved):
+        tmp = f'{entry}.tmp{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        outputs = [FrameSlot(i) if self._in_memory(output) else os.path.join(tmp, name)
+                   for i, (output, name) in enumerate(zip(stage.outputs, stage.store_names()))]
+        return pool.submit(_timed, stage.name, stage.fn, [resolved[n] for n in stage.inputs],
+                           outputs, stage.params), tmp
+
+    def _finish(self, stage, entry, tmp, frames):
+        """Check a finished stage's outputs and move its directory into the store."""
+        missing, digests = [], {}
+        for i, (output, name) in enumerate(zip(stage.outputs, stage.store_names())):
+            if self._in_memory(output):
+                if i in frames:
+                    digests[output] = frames[i].digest
+                else:
+                    missing.append(output)
+            elif not os.path.exists(os.path.join(tmp, name)):
+                missing.append(name)
+        if missing:
+            raise ValueError(f"{stage.name} did not write {', '.join(missing)}")
+        if digests:
+            with open(os.path.join(tmp, FRAMES_FILE), 'w', encoding='utf-8') as f:
+                json.dump(digests, f, indent=1, sort_keys=True)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+
+    def run(self, workers=None, dry_run=False, force=False, log=print):
+        """
+        Build every stage; returns ({stage name: (status, seconds, delivered
+        paths)}, wall seconds). Status is 'hit', 'ran', or for a dry run
+        'run' and 'stale'.
+        With `dry_run` nothing is run or written. Handoff I/O counters of
+        the stages that ran are added to self.io_stats.
+        """
+        ordered, producer = self.order()
+        resolved = {}
+        for stage in ordered:
+            for name in stage.inputs:
+                if name not in producer:
+                    if not os.path.exists(name):
+                        raise ValueError(f"{stage.name}: source {name} not found")
+                    resolved[name] = name
+
+        report = {}
+        pending = list(ordered)
+        wanted = []  # hit stages to run again for frames a running stage needs
+        running = {}
+        owned = []
+        pool = None
+        start = time.perf_counter()
+
+        def want(stage):
+            """Queue producers of `stage`'s unbuilt frames; True when it can run."""
+            queued = False
+            for name in stage.inputs:
+                if isinstance(resolved[name], Recorded):
+                    source = producer[name]
+                    if source not in wanted and all(s.name != source for s, _, _ in running.values()):
+                        wanted.append(source)
+                        queued = True
+            return queued
+
+        def launch(stage, entry):
+            nonlocal pool
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            future, tmp = self._launch(pool, stage, entry, resolved)
+            running[future] = (stage, entry, tmp)
+            log(f"  start {stage.name}")
+
+        try:
+            while pending or running or wanted:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for stage in list(pending):
+                        if not all(name in resolved for name in stage.inputs):
+                            if dry_run and any(report.get(producer.get(name), ('',))[0]
+                                               in ('run', 'stale') for name in stage.inputs):
+                                pending.remove(stage)
+                                report[stage.name] = ('stale', 0.0, [o for o in stage.outputs
+                                                                     if not o.startswith('@')])
+                                progressed = True
+                            continue
+                        key = self.key(stage, resolved)
+                        entry = os.path.join(self.store, key)
+                        if not force and self._entry_complete(stage, entry):
+                            delivered = self._deliver(stage, entry, resolved, dry_run)
+                            report[stage.name] = ('hit', 0.0, delivered)
+                            log(f"  hit   {stage.name}" + (f" ({len(delivered)} delivered)"
+                                                            if delivered else ''))
+                        elif dry_run:
+                            report[stage.name] = ('run', 0.0, [o for o in stage.outputs
+                                                               if not o.startswith('@')])
+                        elif any(isinstance(resolved[n], Recorded) for n in stage.inputs):
+                            progressed |= want(stage)
+                            continue
+                        else:
+                            launch(stage, entry)
+                        pending.remove(stage)
+                        progressed = True
+
+                    for name in list(wanted):
+                        stage = self.stages[name]
+                        if any(isinstance(resolved[n], Recorded) for n in stage.inputs):
+                            progressed |= want(stage)
+                            continue
+                        wanted.remove(name)
+                        launch(stage, os.path.join(self.store, self.key(stage, resolved)))
+                        progressed = True
+
+                if not running:
+                    if (pending or wanted) and not dry_run:
+                        raise ValueError(f"Stuck: {', '.join(s.name for s in pending)}")
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, entry, tmp = running.pop(future)
+                    seconds, stats, frames = future.result()
+                    owned += frames.values()
+                    self.io_stats.update(stats)
+                    self._finish(stage, entry, tmp, frames)
+                    delivered = self._deliver(stage, entry, resolved, dry_run, frames)
+                    report[stage.name] = ('ran', seconds, delivered)
+                    log(f"  done  {stage.name} in {seconds:.2f}s ({len(delivered)} delivered)")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            for ref in owned:
+                shm_frames.release(ref)
+            self.cache.save()
+        return report, time.perf_counter() - start
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+The launcher icon and store screenshot pipeline as a dependency graph
+(see asset_graph.py), with no stage rewriting its own input.
+
+    assets/icon.png ─┬─ ios_master ── ios_icons        AppIcon.appiconset/*
+                     ├─ mipmaps                        mipmap-*/ic_launcher.png
+                     └─ calligraphy ── foregrounds     drawable-*/ic_launcher_foreground.png
+    assets/screenshot_*.png ── screenshots:<name>      ios_screenshots/, play_screenshots/
+
+assets/icon.png is only ever read. The iOS flattening and zoom of
+fix_ios_icon.py / zoom_ios_icon.py produce the @ios_master intermediate
+instead of overwriting it. The foregrounds are fitted from the store
+copy of the keyed calligraphy instead of being read back from
+drawable-xxxhdpi the way fix_icon.py (ratio 0.75) and fix_icon_simple.py (0.80) did; pass
+--foreground-ratio to get their framing. With --render-master the
+master is rendered from the font (generate_icon.py's design) as
+@master instead of read from assets/icon.png.
+
+The iOS, mipmap, foreground and per-source screenshot branches run
+concurrently, and a branch whose inputs and parameters are unchanged is
+served from .asset_store/.
+
+With --handoff shm the master is decoded once (@icon) and every
+intermediate stays a decoded frame in shared memory: only deliverables
+are encoded as PNG (bench_handoff.py measures the difference).
+
+    python3 asset_pipeline.py
+    python3 asset_pipeline.py --dry-run
+    python3 asset_pipeline.py --zoom 1.6 --foreground-ratio 0.75 --workers 4
+    python3 asset_pipeline.py --handoff shm
+"""
+import argparse
+import os
+
+import stage_trace
+from asset_graph import HANDOFFS, Graph
+from shm_frames import load, rgba, rgba_array, save
+
+SOURCE_ICON = 'assets/icon.png'
+CALLIGRAPHY_PATH = 'assets/calligraphy_only.png'
+
+
+def render_master(inputs, outputs, size):
+    from icon_text import render_icon
+    save(render_icon(size, inputs[0] if inputs else None), outputs[0])
+
+
+def decode(inputs, outputs):
+    save(rgba(inputs[0]), outputs[0])
+
+
+def flatten_ios(inputs, outputs, zoom):
+    from fix_ios_icon import flatten_icon
+    from zoom_ios_icon import zoom_image
+    img = flatten_icon(rgba(inputs[0]))
+    if zoom:
+        img = zoom_image(img.convert('RGBA'), zoom)
+    save(img, outputs[0])
+
+
+def ios_icons(inputs, outputs, sizes, background):
+    from icon_pyramid import Pyramid, save_sizes
+    list(save_sizes(Pyramid(rgba(inputs[0])), dict(zip(outputs, sizes)), tuple(background), save))
+
+
+def mipmaps(inputs, outputs, sizes):
+    from icon_pyramid import Pyramid, save_sizes
+    list(save_sizes(Pyramid(rgba(inputs[0])), dict(zip(outputs, sizes)), save=save))
+
+
+def calligraphy(inputs, outputs):
+    from icon_pyramid import extract_calligraphy
+    img = extract_calligraphy(rgba_array(inputs[0]))
+    for output in outputs:
+        save(img, output)
+
+
+def foregrounds(inputs, outputs, sizes, ratio):
+    from icon_pyramid import save_foregrounds
+    list(save_foregrounds(rgba(inputs[0]), dict(zip(outputs, sizes)), ratio, save))
+
+
+def screenshots(inputs, outputs, profiles):
+    from screenshot_renderer import DEVICE_PROFILES, fit_width, resample_to_width
+    img = load(inputs[0]).convert('RGB')
+    by_width = {}
+    for path, profile in zip(outputs, profiles):
+        size = DEVICE_PROFILES[profile]['size']
+        if size[0] not in by_width:
+            by_width[size[0]] = resample_to_width(img, size[0])
+        save(fit_width(by_width[size[0]], size), path)
+
+
+def build_graph(zoom=None, foreground_ratio=0.66, render=False, profiles=None, graph=None,
+                handoff='png'):
+    from icon_pyramid import (ANDROID_RES, FOREGROUND_SIZES, ICON_BACKGROUND, IOS_APPICON,
+                              MIPMAP_SIZES, ios_icon_sizes)
+    from screenshot_renderer import DEVICE_PROFILES, SOURCES, output_path
+
+    graph = graph or Graph(handoff=handoff)
+    shm = graph.handoff == 'shm'
+    master = SOURCE_ICON
+    if shm and not render:
+        # Decoded once for the three branches that read it
+        graph.add('decode', decode, [SOURCE_ICON], ['@icon'])
+        master = '@icon'
+    if render:
+        from icon_text import REFERENCE_SIZE, find_font
+        font = find_font()
+        graph.add('master', render_master, [font] if font else [], ['@master'],
+                  {'size': REFERENCE_SIZE})
+        master = '@master'
+
+    graph.add('ios_master', flatten_ios, [master], ['@ios_master'], {'zoom': zoom})
+    ios = ios_icon_sizes()
+    graph.add('ios_icons', ios_icons, ['@ios_master', os.path.join(IOS_APPICON, 'Contents.json')],
+              [os.path.join(IOS_APPICON, name) for name in ios],
+              {'sizes': list(ios.values()), 'background': ICON_BACKGROUND})
+    graph.add('mipmaps', mipmaps, [master],
+              [f'{ANDROID_RES}/{folder}/ic_launcher.png' for folder in MIPMAP_SIZES],
+              {'sizes': list(MIPMAP_SIZES.values())})
+    # The foregrounds read the frame in shm mode, else the store copy of the PNG
+    keyed = '@calligraphy' if shm else CALLIGRAPHY_PATH
+    graph.add('calligraphy', calligraphy, [master], sorted({keyed, CALLIGRAPHY_PATH}))
+    graph.add('foregrounds', foregrounds, [keyed],
+              [f'{ANDROID_RES}/{folder}/ic_launcher_foreground.png' for folder in FOREGROUND_SIZES],
+              {'sizes': list(FOREGROUND_SIZES.values()), 'ratio': foreground_ratio})
+
+    # One stage per screenshot source, covering every profile that uses it
+    unknown = [p for p in profiles or [] if p not in DEVICE_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown profiles: {', '.join(unknown)}")
+    by_source = {}
+    for profile in profiles or DEVICE_PROFILES:
+        for src in SOURCES[DEVICE_PROFILES[profile]['sources']]:
+            if os.path.exists(src):
+                by_source.setdefault(src, []).append(profile)
+    for src, src_profiles in by_source.items():
+        name = os.path.splitext(os.path.basename(src))[0]
+        graph.add(f'screenshots:{name}', screenshots, [src],
+                  [output_path(profile, src) for profile in src_profiles],
+                  {'profiles': src_profiles})
+    return graph
+
+
+def print_report(report, wall):
+    labels = {'hit': 'cached', 'ran': 'built', 'run': 'would run', 'stale': 'would run (upstream)'}
+    busy = 0.0
+    for name, (status, seconds, delivered) in report.items():
+        busy += seconds
+        print(f"{name:<42} {labels[status]:<22} {seconds:>6.2f}s  {len(delivered)} outputs")
+        if status in ('run', 'stale') or (status == 'hit' and delivered):
+            for path in delivered:
+                print(f"    {path}")
+    print(f"\n{len(report)} stages, {wall:.2f}s wall, {busy:.2f}s of stage time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build icons and screenshots as a dependency graph.')
+    parser.add_argument('--dry-run', action='store_true', help='list stages and outputs that would change')
+    parser.add_argument('--zoom', type=float, help='zoom the iOS master (zoom_ios_icon.py uses 1.6)')
+    parser.add_argument('--foreground-ratio', type=float, default=0.66,
+                        help='share of the adaptive canvas the calligraphy fills')
+    parser.add_argument('--render-master', action='store_true',
+                        help='render the master icon from the font instead of reading assets/icon.png')
+    parser.add_argument('--profiles', nargs='+', help='screenshot device profiles (default: all)')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='rebuild every stage')
+    parser.add_argument('--handoff', choices=HANDOFFS, default='png',
+                        help='pass intermediates as PNG files or shared memory frames')
+    args = parser.parse_args()
+
+    try:
+        graph = build_graph(args.zoom, args.foreground_ratio, args.render_master, args.profiles,
+                            handoff=args.handoff)
+        report, wall = graph.run(args.workers, args.dry_run, args.force)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    print()
+    print_report(report, wall)
+
+
+if __name__ == '__main__':
+    with stage_trace.session('asset_pipeline'):
+        main()
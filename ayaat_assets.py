@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+One entry point for the asset pipeline: launcher icons, the iOS master
+icon, Android adaptive foregrounds, store screenshots, localized store
+graphics and release notes.
+
+Each subcommand imports only the modules it needs, so `--help` and
+release-notes start without loading PIL or NumPy, and `all` runs every
+stage in one process instead of one interpreter per script. Paths are
+resolved against the repository root, wherever the command is run from.
+
+`all` builds the icons and screenshots through the dependency graph
+(asset_pipeline.py), so assets/icon.png is only ever read and a repeat
+run with nothing changed does no work. Pass --render-master to build
+from a font render of the master instead; it stays an intermediate in
+.asset_store/. The icons subcommand still runs generate_icon.py, which
+rewrites assets/icon.png; ios-icon writes assets/icon_ios.png from it.
+
+--dry-run plans instead of building: it lists every output whose stage
+would run, from the build cache (build_cache.py), including outputs
+that go stale only because an earlier stage rewrites their input.
+
+    python3 ayaat_assets.py all
+    python3 ayaat_assets.py all --dry-run
+    python3 ayaat_assets.py screenshots --profiles ipad_12.9
+    python3 ayaat_assets.py release-notes --strict
+    python3 ayaat_assets.py --trace trace.json all     # per-stage trace (stage_trace.py)
+"""
+import argparse
+import os
+import sys
+import time
+
+import stage_trace
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Stages of `all`. The graph covers what icons, ios-icon, adaptive and
+# screenshots do, without rewriting assets/icon.png
+PIPELINE = ('pipeline', 'store-graphics', 'release-notes')
+
+
+def plan_icons(args):
+    from generate_icon import stage
+    from icon_text import find_font
+    return [stage(find_font())]
+
+
+def run_icons(args):
+    import generate_icon
+    generate_icon.main()
+
+
+def plan_ios_icon(args):
+    if getattr(args, 'zoom', False):
+        import zoom_ios_icon
+        return [zoom_ios_icon.stage()]
+    import fix_ios_icon
+    return [fix_ios_icon.stage()]
+
+
+def run_ios_icon(args):
+    if getattr(args, 'zoom', False):
+        import zoom_ios_icon
+        zoom_ios_icon.zoom_icon()
+    else:
+        import fix_ios_icon
+        fix_ios_icon.fix_icon()
+
+
+def plan_adaptive(args):
+    from fix_adaptive_icon import stage
+    return [stage()]
+
+
+def run_adaptive(args):
+    import fix_adaptive_icon
+    fix_adaptive_icon.main()
+
+
+def _profiles(args):
+    # Checked here rather than with argparse choices, which would import PIL for --help
+    from screenshot_renderer import DEVICE_PROFILES
+    profiles = getattr(args, 'profiles', None) or list(DEVICE_PROFILES)
+    unknown = [p for p in profiles if p not in DEVICE_PROFILES]
+    if unknown:
+        raise SystemExit(f"Unknown profiles: {', '.join(unknown)} "
+                         f"(choose from {', '.join(sorted(DEVICE_PROFILES))})")
+    return profiles
+
+
+def plan_screenshots(args):
+    from screenshot_renderer import DEVICE_PROFILES, SOURCES, output_path, stage_params
+    specs = []
+    for profile in _profiles(args):
+        for src in SOURCES[DEVICE_PROFILES[profile]['sources']]:
+            if os.path.exists(src):
+                specs.append(([output_path(profile, src)], [src], stage_params(profile)))
+    return specs
+
+
+def run_screenshots(args):
+    from screenshot_renderer import render
+    render(_profiles(args), workers=getattr(args, 'workers', None),
+           force=getattr(args, 'force', False))
+
+
+def plan_store_graphics(args):
+    from store_graphics import load_templates, plan, select
+    templates = load_templates()
+    jobs = plan(templates, *select(templates, getattr(args, 'locales', None),
+                                   getattr(args, 'profiles', None)))
+    return [([path], inputs, params) for items in jobs.values() for path, inputs, params, _ in items]
+
+
+def run_store_graphics(args):
+    from store_graphics import compose
+    compose(getattr(args, 'locales', None), getattr(args, 'profiles', None),
+            getattr(args, 'workers', None), getattr(args, 'force', False))
+
+
+def run_pipeline(args):
+    from asset_pipeline import build_graph, print_report
+    try:
+        graph = build_graph(args.zoom, args.foreground_ratio, args.render_master,
+                            handoff=args.handoff)
+        report, wall = graph.run(args.workers, args.dry_run, args.force)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    print_report(report, wall)
+
+
+def run_release_notes(args):
+    from split_release_notes import parse_codes, split_release_notes
+    problems = split_release_notes(dry_run=args.dry_run,
+                                   extra_codes=parse_codes(getattr(args, 'code', None)))
+    return 1 if problems and getattr(args, 'strict', False) else 0
+
+
+# name: (planner or None, runner). Stages without a planner plan themselves
+# when run with dry_run set.
+STAGES = {
+    'icons': (plan_icons, run_icons),
+    'ios-icon': (plan_ios_icon, run_ios_icon),
+    'adaptive': (plan_adaptive, run_adaptive),
+    'screenshots': (plan_screenshots, run_screenshots),
+    'store-graphics': (plan_store_graphics, run_store_graphics),
+    'release-notes': (None, run_release_notes),
+    'pipeline': (None, run_pipeline),
+}
+
+
+def dry_run(name, args, cache, changed):
+    """Print the outputs `name` would rewrite and add them to `changed`."""
+    planner, runner = STAGES[name]
+    if planner is None:
+        return runner(args)
+    stale = []
+    for outputs, inputs, params in planner(args):
+        after = sorted(changed.intersection(inputs))
+        if after or not cache.up_to_date(outputs, inputs, params):
+            stale += [(output, after) for output in outputs]
+    for output, after in stale:
+        print(f"Would update {output}" + (f" (after {', '.join(after)} changes)" if after else ''))
+    print(f"{len(stale)} outputs would change")
+    changed.update(output for output, _ in stale)
+    return 0
+
+
+def run(names, args):
+    from build_cache import BuildCache
+    cache = BuildCache() if args.dry_run else None
+    changed = set()
+    status = 0
+    for name in names:
+        print(f"== {name}")
+        start = time.perf_counter()
+        with stage_trace.span(name):
+            if args.dry_run:
+                status |= dry_run(name, args, cache, changed) or 0
+            else:
+                status |= STAGES[name][1](args) or 0
+        print(f"== {name} done in {time.perf_counter() - start:.2f}s\n")
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the Ayaat store and launcher assets.')
+    parser.add_argument('--root', default=ROOT, help='repository root (default: this script\'s directory)')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='write a Chrome trace of every stage here and print a summary')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--dry-run', action='store_true', help='list outputs that would change')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('icons', parents=[common], help='render the master and launcher icons')
+    ios = sub.add_parser('ios-icon', parents=[common], help='flatten the master icon into assets/icon_ios.png')
+    ios.add_argument('--zoom', action='store_true', help='also zoom-crop it (zoom_ios_icon.py)')
+    sub.add_parser('adaptive', parents=[common], help='key Android adaptive icon foregrounds')
+    shots = sub.add_parser('screenshots', parents=[common], help='render store screenshots')
+    shots.add_argument('--profiles', nargs='+', help='device profiles (default: all)')
+    shots.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    shots.add_argument('--force', action='store_true', help='ignore the build cache')
+    graphics = sub.add_parser('store-graphics', parents=[common],
+                              help='compose localized feature graphics and captioned screenshots')
+    graphics.add_argument('--locales', nargs='+', help='locales (default: all in store_graphics.json)')
+    graphics.add_argument('--profiles', nargs='+', help='feature and/or device profiles (default: all)')
+    graphics.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    graphics.add_argument('--force', action='store_true', help='ignore the build cache')
+    graph_options = argparse.ArgumentParser(add_help=False)
+    graph_options.add_argument('--zoom', type=float,
+                               help='zoom the iOS master (zoom_ios_icon.py uses 1.6)')
+    graph_options.add_argument('--foreground-ratio', type=float, default=0.66)
+    graph_options.add_argument('--render-master', action='store_true',
+                               help='render the master icon from the font instead of reading '
+                                    'assets/icon.png (never written)')
+    graph_options.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    graph_options.add_argument('--force', action='store_true', help='rebuild every stage')
+    graph_options.add_argument('--handoff', choices=('png', 'shm'), default='png',
+                               help='pass intermediates as PNG files or shared memory frames')
+    sub.add_parser('pipeline', parents=[common, graph_options],
+                   help='icons and screenshots as a concurrent dependency graph')
+    for name, parents, help_text in (
+            ('release-notes', [common], 'compile release notes into fastlane metadata'),
+            ('all', [common, graph_options], 'build every asset: the graph, store graphics and release notes')):
+        notes = sub.add_parser(name, parents=parents, help=help_text)
+        notes.add_argument('--strict', action='store_true',
+                           help='exit 1 when a release note exceeds a store limit')
+        notes.add_argument('--code', action='append', metavar='VERSION=CODE',
+                           help='version code for an older release (repeatable)')
+    args = parser.parse_args()
+
+    trace = os.path.abspath(args.trace) if args.trace else None
+    os.chdir(args.root)
+    sys.path.insert(0, args.root)
+    names = PIPELINE if args.command == 'all' else (args.command,)
+    with stage_trace.session(f'ayaat_assets {args.command}', trace):
+        status = run(names, args)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Build the per-ayah duration, bitrate and size table of a reciter from
+its per-ayah MP3s, reading frame headers only, and write it as a small
+binary asset for AudioService and the mini player (verse highlighting,
+seek bars, prefetch sizing) so they never have to download or decode an
+ayah to learn how long it is.
+
+assets/ayah_timing/{reciter}.bin:
+    header  '<4sHH'  magic b'AYTM', version, ayah count (6236)
+    records '<IIH'   duration in ms, audio bytes, average kbps; one per
+                     ayah in global order, all zero for a missing file
+Ayah n (1-based, global) is at offset 8 + 10 * (n - 1); 62 KB per reciter.
+
+A Xing/Info or VBRI frame count is trusted when present (one small read
+per file); --walk counts every frame header instead, which also covers
+files without one. Files are scanned in parallel and a reciter is
+skipped when none of its files changed.
+
+    python3 ayah_timing.py audio/alafasy/
+    python3 ayah_timing.py audio/*/ --output-dir assets/ayah_timing --walk
+"""
+import argparse
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import BuildCache
+from common_io import write_if_changed
+from mp3_frames import summarize
+from quran_corpus import SURAH_AYAH_COUNTS, TOTAL_AYAHS
+from surah_audio import find_ayah_files
+
+DEFAULT_OUTPUT_DIR = 'assets/ayah_timing'
+TABLE_MAGIC = b'AYTM'
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct('<4sHH')
+TABLE_RECORD = struct.Struct('<IIH')
+
+
+def scan(path, walk=False, use_mmap=False):
+    """Worker: (duration ms, audio bytes, average kbps) of one ayah file."""
+    summary = summarize(path, trust_info=not walk, use_mmap=use_mmap)
+    seconds = summary.samples / summary.sample_rate
+    kbps = round(summary.bytes * 8 / seconds / 1000) if seconds else 0
+    return round(seconds * 1000), summary.bytes, min(kbps, 0xFFFF)
+
+
+def ayah_paths(directory):
+    """[path or None] for ayahs 1..6236 in global order."""
+    found = find_ayah_files(directory)
+    paths = []
+    for surah, count in enumerate(SURAH_AYAH_COUNTS, 1):
+        paths += [found.get((surah, ayah)) for ayah in range(1, count + 1)]
+    return paths
+
+
+def scan_reciter(paths, walk=False, use_mmap=False, workers=None):
+    """One (duration ms, bytes, kbps) record per ayah; zeros for missing files."""
+    present = [path for path in paths if path]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = dict(zip(present, pool.map(scan, present, [walk] * len(present),
+                                             [use_mmap] * len(present), chunksize=64)))
+    return [results[path] if path else (0, 0, 0) for path in paths]
+
+
+def pack_table(records):
+    return (TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(records))
+            + b''.join(TABLE_RECORD.pack(*record) for record in records))
+
+
+def read_table(path):
+    """[(duration ms, bytes, kbps), ...] indexed by global ayah number - 1."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, count = TABLE_HEADER.unpack_from(data)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        raise ValueError(f"{path}: not a version {TABLE_VERSION} ayah timing table")
+    records = list(TABLE_RECORD.iter_unpack(data[TABLE_HEADER.size:]))
+    if len(records) != count:
+        raise ValueError(f"{path}: expected {count} records, found {len(records)}")
+    return records
+
+
+def build(directories, out_dir=DEFAULT_OUTPUT_DIR, walk=False, use_mmap=False, workers=None,
+          force=False):
+    cache = BuildCache(force=force)
+    for directory in directories:
+        reciter = os.path.basename(os.path.normpath(directory))
+        out_path = os.path.join(out_dir, f'{reciter}.bin')
+        paths = ayah_paths(directory)
+        present = [path for path in paths if path]
+        params = {'stage': 'ayah_timing', 'table_version': TABLE_VERSION, 'walk': walk}
+        if cache.up_to_date([out_path], present, params):
+            print(f"{reciter}: up to date")
+            continue
+
+        records = scan_reciter(paths, walk, use_mmap, workers)
+        changed = write_if_changed(out_path, pack_table(records))
+        cache.record([out_path], present, params)
+
+        total_ms = sum(record[0] for record in records)
+        total_bytes = sum(record[1] for record in records)
+        print(f"{reciter}: {len(present)} of {TOTAL_AYAHS} ayahs, {total_ms / 3600000:.2f}h, "
+              f"{total_bytes:,} bytes -> {'wrote' if changed else 'unchanged'} {out_path}")
+    cache.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build per-ayah timing tables from MP3 headers.')
+    parser.add_argument('directories', nargs='+', help='per-ayah MP3 directories, one per reciter')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--walk', action='store_true',
+                        help='count every frame instead of trusting Xing/Info/VBRI counts')
+    parser.add_argument('--mmap', action='store_true', help='memory-map files instead of streaming')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache')
+    args = parser.parse_args()
+
+    try:
+        build(args.directories, args.output_dir, args.walk, args.mmap, args.workers, args.force)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
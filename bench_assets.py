@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Benchmark and memory-profile the asset tools on synthetic fixtures.
+
+Each stage runs against deterministic generated inputs of several sizes in
+a scratch directory and a fresh child process, and reports wall time,
+throughput (pixels or bytes per second), peak memory traced by tracemalloc
+(Python and NumPy allocations) and peak RSS growth (which also covers
+Pillow's image buffers, invisible to tracemalloc). Results are compared
+with a stored baseline; the run fails when a stage gets slower or uses
+more memory than the baseline allows, and when the baseline is missing
+or has no entry for a stage that ran, so a check never passes by
+comparing against nothing.
+
+    python3 bench_assets.py                    # compare with bench_baseline.json
+    python3 bench_assets.py --update-baseline  # record this machine's numbers
+    python3 bench_assets.py --stages zoom_icon --sizes small
+
+Baselines are machine specific, so none is committed: record one on the
+runner that checks it. The file is only written by --update-baseline.
+"""
+from PIL import Image, ImageDraw
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASELINE_PATH = 'bench_baseline.json'
+
+ICON_BLUE = (26, 35, 126, 255)
+ICON_GOLD = (255, 215, 0, 255)
+SCREEN_BG = (13, 27, 42)
+
+# Fixture sizes per scale
+ICON_SIZES = {'small': 512, 'medium': 1024, 'large': 2048}
+SCREEN_SIZES = {'small': (720, 1560), 'medium': (1080, 2340), 'large': (1440, 3120)}
+NOTES_BYTES = {'small': 2_000, 'medium': 20_000, 'large': 200_000}
+
+ANDROID_RES = 'android/app/src/main/res'
+
+
+# --- fixtures ---------------------------------------------------------------
+
+def make_icon(size, seed=0):
+    """Gold strokes on the icon blue, drawn deterministically from `seed`."""
+    rng = random.Random(seed)
+    img = Image.new('RGBA', (size, size), ICON_BLUE)
+    draw = ImageDraw.Draw(img)
+    for _ in range(24):
+        x0, y0 = rng.randrange(size // 8, size // 2), rng.randrange(size // 8, size // 2)
+        x1, y1 = x0 + rng.randrange(size // 8, size // 2), y0 + rng.randrange(size // 8, size // 2)
+        draw.arc((x0, y0, x1, y1), rng.randrange(360), rng.randrange(360),
+                 fill=ICON_GOLD, width=max(2, size // 48))
+    return img
+
+
+def make_screenshot(size, seed=0):
+    """A fake app screen: header, list rows and text-like noise."""
+    rng = random.Random(seed)
+    width, height = size
+    img = Image.new('RGB', size, SCREEN_BG)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, width, height // 10), fill=(26, 35, 126))
+    row = height // 14
+    for y in range(height // 10, height, row):
+        draw.rounded_rectangle((width // 20, y + 8, width - width // 20, y + row - 8),
+                               radius=row // 4, fill=(27, 38, 59))
+        for _ in range(rng.randrange(6, 14)):
+            x = rng.randrange(width // 10, width - width // 5)
+            draw.rectangle((x, y + row // 3, x + rng.randrange(10, width // 6), y + row // 2),
+                           fill=(rng.randrange(180, 256), rng.randrange(160, 230), 60))
+    return img
+
+
+def make_release_notes(total_bytes, seed=0):
+    rng = random.Random(seed)
+    words = ['prayer', 'times', 'verse', 'notification', 'fixed', 'improved', 'Quran',
+             'reader', 'audio', 'settings', 'layout', 'Android', 'iOS', 'language']
+    sections = []
+    per_locale = total_bytes // 3
+    for lang in ('en-US', 'ar-SA', 'fr-FR'):
+        lines, size = [lang], 0
+        while size < per_locale:
+            line = '- ' + ' '.join(rng.choice(words) for _ in range(12))
+            lines.append(line)
+            size += len(line) + 1
+        sections.append('\n'.join(lines))
+    return '\n\n'.join(sections) + '\n'
+
+
+# --- stages -----------------------------------------------------------------
+#
+# Each stage has a setup(scale) that writes fixtures into the current
+# directory and returns (work units, unit name, callable to time).
+
+def setup_extract_calligraphy(scale):
+    from fix_adaptive_icon import extract_calligraphy
+    size = ICON_SIZES[scale]
+    make_icon(size).save('icon.png')
+    return size * size, 'px', lambda: extract_calligraphy('icon.png')
+
+
+def setup_create_foreground_from_icon(scale):
+    from chroma_key import key_image
+    from fix_icon import create_foreground_from_icon
+    size = ICON_SIZES[scale]
+    icon = make_icon(size)
+    icon.save('icon.png')
+    fg_dir = f'{ANDROID_RES}/drawable-xxxhdpi'
+    os.makedirs(fg_dir)
+    for folder in ('drawable-mdpi', 'drawable-hdpi', 'drawable-xhdpi', 'drawable-xxhdpi'):
+        os.makedirs(f'{ANDROID_RES}/{folder}')
+    key_image(icon).save(f'{fg_dir}/ic_launcher_foreground.png')
+    return size * size, 'px', lambda: create_foreground_from_icon('icon.png', ANDROID_RES)
+
+
+def setup_fix_icon(scale):
+    from fix_ios_icon import fix_icon
+    size = ICON_SIZES[scale]
+    os.makedirs('assets')
+    make_icon(size).save('assets/icon.png')
+    return size * size, 'px', fix_icon
+
+
+def setup_zoom_icon(scale):
+    from zoom_ios_icon import zoom_icon
+    size = ICON_SIZES[scale]
+    os.makedirs('assets')
+    make_icon(size).save('assets/icon.png')
+    return size * size, 'px', zoom_icon
+
+
+def _screenshot_stage(scale, width, profiles, name):
+    from screenshot_renderer import render_group
+    size = SCREEN_SIZES[scale]
+    os.makedirs('assets')
+    src = f'assets/{name}.png'
+    make_screenshot(size).save(src)
+    return size[0] * size[1], 'px', lambda: render_group(src, width, profiles)
+
+
+def setup_resize_screenshots(scale):
+    return _screenshot_stage(scale, 1242, ['iphone_6.5', 'iphone_5.5'], 'screenshot_home')
+
+
+def setup_resize_screenshots_ipad(scale):
+    return _screenshot_stage(scale, 2048, ['ipad_12.9'], 'tablet_screenshot_home')
+
+
+def setup_split_release_notes(scale):
+    from split_release_notes import split_release_notes
+    notes = make_release_notes(NOTES_BYTES[scale])
+    with open('pubspec.yaml', 'w') as f:
+        f.write('name: ayaat\nversion: 9.9.9+99\n')
+    with open('release_notes_v9.9.9.txt', 'w', encoding='utf-8') as f:
+        f.write(notes)
+    return len(notes.encode('utf-8')), 'B', split_release_notes
+
+
+STAGES = {
+    'extract_calligraphy': setup_extract_calligraphy,
+    'create_foreground_from_icon': setup_create_foreground_from_icon,
+    'fix_icon': setup_fix_icon,
+    'zoom_icon': setup_zoom_icon,
+    'resize_screenshots': setup_resize_screenshots,
+    'resize_screenshots_ipad': setup_resize_screenshots_ipad,
+    'split_release_notes': setup_split_release_notes,
+}
+
+
+# --- runner -----------------------------------------------------------------
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Run inside a fresh temporary directory, quietly."""
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp(prefix='ayaat-bench-')
+    os.chdir(path)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def current_rss():
+    """Resident set size in bytes (Linux), or 0 where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def measure(stage, scale):
+    """Child process: set up and time one run of `stage`."""
+    with scratch_dir():
+        units, unit, fn = STAGES[stage](scale)
+        rss_before = current_rss()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    # ru_maxrss is in KB on Linux
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return elapsed, units, unit, traced_peak, max(0, rss_peak - rss_before)
+
+
+def run_stage(stage, scale, repeat):
+    """Best wall time and worst peak memory of `repeat` runs, each in a new process."""
+    best_time, traced, rss = None, 0, 0
+    ctx = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+    for _ in range(repeat):
+        with ctx.Pool(1) as pool:
+            elapsed, units, unit, run_traced, run_rss = pool.apply(measure, (stage, scale))
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+        traced = max(traced, run_traced)
+        rss = max(rss, run_rss)
+    return {'seconds': best_time, 'units': units, 'unit': unit,
+            'peak_bytes': traced, 'rss_growth_bytes': rss}
+
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    """Return a list of regression messages."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            regressions.append(f"{name}: not in the baseline")
+            continue
+        if result['seconds'] > base['seconds'] * (1 + time_threshold):
+            regressions.append(f"{name}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+        for key, label in (('peak_bytes', 'peak traced'), ('rss_growth_bytes', 'RSS growth')):
+            # Ignore noise below 1 MB
+            limit = max(base.get(key, 0) * (1 + memory_threshold), base.get(key, 0) + (1 << 20))
+            if key in base and result[key] > limit:
+                regressions.append(f"{name}: {label} {result[key]:,} B vs baseline {base[key]:,} B")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the asset scripts.')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--sizes', nargs='+', choices=list(ICON_SIZES), default=list(ICON_SIZES))
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; best time is kept')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--time-threshold', type=float, default=0.25,
+                        help='allowed slowdown over baseline (0.25 = 25%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help='allowed peak memory growth over baseline')
+    args = parser.parse_args()
+
+    # Stages import the tools from the repo root
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    baseline_path = os.path.abspath(args.baseline)
+
+    results = {}
+    print(f"{'stage':<40} {'time':>9} {'throughput':>16} {'peak traced':>14} {'RSS growth':>12}")
+    for stage in args.stages:
+        for scale in args.sizes:
+            name = f'{stage}@{scale}'
+            result = run_stage(stage, scale, args.repeat)
+            results[name] = result
+            rate = result['units'] / result['seconds']
+            prefix = 'M' if rate >= 1e6 else 'K'
+            rate /= 1e6 if rate >= 1e6 else 1e3
+            print(f"{name:<40} {result['seconds'] * 1000:>7.1f}ms "
+                  f"{rate:>10.2f} {prefix}{result['unit']}/s {result['peak_bytes'] / 1e6:>11.2f} MB"
+                  f" {result['rss_growth_bytes'] / 1e6:>9.1f} MB")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(baseline_path):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+        sys.exit(1)
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.time_threshold, args.memory_threshold)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the header-only MP3 scan behind ayah_timing.py against reading
+and walking whole files, on synthetic per-ayah recitations.
+
+    python3 bench_ayah_timing.py                   # surahs 1-20, three encodings
+    python3 bench_ayah_timing.py --surahs 2 --full # plus a pooled scan of all 6236 ayahs
+
+Three fixture sets are written: constant bitrate with an Info frame,
+variable bitrate with an Info frame, and variable bitrate without one
+(where the fast path has to fall back to walking). Every method must
+agree on each file's sample count and audio bytes.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from ayah_timing import ayah_paths, pack_table, scan_reciter
+from mp3_frames import Summary, iter_frames, parse_info_frame, summarize
+from quran_fixtures import write_ayah_audio
+
+
+def read_whole(path):
+    """Baseline: read the file into memory and walk every frame."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    count = samples = size = 0
+    sample_rate = None
+    for i, (offset, header) in enumerate(iter_frames(data)):
+        if i == 0 and parse_info_frame(data, offset, header) is not None:
+            continue
+        sample_rate = sample_rate or header.sample_rate
+        count += 1
+        samples += header.samples
+        size += header.length
+    return Summary(count, samples, sample_rate, size, 'frames')
+
+
+METHODS = [
+    ('read whole file + walk', read_whole),
+    ('Xing/Info/VBRI, streamed', summarize),
+    ('walk, 64 KB chunks', lambda path: summarize(path, trust_info=False)),
+    ('walk, header reads only', lambda path: summarize(path, trust_info=False, chunk_size=4)),
+    ('walk, mmap', lambda path: summarize(path, trust_info=False, use_mmap=True)),
+]
+
+
+def run(paths, method):
+    start = time.perf_counter()
+    results = [method(path) for path in paths]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--surahs', type=int, nargs='+', default=list(range(1, 21)))
+    parser.add_argument('--full', action='store_true',
+                        help='also time a pooled scan of all 6236 ayahs (writes ~100 MB)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, vbr, info in (('CBR + Info', False, True), ('VBR + Info', True, True),
+                                 ('VBR, no Info', True, False)):
+            directory = os.path.join(tmp, label.replace(' ', '').replace(',', '').replace('+', '_'))
+            write_ayah_audio(directory, args.surahs, args.seed, vbr=vbr, info=info)
+            paths = [path for path in ayah_paths(directory) if path]
+            total_bytes = sum(os.path.getsize(path) for path in paths)
+
+            print(f"\n{label}: {len(paths)} files, {total_bytes / 1e6:.1f} MB")
+            print(f"{'method':<28} {'files/s':>10} {'MB/s':>10} {'us/file':>10}")
+            expected = None
+            for name, method in METHODS:
+                seconds, results = run(paths, method)
+                counts = [(r.samples, r.bytes) for r in results]
+                if expected is None:
+                    expected = counts
+                mismatches = sum(a != b for a, b in zip(counts, expected))
+                failures += mismatches
+                print(f"{name:<28} {len(paths) / seconds:>10,.0f} "
+                      f"{total_bytes / 1e6 / seconds:>10,.0f} {seconds / len(paths) * 1e6:>10.0f}"
+                      + (f"  {mismatches} MISMATCHED" if mismatches else ''))
+
+        if args.full:
+            directory = os.path.join(tmp, 'full')
+            write_ayah_audio(directory, None, args.seed, vbr=True)
+            paths = ayah_paths(directory)
+            for walk in (False, True):
+                start = time.perf_counter()
+                records = scan_reciter(paths, walk=walk)
+                seconds = time.perf_counter() - start
+                print(f"\nall {len(paths)} ayahs, {'walk' if walk else 'Info'}, process pool: "
+                      f"{seconds:.2f}s ({len(paths) / seconds:,.0f} files/s), "
+                      f"table {len(pack_table(records)):,} bytes, "
+                      f"{sum(r[0] for r in records) / 3600000:.2f}h")
+
+    if failures:
+        print(f"\n{failures} files disagreed between methods")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
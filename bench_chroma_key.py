@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized chroma key (chroma_key.py) against the original
+per-pixel loop from fix_adaptive_icon.py on synthetic icon-like images.
+
+    python3 bench_chroma_key.py                # 1024, 4096 and 8192 px
+    python3 bench_chroma_key.py --sizes 1024 --icon assets/icon.png
+
+Above --legacy-max the per-pixel loop is timed on a band of rows and
+extrapolated, since running it over a full 8192x8192 image takes minutes.
+"""
+import argparse
+import time
+
+from PIL import Image, ImageDraw
+import numpy as np
+
+from chroma_key import ICON_BLUE, key_image
+
+GOLD = (255, 215, 0, 255)
+BAND_ROWS = 256
+
+
+def legacy_extract(source):
+    """The original nested-loop keying, kept here as the reference."""
+    pixels = source.load()
+    width, height = source.size
+    output = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    out_pixels = output.load()
+
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a == 0:
+                continue
+            is_gold = (r > 150 and g > 100) or (r + g > b * 2 and r > 80 and g > 60)
+            if is_gold:
+                out_pixels[x, y] = (r, g, b, a)
+            else:
+                out_pixels[x, y] = (0, 0, 0, 0)
+
+    return output
+
+
+def synthetic_icon(size):
+    """Gold strokes on the icon blue with soft edges and a transparent margin."""
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    margin = size // 16
+    draw.rounded_rectangle(
+        (margin, margin, size - margin, size - margin),
+        radius=size // 6,
+        fill=ICON_BLUE + (255,),
+    )
+    step = size // 8
+    for i in range(1, 7):
+        draw.arc(
+            (i * step // 2, i * step // 2, size - i * step // 2, size - i * step // 3),
+            start=20 * i,
+            end=180 + 20 * i,
+            fill=GOLD,
+            width=max(2, size // 64),
+        )
+    # Downsample a 2x render so stroke edges contain blended gold/blue pixels
+    big = img.resize((size * 2, size * 2), Image.Resampling.NEAREST)
+    return big.resize((size, size), Image.Resampling.BOX)
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def bench(image, legacy_max):
+    width, height = image.size
+    fast_time, fast = time_call(key_image, image)
+    soft_time, _ = time_call(lambda im: key_image(im, soft=True), image)
+
+    if width <= legacy_max:
+        legacy_time, legacy = time_call(legacy_extract, image)
+        identical = np.array_equal(np.asarray(legacy), np.asarray(fast))
+        estimated = False
+    else:
+        band = image.crop((0, height // 2, width, height // 2 + BAND_ROWS))
+        band_time, legacy = time_call(legacy_extract, band)
+        legacy_time = band_time * height / BAND_ROWS
+        expected = fast.crop((0, height // 2, width, height // 2 + BAND_ROWS))
+        identical = np.array_equal(np.asarray(legacy), np.asarray(expected))
+        estimated = True
+
+    return legacy_time, estimated, fast_time, soft_time, identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1024, 4096, 8192])
+    parser.add_argument('--legacy-max', type=int, default=1024,
+                        help='largest size the per-pixel loop is run on in full')
+    parser.add_argument('--icon', help='also benchmark a real image, e.g. assets/icon.png')
+    args = parser.parse_args()
+
+    cases = [(f'synthetic {s}x{s}', synthetic_icon(s)) for s in args.sizes]
+    if args.icon:
+        cases.insert(0, (args.icon, Image.open(args.icon).convert('RGBA')))
+
+    print(f"{'input':<24} {'legacy':>12} {'vectorized':>12} {'soft':>10} {'speedup':>9}  identical")
+    for name, image in cases:
+        legacy_time, estimated, fast_time, soft_time, identical = bench(image, args.legacy_max)
+        legacy_col = f"{legacy_time:.2f}s" + (' est.' if estimated else '')
+        print(f"{name:<24} {legacy_col:>12} {fast_time * 1000:>10.1f}ms "
+              f"{soft_time * 1000:>8.1f}ms {legacy_time / fast_time:>8.0f}x  "
+              f"{'yes' if identical else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark edition delta patches (edition_patch.py) over synthetic text
+corrections, and check that they round-trip.
+
+    python3 bench_edition_patch.py
+    python3 bench_edition_patch.py --counts 1 50 500 --editions en.sahih
+
+For each edition, kind of edit and number of edited ayahs, a patch is
+made from the fixture snapshot to the edited one and applied to a copy
+of the fixture corpus. Sizes are compared with what the app fetches
+today to pick the correction up: the /surah/{n}/{edition} responses of
+every touched surah, or the whole /quran/{edition}. Apply time is
+compared with rebuilding the corpus from the edited dumps.
+
+Every case is checked: the patch reads back to the edited ayahs, the
+patched corpus is byte-identical to the rebuilt one, two patches chained
+through an intermediate snapshot give the same corpus, and a patch is
+refused by a corpus it was not made from. Any failure exits 1.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from edition_patch import apply_patches, diff, make_patch, read_patch
+from quran_corpus import DEFAULT_EDITIONS, build_corpus, load_dump
+from quran_fixtures import ARABIC_LETTERS, WORDS, edition_info, write_dumps
+
+KINDS = ('typo', 'word', 'rewrite')
+LATIN_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def random_word(rng, language):
+    if language == 'ar':
+        return ''.join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(2, 7)))
+    return rng.choice(WORDS.get(language, WORDS['en']))
+
+
+def edit(text, kind, rng, language):
+    """`text` with one changed letter, one changed word, or rewritten."""
+    words = text.split(' ')
+    while True:
+        if kind == 'typo':
+            i = rng.randrange(len(text))
+            letters = ARABIC_LETTERS if language == 'ar' else LATIN_LETTERS
+            changed = text[:i] + rng.choice(letters) + text[i + 1:]
+        elif kind == 'word':
+            i = rng.randrange(len(words))
+            changed = ' '.join(words[:i] + [random_word(rng, language)] + words[i + 1:])
+        else:
+            changed = ' '.join(random_word(rng, language) for _ in words)
+        if changed != text:
+            return changed
+
+
+def edited(surahs, numbers, kind, rng, language):
+    """A copy of `surahs` with the ayahs `numbers` edited."""
+    copy = []
+    for surah in surahs:
+        ayahs = [dict(ayah, text=edit(ayah['text'], kind, rng, language)) if ayah['number'] in numbers
+                 else ayah for ayah in surah['ayahs']]
+        copy.append(dict(surah, ayahs=ayahs))
+    return copy
+
+
+def texts(surahs):
+    return [ayah['text'] for surah in surahs for ayah in surah['ayahs']]
+
+
+def response_size(data):
+    return len(json.dumps({'code': 200, 'status': 'OK', 'data': data}, ensure_ascii=False).encode('utf-8'))
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--editions', nargs='+', default=list(DEFAULT_EDITIONS))
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='edited ayahs per patch')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        editions = [load_dump(path) for path in write_dumps(os.path.join(tmp, 'dumps'), DEFAULT_EDITIONS)]
+        base_path = os.path.join(tmp, 'base.bin')
+        build_corpus(editions, base_path)
+        work_path = os.path.join(tmp, 'work.bin')
+        expected_path = os.path.join(tmp, 'expected.bin')
+
+        print(f"{'edition':<15} {'edit':<8} {'ayahs':>5} {'patch':>9} {'surah JSON':>11} "
+              f"{'edition JSON':>13} {'diff':>8} {'apply':>8} {'rebuild':>8}")
+        for e, (name, surahs) in enumerate(editions):
+            if name not in args.editions:
+                continue
+            edition = edition_info(name)
+            language = edition['language']
+            whole = response_size({'surahs': surahs, 'edition': edition})
+            old = texts(surahs)
+            for kind in KINDS:
+                for count in args.counts:
+                    label = f'{name} {kind} x{count}'
+                    numbers = set(rng.sample(range(1, len(old) + 1), count))
+                    new_surahs = edited(surahs, numbers, kind, rng, language)
+                    new = texts(new_surahs)
+
+                    start = time.perf_counter()
+                    data = make_patch(name, old, new)
+                    diff_time = time.perf_counter() - start
+
+                    shutil.copyfile(base_path, work_path)
+                    start = time.perf_counter()
+                    apply_patches(work_path, [read_patch(data)])
+                    apply_time = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    build_corpus(editions[:e] + [(name, new_surahs)] + editions[e + 1:], expected_path)
+                    rebuild_time = time.perf_counter() - start
+
+                    touched = [s for s in new_surahs if any(a['number'] in numbers for a in s['ayahs'])]
+                    refetch = sum(response_size(dict(s, edition=edition)) for s in touched)
+                    print(f"{name:<15} {kind:<8} {count:>5} {len(data):>8,}B {refetch:>10,}B "
+                          f"{whole:>12,}B {diff_time * 1e3:>6.1f}ms {apply_time * 1e3:>6.0f}ms "
+                          f"{rebuild_time * 1e3:>6.0f}ms")
+
+                    if read_patch(data).changes != diff(old, new) or len(diff(old, new)) != count:
+                        failures.append(f'{label}: patch does not read back to the edits')
+                    if read(work_path) != read(expected_path):
+                        failures.append(f'{label}: patched corpus differs from the rebuilt one')
+
+                    half = set(sorted(numbers)[:count // 2])
+                    middle = [b if n in half else a for n, (a, b) in enumerate(zip(old, new), 1)]
+                    shutil.copyfile(base_path, work_path)
+                    apply_patches(work_path, [read_patch(make_patch(name, old, middle)),
+                                              read_patch(make_patch(name, middle, new))])
+                    if read(work_path) != read(expected_path):
+                        failures.append(f'{label}: chained patches differ from the rebuilt one')
+
+                    try:
+                        apply_patches(expected_path, [read_patch(data)])
+                        failures.append(f'{label}: patch applied twice')
+                    except ValueError:
+                        pass
+
+    print(f"\n{len(failures)} round-trip failures")
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
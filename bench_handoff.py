@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Measure what shared memory handoff saves on the full asset pipeline:
+the same graph (asset_pipeline.py) is built with every intermediate
+passed as a PNG file, then as a shared memory frame, and the PNG
+encode/decode time and bytes of each are compared.
+
+    python3 bench_handoff.py
+    python3 bench_handoff.py --workers 4 --profiles iphone_6.7 ipad_12.9
+
+Each mode builds in its own temporary copy of the sources, so the
+checkout, its build cache and .asset_store/ are not touched. Two
+builds are timed per mode: a cold one, and a rebuild after changing
+--foreground-ratio, where shm mode has to rebuild the frames the
+foregrounds need before it can run them.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from asset_graph import HANDOFFS
+from asset_pipeline import build_graph
+
+COLUMNS = [
+    ('png_decodes', 'decodes', '{:.0f}'),
+    ('png_decode_seconds', 'decode s', '{:.2f}'),
+    ('png_decode_bytes', 'decode MB', '{:.1f}'),
+    ('png_encodes', 'encodes', '{:.0f}'),
+    ('png_encode_seconds', 'encode s', '{:.2f}'),
+    ('png_encode_bytes', 'encode MB', '{:.1f}'),
+    ('shm_bytes', 'shm MB', '{:.1f}'),
+]
+
+
+def copy_sources(graph, root, work):
+    """Copy every file the graph reads but does not produce into `work`."""
+    _, producer = graph.order()
+    for stage in graph.stages.values():
+        for name in stage.inputs:
+            if name in producer or os.path.isabs(name):
+                continue
+            target = os.path.join(work, name)
+            os.makedirs(os.path.dirname(target) or work, exist_ok=True)
+            shutil.copyfile(os.path.join(root, name), target)
+
+
+def build(args, handoff, root):
+    """Cold build then a foreground ratio change; [(label, wall, stats)]."""
+    results = []
+    work = tempfile.mkdtemp(prefix=f'handoff-{handoff}-')
+    try:
+        copy_sources(build_graph(args.zoom, args.foreground_ratio, profiles=args.profiles,
+                                 handoff=handoff), root, work)
+        os.chdir(work)
+        for label, ratio, force in (('cold', args.foreground_ratio, True),
+                                    ('ratio change', args.foreground_ratio + 0.05, False)):
+            graph = build_graph(args.zoom, ratio, profiles=args.profiles, handoff=handoff)
+            report, wall = graph.run(args.workers, force=force, log=lambda *a: None)
+            ran = sum(1 for status, _, _ in report.values() if status == 'ran')
+            results.append((label, wall, ran, graph.io_stats))
+    finally:
+        os.chdir(root)
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def value(stats, key):
+    return stats.get(key, 0) / (1e6 if key.endswith('_bytes') else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--profiles', nargs='+', help='screenshot device profiles (default: all)')
+    parser.add_argument('--zoom', type=float)
+    parser.add_argument('--foreground-ratio', type=float, default=0.66)
+    args = parser.parse_args()
+
+    root = os.getcwd()
+    results = {handoff: build(args, handoff, root) for handoff in HANDOFFS}
+
+    print(f"{'build':<20} {'handoff':<8} {'wall s':>7} {'stages':>6} "
+          + ' '.join(f'{title:>10}' for _, title, _ in COLUMNS))
+    for i, (label, _, _, _) in enumerate(results[HANDOFFS[0]]):
+        for handoff in HANDOFFS:
+            _, wall, ran, stats = results[handoff][i]
+            print(f"{label:<20} {handoff:<8} {wall:>7.2f} {ran:>6} "
+                  + ' '.join(f'{fmt.format(value(stats, key)):>10}' for key, _, fmt in COLUMNS))
+
+        png, shm = results['png'][i][3], results['shm'][i][3]
+        seconds = sum(png.get(k, 0) - shm.get(k, 0) for k in ('png_decode_seconds', 'png_encode_seconds'))
+        saved = sum(png.get(k, 0) - shm.get(k, 0) for k in ('png_decode_bytes', 'png_encode_bytes'))
+        copies = shm.get('shm_put_seconds', 0) + shm.get('shm_get_seconds', 0)
+        print(f"  shm saves {seconds:.2f}s of PNG coding and {saved / 1e6:.1f} MB of PNG I/O "
+              f"for {copies:.2f}s of shared memory copies; "
+              f"wall {results['shm'][i][1] - results['png'][i][1]:+.2f}s\n")
+
+
+if __name__ == '__main__':
+    main()
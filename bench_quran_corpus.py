@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-verse lookups from the offline corpus (quran_corpus.py)
+against parsing the equivalent alquran.cloud JSON.
+
+    python3 bench_quran_corpus.py                  # synthetic fixtures
+    python3 bench_quran_corpus.py --dumps dumps/ar.json dumps/en.sahih.json
+
+The JSON baselines leave the network out entirely, so they are the best
+the app could do with the API's payloads: parsing the /surah response
+that holds the verse, and loading a whole edition dump once. Every ayah
+read back from the corpus is checked against its source text.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+
+from common_io import percentiles
+from quran_corpus import Corpus, TOTAL_AYAHS, build_corpus, load_dump
+from quran_fixtures import write_dumps
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def verify(corpus, editions):
+    """Number of ayahs whose text differs from the source dump."""
+    mismatches = 0
+    for identifier, surahs in editions:
+        for surah in surahs:
+            for ayah in surah['ayahs']:
+                if corpus.text(ayah['number'], identifier) != ayah['text']:
+                    mismatches += 1
+    return mismatches
+
+
+def surah_responses(editions):
+    """/surah/{n}/{edition} response bodies, as the app would receive them."""
+    return {(identifier, surah['number']): json.dumps({'code': 200, 'status': 'OK', 'data': surah},
+                                                      ensure_ascii=False)
+            for identifier, surahs in editions for surah in surahs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dumps', nargs='+', help='edition dumps (default: synthetic fixtures)')
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.dumps or write_dumps(tmp)
+        editions = [load_dump(path) for path in paths]
+        names = [identifier for identifier, _ in editions]
+        json_bytes = sum(os.path.getsize(path) for path in paths)
+        gzip_bytes = 0
+        for path in paths:
+            with open(path, 'rb') as f:
+                gzip_bytes += len(gzip.compress(f.read()))
+
+        corpus_path = os.path.join(tmp, 'quran_corpus.bin')
+        build_time, corpus_bytes = timed(build_corpus, editions, corpus_path)
+
+        print(f"editions: {', '.join(names)}")
+        print(f"JSON {json_bytes:,} B, gzipped JSON {gzip_bytes:,} B, "
+              f"corpus {corpus_bytes:,} B ({100 * corpus_bytes / json_bytes:.1f}% of JSON), "
+              f"built in {build_time:.2f}s")
+
+        rng = random.Random(args.seed)
+        queries = [(rng.randint(1, TOTAL_AYAHS), rng.choice(names)) for _ in range(args.lookups)]
+        surah_of = {ayah['number']: surah['number']
+                    for surah in editions[0][1] for ayah in surah['ayahs']}
+        responses = surah_responses(editions)
+
+        def run(lookup):
+            samples = []
+            for number, identifier in queries:
+                start = time.perf_counter()
+                lookup(number, identifier)
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        def parse_surah_response(number, identifier):
+            data = json.loads(responses[(identifier, surah_of[number])])['data']
+            first = data['ayahs'][0]['number']
+            return data['ayahs'][number - first]['text']
+
+        open_time, cold = timed(Corpus, corpus_path, 0)
+        warm = Corpus(corpus_path)
+        results = [
+            ('corpus, no block cache', run(cold.text)),
+            ('corpus, 16-block cache', run(warm.text)),
+            ('JSON /surah response parse', run(parse_surah_response)),
+        ]
+
+        load_times = []
+        for path in paths:
+            load_times.append(timed(load_dump, path)[0])
+
+        print(f"\ncorpus open: {open_time * 1e6:.0f}us; whole-edition JSON load: "
+              f"{sum(load_times) / len(load_times) * 1000:.0f}ms per edition")
+        print(f"\n{'lookup':<30} {'p50':>10} {'p95':>10} {'p99':>10} {'lookups/s':>11}")
+        for label, samples in results:
+            p50, p95, p99 = percentiles(samples)
+            print(f"{label:<30} {p50 * 1e6:>8.1f}us {p95 * 1e6:>8.1f}us {p99 * 1e6:>8.1f}us "
+                  f"{len(samples) / sum(samples):>11,.0f}")
+
+        mismatches = verify(warm, editions)
+        print(f"\nround trip: {len(names) * TOTAL_AYAHS - mismatches:,}/{len(names) * TOTAL_AYAHS:,}"
+              f" ayahs identical")
+        cold.close()
+        warm.close()
+        if mismatches:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark the generated lookup tables (quran_tables.py) against the
+runtime paths they replace, and check that they agree with them.
+
+    python3 bench_quran_tables.py
+    python3 bench_quran_tables.py --dumps dumps/*.json --repeat 9
+
+  - numerals: QuranApiService.toArabicNumerals (ten replace passes) for
+    every number 1..6236, against an arabicNumerals lookup and a
+    one-pass translation
+  - surah list: getSurahs' first call per AppLanguage, a /surah request
+    to the local API stand-in (its default latency) and the JSON decode,
+    against building the list from the table
+  - ayah offsets: global ayah number <-> (surah, number in surah) by
+    summing numberOfAyahs over the fetched list, as a caller holding
+    only getSurahs has to, against the firstAyah prefix table
+
+These are Python ports of the Dart code, so the ratios carry over
+better than the absolute times. Every numeral, list entry and
+conversion is checked; any mismatch exits 1.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from api_standin import StandIn, load_data
+from mini_http import fetch, serve
+from quran_corpus import SURAH_COUNT, TOTAL_AYAHS
+from quran_fixtures import write_dumps
+from quran_tables import (ARABIC_DIGITS, arabic_numerals, first_ayahs, global_ayah, metas_from_dumps,
+                          render_dart, surah_ayah, surah_table)
+from verse_schedule import LANGUAGES
+
+API_KEYS = ('number', 'name', 'englishName', 'englishNameTranslation', 'revelationType', 'numberOfAyahs')
+
+
+def to_arabic_numerals(text):
+    """QuranApiService.toArabicNumerals."""
+    for english, arabic in zip('0123456789', '٠١٢٣٤٥٦٧٨٩'):
+        text = text.replace(english, arabic)
+    return text
+
+
+def linear_global(surahs, surah, number_in_surah):
+    return sum(s['numberOfAyahs'] for s in surahs[:surah - 1]) + number_in_surah
+
+
+def linear_surah_ayah(surahs, number):
+    for s in surahs:
+        if number <= s['numberOfAyahs']:
+            return s['number'], number
+        number -= s['numberOfAyahs']
+    raise ValueError(number)
+
+
+def best(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples), result
+
+
+async def fetch_lists(standin):
+    """(seconds, decode seconds, list) of each language's cold /surah fetch."""
+    server = await serve(standin.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    results = []
+    async with server:
+        for _ in LANGUAGES:
+            start = time.perf_counter()
+            response = await fetch(f'http://127.0.0.1:{port}/v1/surah')
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            data = response.json()['data']
+            results.append((elapsed, time.perf_counter() - start, data))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dumps', nargs='+', help='edition dumps (default: synthetic fixtures)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dumps = args.dumps or write_dumps(os.path.join(tmp, 'dumps'))
+        start = time.perf_counter()
+        table = surah_table(metas_from_dumps(dumps))
+        dart = render_dart(table, dumps)
+        generate = time.perf_counter() - start
+        standin = StandIn(load_data(dumps, args.seed), seed=args.seed)
+        fetched = asyncio.run(fetch_lists(standin))
+    print(f"generated {len(dart.encode('utf-8')):,} bytes of Dart in {generate * 1e3:.0f}ms\n")
+
+    numbers = [str(n) for n in range(1, TOTAL_AYAHS + 1)]
+    numerals = arabic_numerals()
+    runtime, expected = best(lambda: [to_arabic_numerals(n) for n in numbers], args.repeat)
+    lookup, looked_up = best(lambda: [numerals[n] for n in range(1, TOTAL_AYAHS + 1)], args.repeat)
+    one_pass, translated = best(lambda: [n.translate(ARABIC_DIGITS) for n in numbers], args.repeat)
+    failures += [f'numeral {n}: table {a!r}, runtime {b!r}'
+                 for n, a, b in zip(numbers, looked_up, expected) if a != b]
+    failures += [f'numeral {n}: one pass {a!r}, runtime {b!r}'
+                 for n, a, b in zip(numbers, translated, expected) if a != b]
+
+    print(f"{'numerals 1..' + str(TOTAL_AYAHS):<36} {'total':>10} {'per call':>10}")
+    for label, seconds in (('toArabicNumerals (10 passes)', runtime), ('arabicNumerals lookup', lookup),
+                           ('toArabicDigits (one pass)', one_pass)):
+        print(f"{label:<36} {seconds * 1e3:>8.2f}ms {seconds / TOTAL_AYAHS * 1e9:>8.0f}ns")
+
+    surahs = fetched[0][2]
+    build, built = best(lambda: [{key: s[key] for key in API_KEYS} for s in table], args.repeat)
+    for (language, _), (_, _, data) in zip(LANGUAGES, fetched):
+        if built != data:
+            failures.append(f'surah list ({language}) differs from /surah')
+    fetch_times = [seconds for seconds, _, _ in fetched]
+    decode_times = [seconds for _, seconds, _ in fetched]
+    print(f"\n{'getSurahs, first call per language':<36} {'p50':>10} {'max':>10}")
+    print(f"{'/surah fetch':<36} {statistics.median(fetch_times) * 1e3:>8.1f}ms "
+          f"{max(fetch_times) * 1e3:>8.1f}ms")
+    print(f"{'+ JSON decode of the body':<36} {statistics.median(decode_times) * 1e3:>8.2f}ms "
+          f"{max(decode_times) * 1e3:>8.2f}ms")
+    print(f"{'table (const, no request)':<36} {build * 1e3:>8.2f}ms "
+          f"({len(LANGUAGES)} languages, {len(fetched)} requests saved)")
+
+    firsts = first_ayahs()
+    pairs = [(s['number'], n) for s in surahs for n in range(1, s['numberOfAyahs'] + 1)]
+    linear_to, expected_global = best(lambda: [linear_global(surahs, s, n) for s, n in pairs], args.repeat)
+    table_to, table_global = best(lambda: [global_ayah(s, n, firsts) for s, n in pairs], args.repeat)
+    globals_ = range(1, TOTAL_AYAHS + 1)
+    linear_from, expected_pairs = best(lambda: [linear_surah_ayah(surahs, g) for g in globals_], args.repeat)
+    table_from, table_pairs = best(lambda: [surah_ayah(g, firsts) for g in globals_], args.repeat)
+    if expected_global != list(globals_) or table_global != expected_global:
+        failures.append('(surah, ayah) -> global disagrees with the running count')
+    if table_pairs != expected_pairs or table_pairs != pairs:
+        failures.append('global -> (surah, ayah) disagrees with the running count')
+    if len(firsts) != SURAH_COUNT + 1:
+        failures.append(f'firstAyah has {len(firsts)} entries')
+
+    print(f"\n{'ayah offsets, all ' + str(TOTAL_AYAHS):<36} {'sum list':>10} {'table':>10} {'speedup':>8}")
+    for label, slow, fast in (('(surah, ayah) -> global', linear_to, table_to),
+                              ('global -> (surah, ayah)', linear_from, table_from)):
+        print(f"{label:<36} {slow * 1e3:>8.2f}ms {fast * 1e3:>8.2f}ms {slow / fast:>7.1f}x")
+    print(f"\nnumerals: lookup {runtime / lookup:.1f}x, one pass {runtime / one_pass:.1f}x "
+          f"faster than toArabicNumerals")
+
+    print(f"\n{len(failures)} mismatches")
+    for failure in failures[:20]:
+        print(f"  {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Measure what stage tracing (stage_trace.py) costs, off and on.
+
+    python3 bench_stage_trace.py
+    python3 bench_stage_trace.py --calls 1000000 --repeat 9
+
+Off: the cost of a span() enter/exit plus a count() call against an
+empty loop, per call, and the adaptive foreground build (decode a
+1024 px icon, key it, cascade the foreground sizes, encode them) with
+the calls in place. On: the same build with every stage and PIL decode,
+encode and resize traced. The build runs in memory on a rendered icon,
+so no repository assets are touched.
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from PIL import Image
+
+import stage_trace
+from chroma_key import key_image
+from icon_pyramid import FOREGROUND_SIZES, Pyramid, centered_canvases
+from icon_text import REFERENCE_SIZE, find_font, render_icon
+
+
+def per_call(calls):
+    """Nanoseconds per disabled span() + count(), over an empty loop."""
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        pass
+    empty = time.perf_counter_ns() - start
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        with stage_trace.span('stage'):
+            stage_trace.count(pixels=1)
+    return (time.perf_counter_ns() - start - empty) / calls
+
+
+def build(source):
+    """The fix_adaptive_icon.py foreground build, writing to memory."""
+    with stage_trace.span('build'):
+        calligraphy = key_image(Image.open(source).convert('RGBA'))
+        calligraphy = calligraphy.crop(calligraphy.getbbox())
+        with stage_trace.span('foregrounds'):
+            for _, _, canvas in centered_canvases(Pyramid(calligraphy), FOREGROUND_SIZES, 0.66):
+                canvas.save(io.BytesIO(), 'PNG')
+
+
+def timed(source, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(source)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    if stage_trace.enabled():
+        raise SystemExit(f"Unset {stage_trace.ENV}: the disabled case has to run first")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'icon.png')
+        render_icon(REFERENCE_SIZE, find_font()).save(source)
+        build(source)  # warm up imports and caches
+
+        off_call = per_call(args.calls)
+        off = timed(source, args.repeat)
+
+        trace = os.path.join(tmp, 'trace.json')
+        stage_trace.enable(trace)
+        on_call = per_call(args.calls // 10)
+        on = timed(source, args.repeat)
+        spans = len(stage_trace.read_events(trace)) - args.calls // 10
+
+    print(f"{'':<28} {'off':>10} {'on':>10}")
+    print(f"{'span() + count() per call':<28} {off_call:>8.0f}ns {on_call:>8.0f}ns")
+    print(f"{'adaptive foreground build':<28} {off * 1e3:>8.1f}ms {on * 1e3:>8.1f}ms "
+          f"({100 * (on - off) / off:+.1f}% on, {spans // args.repeat} spans per build)")
+    cost = off_call * spans / args.repeat
+    print(f"off, the build's {spans // args.repeat} span() calls cost {cost / 1e3:.1f}us, "
+          f"{100 * cost / (off * 1e9):.3f}% of it")
+
+
+if __name__ == '__main__':
+    main()
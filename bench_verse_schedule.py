@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark building a week of notification verses from the bundled
+schedule (verse_schedule.py) against the app's batched fetch, replayed
+against the local API stand-in.
+
+    python3 bench_verse_schedule.py
+    python3 bench_verse_schedule.py --devices 20 --rate 5 --burst 10 --error-rate 0.02
+    python3 bench_verse_schedule.py --time-scale 0.1     # shrink the 1.5 s batch delays
+
+The fetch side is api_loadgen.py's `notifications` pattern: 35
+getRandomVerse calls in batches of 7, 1.5 s apart, with
+_fetchWithRetry's backoff. --devices phones schedule at once against
+one stand-in that rate-limits each of them separately. The bundle side
+opens the schedule file and looks up the same 35 verses; it is timed
+both cold (read and inflate per device) and warm.
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from api_loadgen import NOTIFICATION_VERSES, Client, Stats
+from api_standin import StandIn, load_data
+from common_io import percentiles
+from mini_http import serve
+from quran_corpus import open_corpus
+from quran_fixtures import write_dumps
+from verse_schedule import DEFAULT_SLOTS, Schedule, pack_schedule
+
+
+async def fetch_schedules(standin, devices, time_scale, seed):
+    """Per-device seconds to fetch a week of verses, and whether every fetch succeeded."""
+    server = await serve(standin.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    stats = Stats()
+
+    async def device(i):
+        client = Client(f'http://127.0.0.1:{port}/v1', stats, random.Random(seed + i),
+                        f'device-{i}', time_scale)
+        start = time.perf_counter()
+        ok = await client.notifications()
+        return time.perf_counter() - start, ok
+
+    async with server:
+        results = await asyncio.gather(*(device(i) for i in range(devices)))
+    return results, stats
+
+
+def time_bundle(path, devices, start):
+    cold = []
+    for _ in range(devices):
+        t = time.perf_counter()
+        Schedule.open(path).week(start, times=DEFAULT_SLOTS, language='en')
+        cold.append(time.perf_counter() - t)
+    schedule = Schedule.open(path)
+    warm = []
+    for day in range(devices):
+        t = time.perf_counter()
+        schedule.week(start + datetime.timedelta(days=day), times=DEFAULT_SLOTS, language='en')
+        warm.append(time.perf_counter() - t)
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dumps', nargs='+', help='edition dumps (default: synthetic fixtures)')
+    parser.add_argument('--devices', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=0,
+                        help='stand-in requests per second per device before 429s (0 = unlimited)')
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='scale the app\'s batch delay and retry backoff')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dumps = args.dumps or write_dumps(tmp)
+        start = time.perf_counter()
+        with open_corpus(dumps, tmp=tmp) as corpus:
+            data = pack_schedule(corpus, seed=args.seed)
+        build_time = time.perf_counter() - start
+        path = os.path.join(tmp, 'notification_schedule.bin')
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f"bundle: {len(data):,} bytes, built (with its corpus) in {build_time:.2f}s")
+
+        standin = StandIn(load_data(args.dumps, args.seed), rate=args.rate, burst=args.burst,
+                          error_rate=args.error_rate, seed=args.seed)
+        wall = time.perf_counter()
+        results, stats = asyncio.run(fetch_schedules(standin, args.devices, args.time_scale,
+                                                     args.seed))
+        wall = time.perf_counter() - wall
+        fetch = [seconds for seconds, _ in results]
+        failed = sum(1 for _, ok in results if not ok)
+        cold, warm = time_bundle(path, args.devices, datetime.date.today())
+
+    print(f"\n{args.devices} devices x {NOTIFICATION_VERSES} verses "
+          f"(time scale {args.time_scale:g}, rate {args.rate:g}/s, error rate {args.error_rate:g})")
+    print(f"{'schedule build':<28} {'p50':>10} {'p95':>10} {'max':>10}")
+    for label, samples, scale, unit in (('batched API fetch', fetch, 1, 's'),
+                                        ('bundle, cold open', cold, 1e6, 'us'),
+                                        ('bundle, warm', warm, 1e6, 'us')):
+        p50, p95 = percentiles(samples, (50, 95))
+        print(f"{label:<28} {p50 * scale:>8.2f}{unit:>2} {p95 * scale:>8.2f}{unit:>2} "
+              f"{max(samples) * scale:>8.2f}{unit:>2}")
+    statuses = ', '.join(f'{status}: {count}' for status, count in sorted(stats.statuses.items(), key=str))
+    print(f"\nAPI: {len(stats.requests)} requests in {wall:.2f}s ({statuses}); "
+          f"{failed} devices fell back to a built-in verse")
+    print(f"bundle: 0 requests; cold open is {percentiles(fetch, (50,))[0] / percentiles(cold, (50,))[0]:,.0f}x "
+          f"faster than the fetch at p50")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark verse search queries against the compact index (verse_search.py)
+and check every answer against a linear scan of the normalized texts.
+
+    python3 bench_verse_search.py                  # synthetic fixtures
+    python3 bench_verse_search.py --dumps dumps/ar.json dumps/en.sahih.json dumps/fr.hamidullah.json
+
+Queries are drawn from the texts themselves, per edition: an exact word,
+a 3-character prefix, and two words of one verse with the second typed
+as a prefix (search as you type). The target is well under a
+millisecond per query; the linear scan is what searching verses the way
+surah_list_screen.dart searches names would cost.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common_io import percentiles
+from quran_corpus import TOTAL_AYAHS, open_corpus
+from quran_fixtures import write_dumps
+from verse_search import SearchIndex, build_index, tokens
+
+
+def make_queries(texts, rng, count):
+    """{kind: [(query, exact)]} for one edition's {number: token list}."""
+    numbers = [n for n, words in texts.items() if len(words) >= 2]
+    queries = {'exact word': [], '3-char prefix': [], 'word + prefix': []}
+    while min(len(q) for q in queries.values()) < count:
+        words = texts[rng.choice(numbers)]
+        first, second = rng.sample(words, 2)
+        queries['exact word'].append((first, True))
+        if len(second) >= 3:
+            queries['3-char prefix'].append((second[:3], False))
+            queries['word + prefix'].append((f'{first} {second[:max(3, len(second) - 1)]}', False))
+    return {kind: q[:count] for kind, q in queries.items()}
+
+
+def scan(texts, query, exact):
+    """Linear scan baseline: verses holding every word, the last as a prefix unless `exact`."""
+    words = tokens(query)
+    *whole, last = words
+    return [n for n, verse in texts.items()
+            if all(w in verse for w in whole)
+            and (last in verse if exact else any(t.startswith(last) for t in verse))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dumps', nargs='+', help='edition dumps (default: synthetic fixtures)')
+    parser.add_argument('--queries', type=int, default=300, help='queries per kind and edition')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open_corpus(args.dumps or write_dumps(tmp), tmp=tmp) as corpus:
+            editions = corpus.editions
+            raw = {e: {n: corpus.text(n, e) for n in range(1, TOTAL_AYAHS + 1)} for e in editions}
+            start = time.perf_counter()
+            data = build_index(corpus, editions)
+            build_time = time.perf_counter() - start
+        path = os.path.join(tmp, 'verse_search.bin')
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        text_bytes = sum(len(t.encode('utf-8')) for texts in raw.values() for t in texts.values())
+        print(f"index: {len(data):,} bytes for {text_bytes:,} bytes of text "
+              f"({100 * len(data) / text_bytes:.0f}%), built in {build_time:.2f}s")
+
+        start = time.perf_counter()
+        index = SearchIndex.open(path)
+        for section in index.sections.values():
+            section.first_terms()
+        print(f"open + block tables: {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+    print(f"\n{'edition':<16} {'query':<15} {'p50':>9} {'p95':>9} {'p99':>9} {'hits p50':>9} "
+          f"{'scan p50':>10}")
+    for edition in editions:
+        texts = {n: set(tokens(t)) for n, t in raw[edition].items()}
+        ordered = {n: tokens(t) for n, t in raw[edition].items()}
+        for kind, queries in make_queries(ordered, rng, args.queries).items():
+            samples, hits = [], []
+            for query, exact in queries:
+                start = time.perf_counter()
+                found = index.search(query, [edition], prefix=not exact)
+                samples.append(time.perf_counter() - start)
+                hits.append(len(found))
+                if found != scan(texts, query, exact):
+                    mismatches += 1
+            scans = []
+            for query, exact in queries[:20]:
+                start = time.perf_counter()
+                scan(texts, query, exact)
+                scans.append(time.perf_counter() - start)
+            p50, p95, p99 = percentiles(samples)
+            print(f"{edition:<16} {kind:<15} {p50 * 1e6:>7.0f}us {p95 * 1e6:>7.0f}us "
+                  f"{p99 * 1e6:>7.0f}us {percentiles(hits, (50,))[0]:>9} "
+                  f"{percentiles(scans, (50,))[0] * 1e3:>8.1f}ms")
+
+    print(f"\n{mismatches} queries differ from the linear scan")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Content-addressed build manifest for the generated assets.
+
+Each stage is keyed by a SHA-256 of its input bytes plus its parameters
+(target size, padding ratio, background color, resample filter, ...).
+When the key and the outputs on disk still match what was recorded, the
+stage is skipped without opening a single image.
+
+Input digests are cached against (size, mtime) so an unchanged tree is
+checked with stat() calls alone; files are only re-hashed once they move.
+
+    cache = BuildCache()
+    if not cache.up_to_date(outputs, inputs, params):
+        ... build ...
+        cache.record(outputs, inputs, params)
+    cache.save()
+"""
+import hashlib
+import json
+import os
+
+MANIFEST_PATH = '.asset_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _check_in_place(outputs, inputs):
+    """
+    Refuse a stage that writes one of its own inputs: outputs are keyed by
+    path, so the next stage to touch that file would be keyed on this one's
+    result and a rerun would process it a second time.
+    """
+    shared = set(map(os.path.normpath, outputs)) & set(map(os.path.normpath, inputs))
+    if shared:
+        raise ValueError(f"stage writes its own input: {', '.join(sorted(shared))}")
+
+
+def _stat_signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class BuildCache:
+    def __init__(self, path=MANIFEST_PATH, force=False):
+        self.path = path
+        self.force = force
+        self.dirty = False
+        self.files = {}
+        self.outputs = {}
+        self.marks = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.files = data.get('files', {})
+                self.outputs = data.get('outputs', {})
+                self.marks = data.get('marks', {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def digest(self, path):
+        """SHA-256 of a file's bytes, reused while its size and mtime are unchanged."""
+        signature = _stat_signature(path)
+        cached = self.files.get(path)
+        if cached and cached[:2] == signature:
+            return cached[2]
+
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.files[path] = signature + [digest]
+        self.dirty = True
+        return digest
+
+    def key(self, inputs, params):
+        """Stage key: input digests in order plus the canonical JSON of params."""
+        h = hashlib.sha256()
+        for path in inputs:
+            h.update(path.encode('utf-8'))
+            h.update(self.digest(path).encode('ascii') if os.path.exists(path) else b'missing')
+        h.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return h.hexdigest()
+
+    def up_to_date(self, outputs, inputs, params):
+        """True when every output exists untouched since it was recorded under this key."""
+        _check_in_place(outputs, inputs)
+        if self.force:
+            return False
+
+        key = self.key(inputs, params)
+        for output in outputs:
+            entry = self.outputs.get(output)
+            if not entry or entry['key'] != key:
+                return False
+            try:
+                if _stat_signature(output) != entry['stat']:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def record(self, outputs, inputs, params):
+        """Remember that `outputs` were built from `inputs` with `params`; call after writing."""
+        _check_in_place(outputs, inputs)
+        key = self.key(inputs, params)
+        for output in outputs:
+            self.outputs[output] = {'key': key, 'stat': _stat_signature(output)}
+        self.dirty = True
+
+    def refresh(self, output):
+        """
+        Accept a post-processing rewrite of a recorded output (e.g. PNG
+        re-encoding) without invalidating the stage that produced it.
+        """
+        entry = self.outputs.get(output)
+        if entry:
+            entry['stat'] = _stat_signature(output)
+            self.dirty = True
+
+    def marked(self, name, path):
+        """True when `path` still has the bytes it had when marked under `name`."""
+        if self.force or not os.path.exists(path):
+            return False
+        return self.marks.get(name, {}).get(path) == self.digest(path)
+
+    def mark(self, name, path):
+        self.marks.setdefault(name, {})[path] = self.digest(path)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {'version': MANIFEST_VERSION, 'files': self.files, 'outputs': self.outputs,
+                'marks': self.marks}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
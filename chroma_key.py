@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Array-based chroma keying for the icon artwork.
+Classifies every pixel of an RGBA image in one pass with NumPy instead of
+walking it pixel by pixel, so large masters key in milliseconds.
+"""
+from PIL import Image
+import numpy as np
+
+import stage_trace
+
+# The blue background color of the icon is approximately #1A237E (26, 35, 126)
+ICON_BLUE = (26, 35, 126)
+
+
+def gold_mask(rgba):
+    """
+    The `is_gold` rule from fix_adaptive_icon.py, applied to a whole
+    (H, W, 4) uint8 array at once. Returns a boolean (H, W) mask.
+    """
+    r = rgba[..., 0]
+    g = rgba[..., 1]
+    b = rgba[..., 2]
+    # Widen to int16 only for the sum so r + g and b * 2 cannot overflow uint8
+    sums = r.astype(np.int16) + g
+    return ((r > 150) & (g > 100)) | ((sums > b.astype(np.int16) * 2) & (r > 80) & (g > 60))
+
+
+def key_color_mask(key_color, tolerance):
+    """
+    Build a rule that drops pixels within `tolerance` (Euclidean RGB distance)
+    of `key_color` and keeps everything else.
+    """
+    key = np.array(key_color[:3], dtype=np.int32)
+    limit = tolerance * tolerance
+
+    def rule(rgba):
+        diff = rgba[..., :3].astype(np.int32) - key
+        return (diff * diff).sum(axis=-1) > limit
+
+    return rule
+
+
+# The gold of the calligraphy, used as the far end of the soft-alpha ramp
+ICON_GOLD = (255, 215, 0)
+
+
+def gold_strength(rgba, low=0.1, high=0.45):
+    """
+    Continuous version of the gold rule used for soft alpha. Each pixel is
+    projected onto the blue -> gold axis; the projection is ramped from 0.0
+    at `low` to 1.0 at `high`, so edge pixels that blend the two colors get
+    partial coverage instead of being cut.
+    """
+    blue = np.array(ICON_BLUE, dtype=np.float32)
+    axis = np.array(ICON_GOLD, dtype=np.float32) - blue
+    t = (rgba[..., :3].astype(np.float32) - blue) @ axis / float(axis @ axis)
+    return np.clip((t - low) / (high - low), 0.0, 1.0)
+
+
+def key_color_strength(key_color, inner, outer):
+    """
+    Soft-alpha ramp matching key_color_mask: 0.0 within `inner` of the key
+    color, 1.0 beyond `outer`.
+    """
+    key = np.array(key_color[:3], dtype=np.float32)
+
+    def strength(rgba):
+        dist = np.sqrt(((rgba[..., :3].astype(np.float32) - key) ** 2).sum(axis=-1))
+        return np.clip((dist - inner) / (outer - inner), 0.0, 1.0)
+
+    return strength
+
+
+def key_array(rgba, rule=gold_mask, soft=False, strength=gold_strength):
+    """
+    Key an (H, W, 4) uint8 array. Pixels the rule rejects (and fully
+    transparent pixels) become (0, 0, 0, 0); kept pixels are copied as-is.
+    With soft=True the hard rule is replaced by `strength`: alpha is scaled
+    by it, so the anti-aliased edge of the calligraphy fades out instead of
+    being cut.
+    """
+    alpha = rgba[..., 3]
+
+    if soft:
+        scaled = np.rint(alpha.astype(np.float32) * strength(rgba)).astype(np.uint8)
+        out = np.where((scaled > 0)[..., None], rgba, 0).astype(np.uint8)
+        out[..., 3] = scaled
+        return out
+
+    keep = rule(rgba) & (alpha > 0)
+    # Treat each RGBA pixel as one uint32 so masking is a single multiply
+    packed = np.ascontiguousarray(rgba).view(np.uint32)[..., 0]
+    return (packed * keep).view(np.uint8).reshape(rgba.shape)
+
+
+def key_image(image, rule=gold_mask, soft=False, strength=gold_strength):
+    """Key a PIL image (or an (H, W, 4) uint8 array) and return a new RGBA image."""
+    rgba = image if isinstance(image, np.ndarray) else np.asarray(image.convert('RGBA'))
+    with stage_trace.span('key', soft=soft):
+        stage_trace.count(pixels=rgba.shape[0] * rgba.shape[1])
+        keyed = key_array(rgba, rule=rule, soft=soft, strength=strength)
+        return Image.fromarray(keyed, 'RGBA')
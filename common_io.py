@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Small helpers shared by the build tools: writing a generated file only
+when its content changes, the varints of the packed binary formats
+(verse_search.py, edition_patch.py), and the latency percentiles the
+benchmarks and the API tools report.
+"""
+import os
+
+import stage_trace
+
+
+def write_if_changed(path, data, dry_run=False):
+    """
+    Write `data` (bytes, or text as UTF-8) to `path` only if it differs,
+    atomically; return True if it did (or, with `dry_run`, would).
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    try:
+        with open(path, 'rb') as f:
+            existing = f.read()
+        stage_trace.count(read=len(existing))
+        if existing == data:
+            return False
+    except FileNotFoundError:
+        pass
+    if not dry_run:
+        stage_trace.count(written=len(data))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return True
+
+
+def put_varint(out, value):
+    """Append `value` to the bytearray `out` as an unsigned LEB128 varint."""
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def get_varint(data, pos):
+    """(value, position after it)."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Nearest-rank percentiles of `samples` at `points`; zeros when there are none."""
+    if not samples:
+        return [0.0] * len(points)
+    ordered = sorted(samples)
+    return [ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points]
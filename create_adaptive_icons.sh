@@ -2,7 +2,8 @@
 # Create proper adaptive icon foreground images
 # The foreground should have the calligraphy filling more of the canvas
 
-cd /home/dhiaa/Ayaat
+# Run from the repository root, wherever the script is called from
+cd "$(dirname "$0")" || exit 1
 
 # Use ImageMagick to process the source icon
 # We'll take the source, trim the transparent edges, and resize to fill the adaptive icon canvas
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Compile the edition catalogs into one de-duplicated, indexed Dart file.
+
+Inputs are alquran.cloud /edition envelopes (editions.json,
+audio_editions.json) and mp3quran.net /reciters dumps (mp3quran_ar.json).
+Every edition is normalized to the same fields; byte-identical inputs
+and repeated identifiers are collapsed. The output,
+lib/generated/edition_catalog.dart, holds the editions as a const list
+plus const maps from identifier to position and from language, format
+and type to positions, so the app finds an edition without parsing JSON
+or scanning a list. It is only rewritten when its content changes.
+
+Generated Dart is not committed (lib/generated/ is ignored, as is
+quran_tables.py's output); the build regenerates it. Default inputs
+that are missing are skipped, and with none of them there is nothing
+to write, so the run exits 0; an input named on the command line must
+exist.
+
+    python3 edition_catalog.py
+    python3 edition_catalog.py editions.json more_dumps/*.json --output lib/generated/edition_catalog.dart
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import time
+
+from common_io import write_if_changed
+
+DEFAULT_INPUTS = ['editions.json', 'audio_editions.json', 'mp3quran_ar.json']
+DEFAULT_OUTPUT = 'lib/generated/edition_catalog.dart'
+
+FIELDS = ('identifier', 'language', 'name', 'englishName', 'format', 'type',
+          'direction', 'source', 'server', 'surahTotal')
+INDEXES = (('byLanguage', 'language'), ('byFormat', 'format'), ('byType', 'type'))
+
+
+def from_alquran(doc):
+    for item in doc.get('data') or []:
+        yield {
+            'identifier': item['identifier'],
+            'language': item.get('language') or '',
+            'name': item.get('name') or '',
+            'englishName': item.get('englishName') or '',
+            'format': item.get('format') or '',
+            'type': item.get('type') or '',
+            'direction': item.get('direction'),
+            'source': 'alquran.cloud',
+            'server': None,
+            'surahTotal': None,
+        }
+
+
+def from_mp3quran(doc, language):
+    """One edition per reciter recording (moshaf) of an mp3quran /reciters dump."""
+    for reciter in doc.get('reciters') or []:
+        for moshaf in reciter.get('moshaf') or []:
+            yield {
+                'identifier': f"mp3quran.{reciter['id']}.{moshaf['id']}",
+                'language': language,
+                'name': f"{reciter['name']} - {moshaf.get('name', '')}".rstrip(' -'),
+                'englishName': '',
+                'format': 'audio',
+                'type': 'surah',
+                'direction': None,
+                'source': 'mp3quran',
+                'server': moshaf.get('server'),
+                'surahTotal': moshaf.get('surah_total'),
+            }
+
+
+def read_catalog(path):
+    """Normalized editions from one input file, which may be empty."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if not raw.strip():
+        return raw, []
+    doc = json.loads(raw)
+    if 'reciters' in doc:
+        # mp3quran dumps are per language: mp3quran_<lang>.json
+        stem = os.path.splitext(os.path.basename(path))[0]
+        language = stem.rsplit('_', 1)[-1] if '_' in stem else ''
+        return raw, list(from_mp3quran(doc, language))
+    return raw, list(from_alquran(doc))
+
+
+def compile_catalog(paths):
+    """(editions sorted by identifier, stats) from the input files."""
+    seen_files = set()
+    editions = {}
+    stats = {'input_bytes': 0, 'files': 0, 'duplicate_files': 0, 'empty_files': 0,
+             'entries': 0, 'duplicate_entries': 0, 'conflicts': []}
+    for path in paths:
+        raw, entries = read_catalog(path)
+        stats['input_bytes'] += len(raw)
+        stats['files'] += 1
+        digest = hashlib.sha256(raw).digest()
+        if digest in seen_files:
+            stats['duplicate_files'] += 1
+            continue
+        seen_files.add(digest)
+        if not entries:
+            stats['empty_files'] += 1
+        for entry in entries:
+            stats['entries'] += 1
+            old = editions.get(entry['identifier'])
+            if old is not None:
+                stats['duplicate_entries'] += 1
+                if old != entry:
+                    stats['conflicts'].append((entry['identifier'], path))
+            editions[entry['identifier']] = entry
+    return [editions[key] for key in sorted(editions)], stats
+
+
+def build_indexes(editions):
+    indexes = {}
+    for name, field in INDEXES:
+        index = {}
+        for i, edition in enumerate(editions):
+            index.setdefault(edition[field], []).append(i)
+        indexes[name] = dict(sorted(index.items()))
+    return indexes
+
+
+def dart_literal(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, int):
+        return str(value)
+    escaped = (value.replace('\\', '\\\\').replace("'", "\\'")
+               .replace('$', '\\$').replace('\n', '\\n'))
+    return f"'{escaped}'"
+
+
+def render_dart(editions, indexes, sources):
+    lines = [
+        '// GENERATED CODE - DO NOT MODIFY BY HAND.',
+        f"// Generated by edition_catalog.py from {', '.join(sources)}.",
+        '',
+        '/// A Quran text or audio edition from the compiled catalog.',
+        'class CatalogEdition {',
+    ]
+    types = {'surahTotal': 'int?', 'direction': 'String?', 'server': 'String?'}
+    for field in FIELDS:
+        lines.append(f"  final {types.get(field, 'String')} {field};")
+    lines += ['', '  const CatalogEdition({']
+    for field in FIELDS:
+        lines.append(f"    {'' if field in types else 'required '}this.{field},")
+    lines += ['  });', '}', '', 'class EditionCatalog {',
+              '  static const List<CatalogEdition> editions = [']
+    for edition in editions:
+        args = ', '.join(f'{field}: {dart_literal(edition[field])}' for field in FIELDS
+                         if edition[field] is not None)
+        lines.append(f'    CatalogEdition({args}),')
+    lines += ['  ];', '', '  static const Map<String, int> byIdentifier = {']
+    for i, edition in enumerate(editions):
+        lines.append(f"    {dart_literal(edition['identifier'])}: {i},")
+    lines.append('  };')
+    for name, index in indexes.items():
+        lines += ['', f'  static const Map<String, List<int>> {name} = {{']
+        for key, positions in index.items():
+            lines.append(f"    {dart_literal(key)}: [{', '.join(map(str, positions))}],")
+        lines.append('  };')
+    lines += [
+        '',
+        '  static CatalogEdition? lookup(String identifier) {',
+        '    final i = byIdentifier[identifier];',
+        '    return i == null ? null : editions[i];',
+        '  }',
+        '',
+        '  static Iterable<CatalogEdition> _at(List<int>? positions) =>',
+        '      (positions ?? const <int>[]).map((i) => editions[i]);',
+        '',
+        '  static Iterable<CatalogEdition> forLanguage(String language) => _at(byLanguage[language]);',
+        '  static Iterable<CatalogEdition> forFormat(String format) => _at(byFormat[format]);',
+        '  static Iterable<CatalogEdition> forType(String type) => _at(byType[type]);',
+        '}',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def time_lookups(paths, editions, indexes, count=20000, seed=0):
+    """
+    Mean seconds per lookup: parsing the raw inputs and scanning them, as
+    the app does at runtime, versus the compiled indexes.
+    """
+    rng = random.Random(seed)
+    keys = [rng.choice(editions)['identifier'] for _ in range(count)]
+    languages = [rng.choice(editions)['language'] for _ in range(count)]
+
+    start = time.perf_counter()
+    rounds = max(1, count // 100)
+    for key in keys[:rounds]:
+        for path in paths:
+            _, entries = read_catalog(path)
+            if any(e['identifier'] == key for e in entries):
+                break
+    parse_scan = (time.perf_counter() - start) / rounds
+
+    flat = editions
+    start = time.perf_counter()
+    for key, language in zip(keys, languages):
+        next(e for e in flat if e['identifier'] == key)
+        [e for e in flat if e['language'] == language]
+    scan = (time.perf_counter() - start) / count
+
+    by_identifier = {e['identifier']: i for i, e in enumerate(editions)}
+    by_language = indexes['byLanguage']
+    start = time.perf_counter()
+    for key, language in zip(keys, languages):
+        editions[by_identifier[key]]
+        [editions[i] for i in by_language[language]]
+    indexed = (time.perf_counter() - start) / count
+    return parse_scan, scan, indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile edition catalogs into a Dart const file.')
+    parser.add_argument('inputs', nargs='*', default=None,
+                        help=f"catalog files (default: {' '.join(DEFAULT_INPUTS)})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    missing = [p for p in args.inputs or [] if not os.path.exists(p)]
+    if missing:
+        raise SystemExit(f"Error: {', '.join(missing)} not found")
+    paths = [p for p in (args.inputs or DEFAULT_INPUTS) if os.path.exists(p)]
+    if not paths:
+        print(f"Skipped {args.output}: none of {', '.join(DEFAULT_INPUTS)} found")
+        return
+    editions, stats = compile_catalog(paths)
+    indexes = build_indexes(editions)
+    dart = render_dart(editions, indexes, paths)
+    changed = write_if_changed(args.output, dart)
+
+    print(f"{stats['files']} files, {stats['input_bytes']:,} bytes: "
+          f"{stats['duplicate_files']} duplicate, {stats['empty_files']} empty")
+    print(f"{stats['entries']} entries -> {len(editions)} editions "
+          f"({stats['duplicate_entries']} duplicates, {len(stats['conflicts'])} conflicting)")
+    for identifier, path in stats['conflicts']:
+        print(f"  conflict: {identifier} redefined by {path}; last definition kept")
+    for name, index in indexes.items():
+        print(f"  {name}: {', '.join(f'{key or chr(8709)}={len(v)}' for key, v in index.items())}")
+    print(f"{'Wrote' if changed else 'Unchanged'} {args.output} ({len(dart.encode('utf-8')):,} bytes)")
+
+    if editions:
+        parse_scan, scan, indexed = time_lookups(paths, editions, indexes)
+        print(f"lookup by identifier + language: parse and scan {parse_scan * 1e6:.0f}us, "
+              f"scan {scan * 1e6:.2f}us, indexed {indexed * 1e6:.2f}us")
+
+
+if __name__ == '__main__':
+    main()
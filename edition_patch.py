@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Ayah-level delta patches for one edition of the offline corpus, so a
+text correction on alquran.cloud ships as a few kilobytes applied to the
+bundled corpus (quran_corpus.py) instead of whole surahs re-fetched.
+
+A patch holds the changed ayah numbers and their replacement texts. It
+names its edition and carries digests of the edition before and after,
+so it only applies to the snapshot it was made from, and a patched
+corpus can be checked against the snapshot it should now match. Patches
+for the same edition apply in sequence.
+
+Layout (little-endian):
+  header  'AYDP', version, edition (32 bytes, NUL padded), base digest,
+          target digest (16 bytes each), changed ayahs, body length
+  body    zlib: varint gaps between ascending ayah numbers, varint UTF-8
+          length of each replacement, then the replacement texts
+The digest is the first 16 bytes of the SHA-256 of the edition's 6236
+texts, in order, joined with NUL.
+
+Snapshots are edition dumps (a /quran/{edition} response or a directory
+of surah dumps), or EDITION=CORPUS for one edition of a corpus file.
+
+    python3 edition_patch.py diff old/en.sahih.json new/en.sahih.json -o en.sahih.patch
+    python3 edition_patch.py diff en.sahih=assets/quran_corpus.bin dumps/en.sahih.json -o en.sahih.patch
+    python3 edition_patch.py apply en.sahih.patch fr.hamidullah.patch --corpus assets/quran_corpus.bin
+    python3 edition_patch.py show en.sahih.patch
+"""
+import argparse
+import hashlib
+import struct
+import sys
+import zlib
+from collections import namedtuple
+
+from common_io import get_varint, put_varint
+from quran_corpus import (DEFAULT_CORPUS, MAGIC as CORPUS_MAGIC, SURAH_COUNT, TOTAL_AYAHS, Corpus,
+                          load_dump, pack_identifier, parse_dump_arg, rewrite_corpus, validate)
+
+MAGIC = b'AYDP'
+VERSION = 1
+HEADER = struct.Struct('<4sH32s16s16sHI')  # magic, version, edition, base, target, changes, body length
+
+Patch = namedtuple('Patch', 'edition base target changes')  # changes: {ayah number: text}
+
+
+def edition_digest(texts):
+    return hashlib.sha256('\0'.join(texts).encode('utf-8')).digest()[:16]
+
+
+def corpus_texts(corpus, edition):
+    return [ayah['text'] for surah in range(1, SURAH_COUNT + 1) for ayah in corpus.surah(surah, edition)]
+
+
+def snapshot(item):
+    """(edition, the 6236 texts in order) for a dump path or EDITION=CORPUS."""
+    edition, path = parse_dump_arg(item)
+    with open(path, 'rb') as f:
+        is_corpus = f.read(len(CORPUS_MAGIC)) == CORPUS_MAGIC
+    if is_corpus:
+        if not edition:
+            raise ValueError(f"{path} is a corpus; name the edition as EDITION={path}")
+        with Corpus(path) as corpus:
+            return edition, corpus_texts(corpus, edition)
+    found, surahs = load_dump(path)
+    validate(edition or found, surahs)
+    return edition or found, [ayah['text'] for surah in surahs for ayah in surah['ayahs']]
+
+
+# --- patches ------------------------------------------------------------------
+
+def diff(old, new):
+    """{ayah number: new text} for the ayahs whose text differs."""
+    return {number: b for number, (a, b) in enumerate(zip(old, new), 1) if a != b}
+
+
+def pack_patch(edition, base, target, changes, level=9):
+    body = bytearray()
+    texts = [changes[number].encode('utf-8') for number in sorted(changes)]
+    last = 0
+    for number in sorted(changes):
+        put_varint(body, number - last)
+        last = number
+    for text in texts:
+        put_varint(body, len(text))
+    body = zlib.compress(bytes(body) + b''.join(texts), level)
+    return HEADER.pack(MAGIC, VERSION, pack_identifier(edition, 32), base, target,
+                       len(changes), len(body)) + body
+
+
+def make_patch(edition, old, new, level=9):
+    """Patch bytes taking `edition` from the texts `old` to `new`."""
+    if len(old) != TOTAL_AYAHS or len(new) != TOTAL_AYAHS:
+        raise ValueError(f"{edition}: snapshots must have {TOTAL_AYAHS} ayahs")
+    return pack_patch(edition, edition_digest(old), edition_digest(new), diff(old, new), level)
+
+
+def read_patch(data):
+    """The Patch in `data`; ValueError if it is not a whole, well-formed patch."""
+    if len(data) < HEADER.size:
+        raise ValueError(f"edition patch is {len(data)} bytes, shorter than its header")
+    magic, version, edition, base, target, count, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} edition patch")
+    if len(data) != HEADER.size + length:
+        raise ValueError(f"edition patch body is {len(data) - HEADER.size} bytes, header says {length}")
+    try:
+        body = zlib.decompress(data[HEADER.size:])
+        numbers, lengths, pos, number = [], [], 0, 0
+        for _ in range(count):
+            gap, pos = get_varint(body, pos)
+            number += gap
+            numbers.append(number)
+        for _ in range(count):
+            size, pos = get_varint(body, pos)
+            lengths.append(size)
+        changes = {}
+        for number, size in zip(numbers, lengths):
+            changes[number] = body[pos:pos + size].decode('utf-8')
+            pos += size
+        edition = edition.rstrip(b'\0').decode('ascii')
+    except (zlib.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"corrupt edition patch: {e}")
+    if pos != len(body) or any(not 1 <= n <= TOTAL_AYAHS for n in numbers) or len(changes) != count:
+        raise ValueError("corrupt edition patch: body does not match its header")
+    return Patch(edition, base, target, changes)
+
+
+def patched(texts, patch):
+    """`texts` with `patch` applied; ValueError unless they are its base snapshot."""
+    if edition_digest(texts) != patch.base:
+        raise ValueError(f"{patch.edition}: patch base {patch.base.hex()} does not match "
+                         f"{edition_digest(texts).hex()}")
+    texts = list(texts)
+    for number, text in patch.changes.items():
+        texts[number - 1] = text
+    if edition_digest(texts) != patch.target:
+        raise ValueError(f"{patch.edition}: patched text does not match {patch.target.hex()}")
+    return texts
+
+
+def apply_patches(corpus_path, patches, out_path=None, level=9):
+    """
+    Apply `patches` (in order) to a corpus file, in place unless `out_path`.
+    Every patch is checked before anything is written. Returns the
+    {edition: changed ayah count} and the new file size.
+    """
+    with Corpus(corpus_path) as corpus:
+        current, replacements = {}, {}
+        for patch in patches:
+            if patch.edition not in current:
+                current[patch.edition] = corpus_texts(corpus, patch.edition)
+            current[patch.edition] = patched(current[patch.edition], patch)
+            replacements.setdefault(patch.edition, {}).update(patch.changes)
+        size = rewrite_corpus(corpus, replacements, out_path or corpus_path, level)
+    return {edition: len(changes) for edition, changes in replacements.items()}, size
+
+
+# --- command line -------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description='Make, apply or inspect edition delta patches.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    make = sub.add_parser('diff', help='patch taking OLD to NEW')
+    make.add_argument('old', metavar='[EDITION=]OLD')
+    make.add_argument('new', metavar='[EDITION=]NEW')
+    make.add_argument('-o', '--output', required=True)
+    make.add_argument('--level', type=int, default=9, help='zlib level (default 9)')
+    apply = sub.add_parser('apply', help='apply patches to a corpus')
+    apply.add_argument('patches', nargs='+')
+    apply.add_argument('--corpus', default=DEFAULT_CORPUS)
+    apply.add_argument('-o', '--output', help='write here instead of replacing the corpus')
+    apply.add_argument('--level', type=int, default=9, help='zlib level the corpus was built with')
+    show = sub.add_parser('show', help='list the ayahs a patch changes')
+    show.add_argument('patch')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'diff':
+            old_edition, old = snapshot(args.old)
+            new_edition, new = snapshot(args.new)
+            if old_edition != new_edition:
+                raise ValueError(f"snapshots are of {old_edition} and {new_edition}")
+            data = make_patch(new_edition, old, new, args.level)
+            with open(args.output, 'wb') as f:
+                f.write(data)
+            print(f"Wrote {args.output}: {new_edition}, {len(diff(old, new))} ayahs changed, "
+                  f"{len(data):,} bytes")
+        elif args.command == 'apply':
+            patches = []
+            for path in args.patches:
+                with open(path, 'rb') as f:
+                    patches.append(read_patch(f.read()))
+            counts, size = apply_patches(args.corpus, patches, args.output, args.level)
+            print(f"Patched {args.output or args.corpus}: "
+                  f"{', '.join(f'{e} ({n} ayahs)' for e, n in counts.items())}, {size:,} bytes")
+        else:
+            with open(args.patch, 'rb') as f:
+                patch = read_patch(f.read())
+            print(f"{patch.edition}: {patch.base.hex()} -> {patch.target.hex()}, "
+                  f"{len(patch.changes)} ayahs")
+            for number, text in sorted(patch.changes.items()):
+                print(f"  {number:>4} {text[:70]}")
+    except (ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
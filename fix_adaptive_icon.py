@@ -7,48 +7,42 @@ The blue background will come from the adaptive icon background color.
 from PIL import Image
 import os
 
-def extract_calligraphy(source_path):
+import stage_trace
+from build_cache import BuildCache
+from chroma_key import key_image
+from icon_pyramid import FOREGROUND_SIZES, Pyramid, centered_canvases
+
+def extract_calligraphy(source_path, soft=False):
     """
     Extract the gold calligraphy by removing the blue background.
     The calligraphy is gold/yellow colored on a blue background.
+    Keying runs over the whole image at once (see chroma_key.py); with
+    soft=True edge pixels get partial alpha instead of a hard cut.
     """
-    source = Image.open(source_path).convert('RGBA')
-    pixels = source.load()
-    width, height = source.size
-    
-    # Create output with transparent background
-    output = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    out_pixels = output.load()
-    
-    for y in range(height):
-        for x in range(width):
-            r, g, b, a = pixels[x, y]
-            
-            # Skip fully transparent pixels
-            if a == 0:
-                continue
-            
-            # The blue background color is approximately #1A237E (26, 35, 126)
-            # The gold calligraphy is yellow/gold tones
-            # We want to KEEP pixels that are more yellow/gold (high R, high G, low-medium B)
-            # and REMOVE pixels that are blue (low R, low G, high B)
-            
-            # Calculate how "golden" vs "blue" the pixel is
-            # Gold has high red and green, blue has low red and green but high blue
-            
-            # Keep pixels that are more gold/yellow (high R, high G relative to B)
-            is_gold = (r > 150 and g > 100) or (r + g > b * 2 and r > 80 and g > 60)
-            
-            if is_gold:
-                out_pixels[x, y] = (r, g, b, a)
-            else:
-                out_pixels[x, y] = (0, 0, 0, 0)
-    
-    return output
+    with stage_trace.span('extract_calligraphy'):
+        source = Image.open(source_path).convert('RGBA')
+        return key_image(source, soft=soft)
+
+def stage(source_path='assets/icon.png', android_res='android/app/src/main/res',
+          calligraphy_path='assets/calligraphy_only.png'):
+    """(outputs, inputs, params) of the foreground build, for the build cache."""
+    outputs = [calligraphy_path] + [
+        f'{android_res}/{folder}/ic_launcher_foreground.png' for folder in FOREGROUND_SIZES
+    ]
+    params = {'stage': 'fix_adaptive_icon', 'key': 'is_gold', 'sizes': FOREGROUND_SIZES,
+              'ratio': 0.66, 'resample': 'LANCZOS'}
+    return outputs, [source_path], params
 
 def main():
     source_path = 'assets/icon.png'
     android_res = 'android/app/src/main/res'
+    calligraphy_path = 'assets/calligraphy_only.png'
+    
+    outputs, _, params = stage(source_path, android_res, calligraphy_path)
+    cache = BuildCache()
+    if cache.up_to_date(outputs, [source_path], params):
+        print("Adaptive icon foregrounds are up to date.")
+        return
     
     print("Extracting gold calligraphy from source icon...")
     calligraphy = extract_calligraphy(source_path)
@@ -60,47 +54,24 @@ def main():
         print(f"Calligraphy size after trim: {calligraphy.size}")
     
     # Save extracted calligraphy for reference
-    calligraphy.save('assets/calligraphy_only.png')
-    print("Saved extracted calligraphy to assets/calligraphy_only.png")
+    calligraphy.save(calligraphy_path)
+    print(f"Saved extracted calligraphy to {calligraphy_path}")
     
-    # Adaptive icon foreground sizes
-    sizes = {
-        'drawable-mdpi': 108,
-        'drawable-hdpi': 162,
-        'drawable-xhdpi': 216,
-        'drawable-xxhdpi': 324,
-        'drawable-xxxhdpi': 432,
-    }
+    # Place calligraphy at 66% of canvas (adaptive icon safe zone).
+    # Sizes are cascaded down a pyramid of the trimmed calligraphy.
+    with stage_trace.span('foregrounds'):
+        for folder, size, canvas in centered_canvases(Pyramid(calligraphy), FOREGROUND_SIZES, 0.66):
+            out_path = f'{android_res}/{folder}/ic_launcher_foreground.png'
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            canvas.save(out_path)
+            print(f"Created {out_path}")
     
-    for folder, size in sizes.items():
-        # Place calligraphy at 66% of canvas (adaptive icon safe zone)
-        content_size = int(size * 0.66)
-        
-        # Maintain aspect ratio
-        aspect = calligraphy.size[0] / calligraphy.size[1]
-        if aspect > 1:
-            new_w = content_size
-            new_h = int(content_size / aspect)
-        else:
-            new_h = content_size
-            new_w = int(content_size * aspect)
-        
-        resized = calligraphy.resize((new_w, new_h), Image.Resampling.LANCZOS)
-        
-        # Center on transparent canvas
-        canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        x = (size - new_w) // 2
-        y = (size - new_h) // 2
-        canvas.paste(resized, (x, y), resized)
-        
-        # Save
-        out_path = f'{android_res}/{folder}/ic_launcher_foreground.png'
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        canvas.save(out_path)
-        print(f"Created {out_path}")
+    cache.record(outputs, [source_path], params)
+    cache.save()
     
     print("\n✓ Done! The foreground now has ONLY the gold calligraphy on transparent background.")
     print("The blue background comes from colors.xml (#1A237E)")
 
 if __name__ == '__main__':
-    main()
+    with stage_trace.session('fix_adaptive_icon'):
+        main()
@@ -7,6 +7,10 @@ without any rounded corners or borders.
 from PIL import Image
 import os
 
+import stage_trace
+from build_cache import BuildCache
+from icon_pyramid import FOREGROUND_SIZES, Pyramid, centered_canvases
+
 def create_foreground_from_icon(source_path, output_dir):
     """
     Create proper adaptive icon foreground images.
@@ -26,13 +30,7 @@ def create_foreground_from_icon(source_path, output_dir):
     # So we need to scale our content to fit in the center with proper padding
     
     # Android adaptive icon sizes for foreground
-    sizes = {
-        'drawable-mdpi': 108,
-        'drawable-hdpi': 162,
-        'drawable-xhdpi': 216,
-        'drawable-xxhdpi': 324,
-        'drawable-xxxhdpi': 432,
-    }
+    sizes = FOREGROUND_SIZES
     
     # First, let's crop the source to remove the white/transparent border
     # Find the bounding box of non-transparent pixels
@@ -74,37 +72,13 @@ def create_foreground_from_icon(source_path, output_dir):
             # Crop to content
             fg_cropped = fg_source.crop(fg_bbox)
             
-            for folder, size in sizes.items():
-                # Create a new transparent canvas
-                canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-                
-                # Calculate the size for the content
-                # The safe zone is 66% of the icon, but we want the content 
-                # to fill that nicely
-                content_size = int(size * 0.75)  # 75% of canvas
-                
-                # Resize the cropped content
-                aspect = fg_cropped.size[0] / fg_cropped.size[1]
-                if aspect > 1:
-                    new_w = content_size
-                    new_h = int(content_size / aspect)
-                else:
-                    new_h = content_size
-                    new_w = int(content_size * aspect)
-                
-                resized = fg_cropped.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                
-                # Center on canvas
-                x = (size - new_w) // 2
-                y = (size - new_h) // 2
-                
-                # Paste the resized content
-                canvas.paste(resized, (x, y), resized)
-                
-                # Save
-                path = f'{output_dir}/{folder}/ic_launcher_foreground.png'
-                canvas.save(path)
-                print(f'Created {path}')
+            # The safe zone is 66% of the icon, but we want the content
+            # to fill that nicely: 75% of canvas, cascaded down a pyramid
+            with stage_trace.span('foregrounds'):
+                for folder, size, canvas in centered_canvases(Pyramid(fg_cropped), sizes, 0.75):
+                    path = f'{output_dir}/{folder}/ic_launcher_foreground.png'
+                    canvas.save(path)
+                    print(f'Created {path}')
     
     print("\nForeground icons updated!")
     print("The background color is set in colors.xml (#1A237E)")
@@ -117,7 +91,19 @@ def main():
         print(f"Error: Source icon not found at {source_icon}")
         return
     
+    # The foregrounds are rebuilt from the existing xxxhdpi foreground
+    existing_fg = f'{android_res}/drawable-xxxhdpi/ic_launcher_foreground.png'
+    outputs = [f'{android_res}/{folder}/ic_launcher_foreground.png' for folder in FOREGROUND_SIZES]
+    params = {'stage': 'fix_icon', 'sizes': FOREGROUND_SIZES, 'ratio': 0.75, 'resample': 'LANCZOS'}
+    cache = BuildCache()
+    if cache.up_to_date(outputs, [existing_fg], params):
+        print("Foreground icons are up to date.")
+        return
+    
     create_foreground_from_icon(source_icon, android_res)
+    cache.record(outputs, [existing_fg], params)
+    cache.save()
 
 if __name__ == '__main__':
-    main()
+    with stage_trace.session('fix_icon'):
+        main()
@@ -2,15 +2,20 @@
 import os
 from PIL import Image
 
-def fix_icon():
-    icon_path = 'assets/icon.png'
-    if not os.path.exists(icon_path):
-        print(f"Icon not found at {icon_path}")
-        return
+import stage_trace
+from build_cache import BuildCache
 
-    # Open the existing icon
-    img = Image.open(icon_path).convert("RGBA")
-    
+ICON_PATH = 'assets/icon.png'
+IOS_ICON_PATH = 'assets/icon_ios.png'
+PARAMS = {'stage': 'fix_ios_icon', 'size': 1024, 'logo_size': 900,
+          'background': (26, 35, 126), 'resample': 'LANCZOS'}
+
+def stage():
+    """(outputs, inputs, params): icon_ios.png from icon.png, which is only read."""
+    return [IOS_ICON_PATH], [ICON_PATH], PARAMS
+
+def flatten_icon(img):
+    """The logo of `img` (RGBA), fitted onto a solid 1024 px background, as RGB."""
     # Create a new solid background image (1024x1024)
     # Color #1A237E matches the app's theme
     bg_color = (26, 35, 126, 255) 
@@ -44,9 +49,32 @@ def fix_icon():
         new_img.paste(logo_resized, offset, logo_resized)
         
     # Convert to RGB (no transparency) for iOS compatibility
-    final_img = new_img.convert("RGB")
-    final_img.save(icon_path, "PNG")
-    print(f"Successfully updated {icon_path} with a solid background.")
+    return new_img.convert("RGB")
+
+def fix_icon():
+    icon_path = ICON_PATH
+    if not os.path.exists(icon_path):
+        print(f"Icon not found at {icon_path}")
+        return
+
+    # icon.png stays the master: the flattened copy goes to icon_ios.png,
+    # so rerunning this (or zoom_ios_icon.py) never reprocesses its own output.
+    out_path = IOS_ICON_PATH
+    params = PARAMS
+    cache = BuildCache()
+    if cache.up_to_date([out_path], [icon_path], params):
+        print(f"{out_path} is up to date.")
+        return
+
+    # Open the existing icon
+    img = Image.open(icon_path).convert("RGBA")
+    with stage_trace.span('flatten_icon'):
+        flat = flatten_icon(img)
+    flat.save(out_path, "PNG")
+    cache.record([out_path], [icon_path], params)
+    cache.save()
+    print(f"Successfully wrote {out_path}: {icon_path} on a solid background.")
 
 if __name__ == "__main__":
-    fix_icon()
+    with stage_trace.session('fix_ios_icon'):
+        fix_icon()
@@ -1,67 +1,62 @@
-from PIL import Image, ImageDraw, ImageFont
 import os
 
-# Create a large icon (1024x1024)
-size = 1024
-img = Image.new('RGBA', (size, size), (26, 35, 126, 255))  # Blue background #1A237E
-draw = ImageDraw.Draw(img)
+import stage_trace
+from build_cache import BuildCache
+from icon_pyramid import IOS_APPICON, MIPMAP_SIZES, ios_icon_sizes
+from icon_text import (BACKGROUND, GOLDEN_COLOR, REFERENCE_FONT_SIZE, REFERENCE_SIZE,
+                       SUPERSAMPLE_TARGET, TEXT, find_font, render_all)
 
-# Try to find an Arabic font
-font_paths = [
-    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Bold.ttf',
-    '/usr/share/fonts/truetype/noto/NotoSansArabic-Bold.ttf',
-    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
-    '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
-]
+android_res = 'android/app/src/main/res'
 
-font = None
-for path in font_paths:
-    if os.path.exists(path):
-        try:
-            font = ImageFont.truetype(path, 350)
-            print(f"Using font: {path}")
-            break
-        except:
-            pass
 
-if font is None:
-    font = ImageFont.load_default()
-    print("Using default font")
+def icon_jobs():
+    """(path, size, rgb) for the master icon and every Android and iOS size."""
+    # Create a large icon (1024x1024)
+    jobs = [('assets/icon.png', REFERENCE_SIZE, False)]
+    # Also create Android launcher icons
+    jobs += [(f'{android_res}/{folder}/ic_launcher.png', size, False)
+             for folder, size in MIPMAP_SIZES.items()]
+    # iOS icons must not have an alpha channel
+    jobs += [(os.path.join(IOS_APPICON, name), size, True)
+             for name, size in ios_icon_sizes().items()]
+    return jobs
 
-# Draw the Arabic text "آيات" in golden color
-text = "آيات"
-golden_color = (255, 215, 0, 255)  # #FFD700
 
-# Get text size
-bbox = draw.textbbox((0, 0), text, font=font)
-text_width = bbox[2] - bbox[0]
-text_height = bbox[3] - bbox[1]
+def stage(font_path):
+    """(outputs, inputs, params) of the icon render, for the build cache."""
+    jobs = icon_jobs()
+    outputs = [path for path, _, _ in jobs]
+    params = {'stage': 'generate_icon', 'engine': 'render-at-size', 'size': REFERENCE_SIZE,
+              'font_size': REFERENCE_FONT_SIZE, 'text': TEXT, 'background': BACKGROUND,
+              'color': GOLDEN_COLOR, 'supersample_target': SUPERSAMPLE_TARGET,
+              'jobs': [(path, size) for path, size, _ in jobs]}
+    inputs = [font_path] if font_path else []
+    return outputs, inputs, params
 
-# Center the text
-x = (size - text_width) // 2
-y = (size - text_height) // 2 - 50  # Slight adjustment
 
-draw.text((x, y), text, font=font, fill=golden_color)
+def main():
+    font_path = find_font()
+    print(f"Using font: {font_path}" if font_path else "Using default font")
 
-# Save the icon
-os.makedirs('assets', exist_ok=True)
-img.save('assets/icon.png')
-print("Icon saved to assets/icon.png")
+    jobs = icon_jobs()
+    outputs, inputs, params = stage(font_path)
 
-# Also create Android launcher icons
-sizes = {
-    'mipmap-mdpi': 48,
-    'mipmap-hdpi': 72,
-    'mipmap-xhdpi': 96,
-    'mipmap-xxhdpi': 144,
-    'mipmap-xxxhdpi': 192,
-}
+    cache = BuildCache()
+    if cache.up_to_date(outputs, inputs, params):
+        print("All icons are up to date.")
+        return
+
+    # Draw the Arabic text "آيات" in golden color, at every size directly
+    with stage_trace.span('render icons', jobs=len(jobs)):
+        for path in render_all(jobs, font_path):
+            print(f"Created {path}")
+
+    cache.record(outputs, inputs, params)
+    cache.save()
+
+    print("\nAll icons generated successfully!")
 
-android_res = 'android/app/src/main/res'
-for folder, icon_size in sizes.items():
-    resized = img.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
-    path = f'{android_res}/{folder}/ic_launcher.png'
-    resized.save(path)
-    print(f"Created {path}")
 
-print("\nAll icons generated successfully!")
+if __name__ == '__main__':
+    with stage_trace.session('generate_icon'):
+        main()
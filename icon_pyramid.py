@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Build every launcher icon size from a single decode of the master artwork.
+
+The master is opened once and halved into a mip pyramid; each output is
+resampled from the smallest pyramid level that is still at least as large
+as the target, instead of from the 1024 px original every time. One run
+writes:
+  - Android launcher icons (mipmap-*/ic_launcher.png)
+  - Android adaptive foregrounds (drawable-*/ic_launcher_foreground.png)
+  - the iOS AppIcon set listed in Contents.json
+  - assets/calligraphy_only.png
+"""
+from PIL import Image
+import argparse
+import json
+import os
+
+from build_cache import BuildCache
+from chroma_key import key_image
+
+ANDROID_RES = 'android/app/src/main/res'
+IOS_APPICON = 'ios/Runner/Assets.xcassets/AppIcon.appiconset'
+
+# Legacy launcher icon sizes (48dp)
+MIPMAP_SIZES = {
+    'mipmap-mdpi': 48,
+    'mipmap-hdpi': 72,
+    'mipmap-xhdpi': 96,
+    'mipmap-xxhdpi': 144,
+    'mipmap-xxxhdpi': 192,
+}
+
+# Adaptive icon foreground sizes (108dp)
+FOREGROUND_SIZES = {
+    'drawable-mdpi': 108,
+    'drawable-hdpi': 162,
+    'drawable-xhdpi': 216,
+    'drawable-xxhdpi': 324,
+    'drawable-xxxhdpi': 432,
+}
+
+# Blue background, also set in colors.xml (#1A237E)
+ICON_BACKGROUND = (26, 35, 126)
+
+
+class Pyramid:
+    """
+    A lazily built mip pyramid: level 0 is the decoded master and each
+    further level is half the size of the previous one.
+    """
+
+    def __init__(self, image):
+        self.levels = [image]
+
+    def level_for(self, size):
+        """Smallest level that is at least `size` (w, h) in both directions."""
+        target_w, target_h = size
+        while True:
+            last = self.levels[-1]
+            if last.width < target_w * 2 or last.height < target_h * 2:
+                break
+            # Box-halving is exact for 2:1 and far cheaper than LANCZOS
+            self.levels.append(last.reduce(2))
+        for level in reversed(self.levels):
+            if level.width >= target_w and level.height >= target_h:
+                return level
+        return self.levels[0]
+
+    def resize(self, size, resample=Image.Resampling.LANCZOS):
+        level = self.level_for(size)
+        if level.size == tuple(size):
+            return level.copy()
+        return level.resize(size, resample)
+
+
+def fit_size(content_size, box):
+    """Scale `content_size` (w, h) to fit a `box` px square, keeping aspect."""
+    aspect = content_size[0] / content_size[1]
+    if aspect > 1:
+        return box, int(box / aspect)
+    return int(box * aspect), box
+
+
+def centered_canvases(pyramid, sizes, ratio):
+    """
+    Yield (folder, size, canvas) with the pyramid's content scaled to `ratio`
+    of each square canvas and centered on transparency.
+    """
+    content = pyramid.levels[0].size
+    # Largest first so the pyramid is only ever extended downwards
+    for folder, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        new_w, new_h = fit_size(content, int(size * ratio))
+        resized = pyramid.resize((new_w, new_h))
+
+        canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        x = (size - new_w) // 2
+        y = (size - new_h) // 2
+        canvas.paste(resized, (x, y), resized)
+        yield folder, size, canvas
+
+
+def ios_icon_sizes(appiconset=IOS_APPICON):
+    """Map each AppIcon filename to its pixel size from Contents.json."""
+    with open(os.path.join(appiconset, 'Contents.json')) as f:
+        contents = json.load(f)
+
+    sizes = {}
+    for entry in contents['images']:
+        points = float(entry['size'].split('x')[0])
+        scale = int(entry['scale'].rstrip('x'))
+        sizes[entry['filename']] = int(round(points * scale))
+    return sizes
+
+
+def output_paths(android_res=ANDROID_RES, appiconset=IOS_APPICON,
+                 calligraphy_path='assets/calligraphy_only.png'):
+    paths = [os.path.join(appiconset, name) for name in ios_icon_sizes(appiconset)]
+    paths += [f'{android_res}/{folder}/ic_launcher.png' for folder in MIPMAP_SIZES]
+    paths += [f'{android_res}/{folder}/ic_launcher_foreground.png' for folder in FOREGROUND_SIZES]
+    paths.append(calligraphy_path)
+    return paths
+
+
+def save_sizes(icon_pyramid, targets, background=None, save=Image.Image.save):
+    """
+    Save a square resize for each {path: size}, largest first. With a
+    `background` the result is flattened onto it (iOS icons must not
+    have an alpha channel). save(image, path) writes each one.
+    """
+    for path, size in sorted(targets.items(), key=lambda item: -item[1]):
+        resized = icon_pyramid.resize((size, size))
+        if background is not None:
+            flat = Image.new('RGB', resized.size, background)
+            flat.paste(resized, (0, 0), resized)
+            resized = flat
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        save(resized, path)
+        yield path
+
+
+def extract_calligraphy(icon):
+    """The keyed calligraphy of `icon` (an image or RGBA array), trimmed to content."""
+    calligraphy = key_image(icon)
+    bbox = calligraphy.getbbox()
+    if bbox:
+        calligraphy = calligraphy.crop(bbox)
+    return calligraphy
+
+
+def save_foregrounds(calligraphy, targets, ratio, save=Image.Image.save):
+    """Save each {path: size} adaptive foreground canvas; yields the paths."""
+    for path, size, canvas in centered_canvases(Pyramid(calligraphy), targets, ratio):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        save(canvas, path)
+        yield path
+
+
+def build_all(source_path, android_res=ANDROID_RES, appiconset=IOS_APPICON,
+              foreground_ratio=0.66, calligraphy_path='assets/calligraphy_only.png'):
+    icon = Image.open(source_path).convert('RGBA')
+    print(f"Decoded {source_path} {icon.size}")
+    icon_pyramid = Pyramid(icon)
+
+    ios_targets = {os.path.join(appiconset, filename): size
+                   for filename, size in ios_icon_sizes(appiconset).items()}
+    for path in save_sizes(icon_pyramid, ios_targets, ICON_BACKGROUND):
+        print(f"Created {path}")
+
+    mipmap_targets = {f'{android_res}/{folder}/ic_launcher.png': size
+                      for folder, size in MIPMAP_SIZES.items()}
+    for path in save_sizes(icon_pyramid, mipmap_targets):
+        print(f"Created {path}")
+
+    # Adaptive foregrounds come from the keyed calligraphy, trimmed to content
+    calligraphy = extract_calligraphy(icon)
+    calligraphy.save(calligraphy_path)
+    print(f"Saved extracted calligraphy to {calligraphy_path}")
+
+    foreground_targets = {f'{android_res}/{folder}/ic_launcher_foreground.png': size
+                          for folder, size in FOREGROUND_SIZES.items()}
+    for path in save_foregrounds(calligraphy, foreground_targets, foreground_ratio):
+        print(f"Created {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build all icon sizes from one master.')
+    parser.add_argument('--source', default='assets/icon.png')
+    parser.add_argument('--foreground-ratio', type=float, default=0.66,
+                        help='share of the adaptive canvas the calligraphy fills')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"Error: Source icon not found at {args.source}")
+        return
+
+    outputs = output_paths()
+    inputs = [args.source, os.path.join(IOS_APPICON, 'Contents.json')]
+    params = {'stage': 'icon_pyramid', 'mipmaps': MIPMAP_SIZES, 'foregrounds': FOREGROUND_SIZES,
+              'ratio': args.foreground_ratio, 'key': 'is_gold',
+              'background': ICON_BACKGROUND, 'resample': 'LANCZOS'}
+    cache = BuildCache()
+    if cache.up_to_date(outputs, inputs, params):
+        print("All icon sizes are up to date.")
+        return
+
+    build_all(args.source, foreground_ratio=args.foreground_ratio)
+    cache.record(outputs, inputs, params)
+    cache.save()
+    print("\n✓ All icon sizes generated from one decode.")
+
+
+if __name__ == '__main__':
+    main()
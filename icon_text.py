@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Render-at-size text engine for the "آيات" launcher icon.
+
+Instead of drawing the text once at 350 pt on a 1024 canvas and
+LANCZOS-shrinking that bitmap to 48 px, every icon is rasterized at its own
+size (with supersampling for the small ones) so strokes stay crisp:
+  - each font is opened once per process and cached by (path, size)
+  - each shaped, rasterized text run is cached by (font, size, text), so
+    the layout work is done once per pixel size however many outputs use it
+  - the Android mipmaps, the iOS AppIcon set and assets/icon.png are
+    rendered in parallel, each worker keeping its own warm caches
+
+Pillow does not expose glyph outlines, so the cache holds the shaped
+coverage mask at each rendered size rather than outlines.
+"""
+from PIL import Image, ImageDraw, ImageFont
+import functools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import stage_trace
+
+# Try to find an Arabic font
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Bold.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansArabic-Bold.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+]
+
+TEXT = "آيات"
+BACKGROUND = (26, 35, 126, 255)  # Blue background #1A237E
+GOLDEN_COLOR = (255, 215, 0, 255)  # #FFD700
+
+# Layout of the 1024 px reference design, scaled to every other size
+REFERENCE_SIZE = 1024
+REFERENCE_FONT_SIZE = 350
+REFERENCE_Y_SHIFT = -50  # Slight adjustment
+
+# Render small icons at least this many pixels across, then box-reduce
+SUPERSAMPLE_TARGET = 512
+MAX_SUPERSAMPLE = 4
+
+
+def find_font(paths=FONT_PATHS):
+    """First usable font path, or None to fall back to Pillow's default font."""
+    for path in paths:
+        if os.path.exists(path):
+            try:
+                load_font(path, REFERENCE_FONT_SIZE)
+                return path
+            except OSError:
+                pass
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(path, size):
+    if path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(path, size)
+
+
+@functools.lru_cache(maxsize=None)
+def text_run(font_path, font_size, text):
+    """
+    Shape and rasterize `text` once: returns the coverage mask cropped to
+    its ink and the ink bbox relative to the draw origin.
+    """
+    font = load_font(font_path, font_size)
+    bbox = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+    mask = Image.new('L', (max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1])), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), text, font=font, fill=255)
+    return mask, bbox
+
+
+def supersample_for(size):
+    return max(1, min(MAX_SUPERSAMPLE, math.ceil(SUPERSAMPLE_TARGET / size)))
+
+
+def render_icon(size, font_path, text=TEXT, supersample=None, background=BACKGROUND,
+                color=GOLDEN_COLOR):
+    """Rasterize the icon directly at `size` px, supersampled for small sizes."""
+    ss = supersample or supersample_for(size)
+    canvas_size = size * ss
+    scale = canvas_size / REFERENCE_SIZE
+    font_size = max(1, round(REFERENCE_FONT_SIZE * scale))
+
+    mask, bbox = text_run(font_path, font_size, text)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    # Center the text the same way the 1024 px design does
+    x = (canvas_size - text_width) // 2
+    y = (canvas_size - text_height) // 2 + round(REFERENCE_Y_SHIFT * scale)
+
+    with stage_trace.span('render_icon', size=size, supersample=ss):
+        stage_trace.count(pixels=canvas_size * canvas_size)
+        img = Image.new('RGBA', (canvas_size, canvas_size), background)
+        img.paste(color, (x + bbox[0], y + bbox[1]), mask)
+        return img.reduce(ss) if ss > 1 else img
+
+
+def _render_job(job):
+    """Worker: render one output; fonts and text runs stay cached per process."""
+    path, size, font_path, rgb = job
+    img = render_icon(size, font_path)
+    if rgb:
+        img = img.convert('RGB')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    img.save(path)
+    return path
+
+
+def render_all(jobs, font_path, workers=None):
+    """
+    Render (path, size, rgb) jobs in parallel. Jobs are sorted largest
+    first so the slowest renders start earliest.
+    """
+    ordered = sorted(jobs, key=lambda job: -job[1])
+    tasks = [(path, size, font_path, rgb) for path, size, rgb in ordered]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_render_job, tasks)
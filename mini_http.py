@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Just enough asyncio HTTP/1.1 for the local API tools (api_standin.py,
+api_loadgen.py), with no third-party dependencies.
+
+Server side, `serve(handler, host, port)` runs a keep-alive connection
+loop and calls `await handler(request, peer)`, which returns a Response
+(or None to drop the connection without answering). Client side,
+`fetch(url)` makes one request on a fresh connection, which is what
+Dart's top-level `http.get` does, and `Connection` reuses one.
+"""
+import asyncio
+import json
+import ssl
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_HEADER_BYTES = 64 * 1024
+
+
+class Request:
+    def __init__(self, method, target, headers, body=b''):
+        self.method = method
+        self.target = target
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query))
+
+    @property
+    def keep_alive(self):
+        return self.headers.get('connection', '').lower() != 'close'
+
+
+class Response:
+    def __init__(self, status=200, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def json_response(status, payload, headers=None):
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return Response(status, body, dict({'Content-Type': 'application/json'}, **(headers or {})))
+
+
+async def _read_head(reader):
+    """Start line and lower-cased headers, or (None, None) at EOF."""
+    try:
+        raw = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None, None
+    except asyncio.LimitOverrunError:
+        raise ValueError('header section too large')
+    lines = raw.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+async def _read_body(reader, headers):
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip(), 16)
+            if size == 0:
+                await reader.readline()
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    length = int(headers.get('content-length', 0))
+    return await reader.readexactly(length) if length else b''
+
+
+async def read_request(reader):
+    start, headers = await _read_head(reader)
+    if start is None:
+        return None
+    method, target, _ = start.split(' ', 2)
+    return Request(method, target, headers, await _read_body(reader, headers))
+
+
+def encode_response(response, keep_alive=True):
+    reason = HTTPStatus(response.status).phrase
+    headers = dict(response.headers)
+    headers['Content-Length'] = str(len(response.body))
+    headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    head = f'HTTP/1.1 {response.status} {reason}\r\n' + ''.join(
+        f'{name}: {value}\r\n' for name, value in headers.items()) + '\r\n'
+    return head.encode('latin-1') + response.body
+
+
+async def serve(handler, host='127.0.0.1', port=8080):
+    """Start a server; returns the asyncio.Server."""
+
+    async def connection(reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                response = await handler(request, peer)
+                if response is None:
+                    break
+                writer.write(encode_response(response, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(connection, host, port, limit=MAX_HEADER_BYTES)
+
+
+# --- client -------------------------------------------------------------------
+
+class Connection:
+    """One keep-alive connection to `origin` (scheme://host[:port])."""
+
+    def __init__(self, origin):
+        parts = urlsplit(origin)
+        self.https = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.reader = self.writer = None
+
+    async def open(self):
+        context = ssl.create_default_context() if self.https else None
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=context, limit=MAX_HEADER_BYTES)
+
+    async def request(self, method, target, headers=None, body=b''):
+        if self.writer is None:
+            await self.open()
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host}',
+                 f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        start, response_headers = await _read_head(self.reader)
+        if start is None:
+            await self.close()
+            raise ConnectionError('connection closed before a response')
+        status = int(start.split(' ', 2)[1])
+        payload = b'' if method == 'HEAD' or status in (204, 304) else \
+            await _read_body(self.reader, response_headers)
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return Response(status, payload, response_headers)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def fetch(url, headers=None, method='GET', timeout=30):
+    """One request on a fresh connection; returns a Response."""
+    parts = urlsplit(url)
+    conn = Connection(f'{parts.scheme}://{parts.netloc}')
+    target = parts.path + (f'?{parts.query}' if parts.query else '')
+    try:
+        return await asyncio.wait_for(
+            conn.request(method, target, dict({'Connection': 'close'}, **(headers or {}))),
+            timeout)
+    finally:
+        await conn.close()
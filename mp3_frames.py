@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+MPEG audio frame headers, read and written without decoding any audio.
+
+Enough of the format to walk an MP3 frame by frame: ID3v2/ID3v1 tags are
+skipped, each 4-byte header gives the frame's length and sample count,
+and a leading Xing/Info or VBRI frame (an encoder's metadata frame, no
+audio) is recognized so it can be dropped or read for frame counts.
+
+    for offset, header in iter_frames(data):
+        ...
+
+summarize() gets a file's frame count, duration and audio size from its
+headers alone, streaming the file in chunks or through mmap, and stops
+after the first frame when a Xing/Info or VBRI frame already has the count.
+
+    summary = summarize('audio/alafasy/002255.mp3')
+    summary.samples / summary.sample_rate
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+MPEG1, MPEG2, MPEG25 = 1, 2, 25
+
+# Bitrates in kbps by (version family, layer), indexed by the header's 4 bits
+BITRATES = {
+    (MPEG1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (MPEG1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (MPEG1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (MPEG2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (MPEG2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (MPEG2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {
+    MPEG1: (44100, 48000, 32000),
+    MPEG2: (22050, 24000, 16000),
+    MPEG25: (11025, 12000, 8000),
+}
+VERSION_BITS = {0: MPEG25, 2: MPEG2, 3: MPEG1}
+LAYER_BITS = {1: 3, 2: 2, 3: 1}
+MONO = 3  # channel mode
+
+STREAM_CHUNK = 1 << 16
+
+Header = namedtuple('Header', 'version layer bitrate sample_rate padding mode crc length samples')
+# `bytes` is the audio frame data, without tags and metadata frame; `source`
+# is 'Xing', 'Info' or 'VBRI' when the counts came from that frame, else 'frames'
+Summary = namedtuple('Summary', 'frames samples sample_rate bytes source')
+
+
+def parse_header(data, offset=0):
+    """The Header at `offset`, or None if those 4 bytes are not a valid frame header."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version = VERSION_BITS.get((b1 >> 3) & 3)
+    layer = LAYER_BITS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    family = MPEG1 if version == MPEG1 else MPEG2
+    bitrate = BITRATES[family, layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2 or version == MPEG1:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    return Header(version, layer, bitrate, sample_rate, padding, b3 >> 6,
+                  not (b1 & 1), length, samples)
+
+
+def id3v2_size(data, offset=0):
+    """Bytes taken by an ID3v2 tag at `offset` (0 if there is none)."""
+    if data[offset:offset + 3] != b'ID3' or len(data) < offset + 10:
+        return 0
+    flags = data[offset + 5]
+    size = 0
+    for byte in data[offset + 6:offset + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    return 10 + size + (10 if flags & 0x10 else 0)
+
+
+def audio_bounds(data):
+    """(start, end) of the frame data, without leading ID3v2 or trailing ID3v1 tags."""
+    start = 0
+    while True:
+        size = id3v2_size(data, start)
+        if not size:
+            break
+        start += size
+    end = len(data)
+    if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    return start, end
+
+
+def _side_info_size(header):
+    if header.version == MPEG1:
+        return 17 if header.mode == MONO else 32
+    return 9 if header.mode == MONO else 17
+
+
+def xing_offset(header):
+    """Offset of a Xing/Info tag from the start of its (Layer III) frame."""
+    return 4 + (2 if header.crc else 0) + _side_info_size(header)
+
+
+def parse_info_frame(data, offset, header):
+    """
+    If the frame at `offset` is a Xing/Info or VBRI metadata frame, return
+    a dict with its 'kind' and whatever of 'frames', 'bytes' and 'toc' it
+    carries; otherwise None.
+    """
+    if header.layer != 3:
+        return None
+    frame = data[offset:offset + header.length]
+    pos = xing_offset(header)
+    tag = frame[pos:pos + 4]
+    if tag in (b'Xing', b'Info'):
+        info = {'kind': tag.decode('ascii')}
+        (flags,) = struct.unpack_from('>I', frame, pos + 4)
+        pos += 8
+        if flags & 1:
+            (info['frames'],) = struct.unpack_from('>I', frame, pos)
+            pos += 4
+        if flags & 2:
+            (info['bytes'],) = struct.unpack_from('>I', frame, pos)
+            pos += 4
+        if flags & 4:
+            info['toc'] = bytes(frame[pos:pos + 100])
+        return info
+    if frame[36:40] == b'VBRI':
+        _, _, _, size, frames = struct.unpack_from('>HHHII', frame, 40)
+        return {'kind': 'VBRI', 'frames': frames, 'bytes': size}
+    return None
+
+
+def iter_frames(data, start=None, end=None):
+    """
+    Yield (offset, Header) for every frame in `data[start:end]`. Garbage
+    between frames is skipped by searching for the next sync word whose
+    frame is followed by another valid header.
+    """
+    if start is None or end is None:
+        bounds = audio_bounds(data)
+        start = bounds[0] if start is None else start
+        end = bounds[1] if end is None else end
+    pos = start
+    while pos + 4 <= end:
+        header = parse_header(data, pos)
+        if header is not None and pos + header.length <= end:
+            yield pos, header
+            pos += header.length
+            continue
+        # Lost sync: find the next plausible header
+        pos = data.find(b'\xff', pos + 1, end)
+        while pos != -1:
+            candidate = parse_header(data, pos)
+            if candidate is not None:
+                following = pos + candidate.length
+                if following >= end or parse_header(data, following) is not None:
+                    break
+            pos = data.find(b'\xff', pos + 1, end)
+        if pos == -1:
+            return
+
+
+def file_bounds(f):
+    """audio_bounds() for an open binary file, reading only the tag headers."""
+    size = f.seek(0, os.SEEK_END)
+    start = 0
+    while True:
+        f.seek(start)
+        tag = id3v2_size(f.read(10))
+        if not tag:
+            break
+        start += tag
+    end = size
+    if end - start >= 128:
+        f.seek(end - 128)
+        if f.read(3) == b'TAG':
+            end -= 128
+    return start, end
+
+
+def iter_file_frames(f, start, end, chunk_size=STREAM_CHUNK):
+    """
+    iter_frames() over an open binary file, holding at most `chunk_size`
+    bytes at a time. Frames longer than what is left of the chunk are
+    skipped with a seek, so a small chunk size reads little beyond the
+    headers themselves.
+    """
+    buf, base = b'', start
+    pos = start
+    while pos + 4 <= end:
+        if pos + 4 > base + len(buf):
+            f.seek(pos)
+            buf, base = f.read(min(max(chunk_size, 4), end - pos)), pos
+        header = parse_header(buf, pos - base)
+        if header is not None and pos + header.length <= end:
+            yield pos, header
+            pos += header.length
+            continue
+        # Lost sync: look for the next frame in a fresh window
+        f.seek(pos)
+        buf, base = f.read(min(max(chunk_size, 8192), end - pos)), pos
+        found = next(iter_frames(buf, 1, len(buf)), None)
+        pos = base + found[0] if found else base + max(1, len(buf) - 3)
+
+
+def _summarize(frames, read, end, trust_info, name):
+    count = samples = size = 0
+    sample_rate = None
+    for i, (offset, header) in enumerate(frames):
+        if i == 0:
+            info = parse_info_frame(read(offset, header.length), 0, header)
+            if info is not None:
+                if trust_info and info.get('frames'):
+                    return Summary(info['frames'], info['frames'] * header.samples,
+                                   header.sample_rate, end - offset - header.length, info['kind'])
+                continue
+        if sample_rate is None:
+            sample_rate = header.sample_rate
+        count += 1
+        samples += header.samples
+        size += header.length
+    if not count:
+        raise ValueError(f"{name}: no MPEG audio frames found")
+    return Summary(count, samples, sample_rate, size, 'frames')
+
+
+def summarize(path, trust_info=True, use_mmap=False, chunk_size=STREAM_CHUNK):
+    """
+    Summary of the MP3 at `path`, from frame headers only. With
+    `trust_info`, the frame count of a Xing/Info or VBRI frame is used
+    as is; otherwise, or without one, every frame header is walked.
+    """
+    with open(path, 'rb') as f:
+        if use_mmap:
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError(f"{path}: no MPEG audio frames found")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start, end = audio_bounds(data)
+                return _summarize(iter_frames(data, start, end),
+                                  lambda offset, length: data[offset:offset + length],
+                                  end, trust_info, path)
+
+        def read(offset, length):
+            f.seek(offset)
+            return f.read(length)
+
+        start, end = file_bounds(f)
+        return _summarize(iter_file_frames(f, start, end, chunk_size), read, end, trust_info, path)
+
+
+def make_header(version=MPEG1, bitrate=128000, sample_rate=44100, padding=0, mode=0):
+    """A Layer III frame header with the given parameters, as 4 bytes."""
+    family = MPEG1 if version == MPEG1 else MPEG2
+    bitrate_index = BITRATES[family, 3].index(bitrate // 1000)
+    rate_index = SAMPLE_RATES[version].index(sample_rate)
+    version_bits = {v: k for k, v in VERSION_BITS.items()}[version]
+    b1 = 0xE0 | (version_bits << 3) | (1 << 1) | 1  # Layer III, no CRC
+    b2 = (bitrate_index << 4) | (rate_index << 2) | (padding << 1)
+    return bytes((0xFF, b1, b2, mode << 6))
+
+
+def info_frame(template, frames, size, toc=None, tag=b'Info'):
+    """
+    A silent Layer III frame carrying a Xing/Info tag for `frames` audio
+    frames totalling `size` bytes, with the parameters of `template`. As
+    LAME does, the byte count includes this frame and the frame count does
+    not. The smallest bitrate that fits the tag is used.
+    """
+    family = MPEG1 if template.version == MPEG1 else MPEG2
+    pos = 4 + _side_info_size(template)
+    needed = pos + 8 + 8 + (100 if toc else 0)
+    for kbps in BITRATES[family, 3][1:]:
+        header = parse_header(make_header(template.version, kbps * 1000, template.sample_rate,
+                                          0, template.mode))
+        if header.length >= needed:
+            break
+    frame = bytearray(header.length)
+    frame[:4] = make_header(template.version, header.bitrate, template.sample_rate, 0, template.mode)
+    flags = 3 | (4 if toc else 0)
+    struct.pack_into('>4sIII', frame, pos, tag, flags, frames, size + len(frame))
+    if toc:
+        frame[pos + 16:pos + 116] = toc
+    return bytes(frame)
+
+
+def seek_toc(frame_offsets, total_bytes):
+    """Xing TOC: for each percent of duration, the byte position as a 1/256 fraction."""
+    frames = len(frame_offsets)
+    toc = bytearray(100)
+    for percent in range(100):
+        offset = frame_offsets[min(frames - 1, percent * frames // 100)]
+        toc[percent] = min(255, offset * 256 // total_bytes)
+    return bytes(toc)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Re-encode generated PNGs as small as they can losslessly be, and report
+sizes against per-directory budgets.
+
+For each image:
+  - RGBA images with no transparency are stored as RGB
+  - images with at most 256 distinct colors (the flat #1A237E + gold icons)
+    are stored as an exact palette, with alpha in a tRNS chunk
+  - zlib level and strategy are chosen per image: small images try every
+    combination, large ones pick on a sample strip and are encoded once
+  - text, ICC and EXIF metadata are dropped
+Every candidate is decoded again and compared to the original pixels, so
+the rewrite is never lossy. Files are processed in parallel.
+
+    python3 png_optimize.py                      # default deliverable dirs
+    python3 png_optimize.py --dry-run --budget ios_screenshots=12000
+"""
+from PIL import Image
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from build_cache import BuildCache
+
+# Directories holding deliverables, with their size budgets in KB
+DEFAULT_BUDGETS = {
+    'ios_screenshots': 30000,
+    'play_screenshots': 12000,
+    'android/app/src/main/res': 600,
+    'ios/Runner/Assets.xcassets/AppIcon.appiconset': 1500,
+}
+
+# zlib strategies: default, Z_FILTERED, Z_RLE
+ZLIB_STRATEGIES = (-1, 1, 3)
+ZLIB_LEVELS = (6, 9)
+
+# Above this many pixels settings are chosen on a strip of SAMPLE_ROWS
+SAMPLE_PIXELS = 1_000_000
+SAMPLE_ROWS = 128
+
+# Level 9 is several times slower than 6; only use it on large images
+# when the sample shows it is worth at least this much
+LEVEL_9_MIN_GAIN = 0.01
+
+MARK = 'png_optimize'
+
+
+def exact_palette(img):
+    """
+    Convert `img` to a 'P' image holding exactly its colors, or return None
+    when it has more than 256 of them.
+    """
+    # getcolors gives up as soon as it sees a 257th color
+    if img.getcolors(256) is None:
+        return None
+
+    rgba = np.asarray(img.convert('RGBA'))
+    packed = rgba.view(np.uint32)[..., 0]
+    colors, index = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return None
+
+    palette = colors.view(np.uint8).reshape(-1, 4)
+    pal_img = Image.fromarray(index.reshape(packed.shape).astype(np.uint8), 'P')
+    pal_img.putpalette(palette[:, :3].tobytes(), 'RGB')
+    if img.mode == 'RGBA' and (palette[:, 3] != 255).any():
+        pal_img.info['transparency'] = palette[:, 3].tobytes()
+    return pal_img
+
+
+def candidates(img):
+    """Yield lossless re-encodings of `img` as (label, image) pairs."""
+    if img.mode == 'RGBA' and img.getextrema()[3] == (255, 255):
+        img = img.convert('RGB')
+
+    # Rebuild from raw pixels so no metadata from the source survives
+    plain = Image.frombytes(img.mode, img.size, img.tobytes())
+    yield img.mode, plain
+
+    pal_img = exact_palette(img)
+    if pal_img is not None:
+        yield 'P', pal_img
+
+
+def encode(img, level, strategy):
+    buf = io.BytesIO()
+    img.save(buf, 'PNG', compress_level=level, compress_type=strategy)
+    return buf.getvalue()
+
+
+def settings_for(img):
+    """(level, strategy) pairs worth a full encode of `img`."""
+    combos = [(level, strategy) for level in ZLIB_LEVELS for strategy in ZLIB_STRATEGIES]
+    if img.width * img.height <= SAMPLE_PIXELS:
+        return combos
+
+    top = max(0, img.height // 2 - SAMPLE_ROWS // 2)
+    strip = img.crop((0, top, img.width, min(img.height, top + SAMPLE_ROWS)))
+    sizes = {combo: len(encode(strip, *combo)) for combo in combos}
+    best = min(sizes, key=sizes.get)
+    fast = min((c for c in combos if c[0] != 9), key=sizes.get)
+    if best[0] == 9 and sizes[best] > sizes[fast] * (1 - LEVEL_9_MIN_GAIN):
+        best = fast
+    return [best]
+
+
+def same_pixels(a, b):
+    return np.array_equal(np.asarray(a.convert('RGBA')), np.asarray(b.convert('RGBA')))
+
+
+def optimize_file(path, dry_run=False):
+    """Worker: returns (path, bytes before, bytes after, chosen encoding)."""
+    with open(path, 'rb') as f:
+        original = f.read()
+    source = Image.open(io.BytesIO(original))
+    source.load()
+    if source.mode not in ('RGB', 'RGBA', 'P', 'L', 'LA'):
+        return path, len(original), len(original), 'skipped'
+    reference = source.convert('RGBA')
+
+    best, best_label = original, 'kept'
+    for label, img in candidates(source.convert('RGBA') if source.mode != 'RGB' else source):
+        for level, strategy in settings_for(img):
+            data = encode(img, level, strategy)
+            if len(data) < len(best):
+                best, best_label = data, f'{label}/l{level}/s{strategy}'
+
+    if best is not original:
+        check = Image.open(io.BytesIO(best))
+        if not same_pixels(check, reference):
+            return path, len(original), len(original), 'kept (lossy candidate rejected)'
+        if not dry_run:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(best)
+            os.replace(tmp_path, path)
+
+    return path, len(original), len(best), best_label
+
+
+def find_pngs(directory):
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith('.png'):
+                yield os.path.join(root, name)
+
+
+def parse_budgets(items):
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in items or []:
+        directory, _, kb = item.partition('=')
+        budgets[directory.rstrip('/')] = int(kb)
+    return budgets
+
+
+def report(results, budgets):
+    """Print per-file savings and per-directory totals; return directories over budget."""
+    print(f"{'file':<72} {'before':>10} {'after':>10}  encoding")
+    for path, before, after, label in sorted(results):
+        print(f"{path:<72} {before:>10,} {after:>10,}  {label}")
+
+    over = []
+    print(f"\n{'directory':<48} {'before KB':>10} {'after KB':>10} {'budget KB':>10}")
+    for directory, budget in budgets.items():
+        prefix = directory + os.sep
+        rows = [r for r in results if r[0].startswith(prefix)]
+        if not rows:
+            continue
+        before = sum(r[1] for r in rows) / 1024
+        after = sum(r[2] for r in rows) / 1024
+        status = 'OVER' if after > budget else 'ok'
+        if after > budget:
+            over.append(directory)
+        print(f"{directory:<48} {before:>10.0f} {after:>10.0f} {budget:>10}  {status}")
+
+    total_before = sum(r[1] for r in results)
+    total_after = sum(r[2] for r in results)
+    if total_before:
+        saved = 100 * (1 - total_after / total_before)
+        print(f"\nTotal: {total_before:,} -> {total_after:,} bytes ({saved:.1f}% smaller)")
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Losslessly shrink generated PNGs.')
+    parser.add_argument('dirs', nargs='*', help='directories to process (default: budgeted dirs)')
+    parser.add_argument('--budget', action='append', metavar='DIR=KB',
+                        help='size budget for a directory, in KB (repeatable)')
+    parser.add_argument('--dry-run', action='store_true', help='report without rewriting files')
+    parser.add_argument('--strict', action='store_true', help='exit 1 when a budget is exceeded')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    dirs = args.dirs or [d for d in budgets if os.path.isdir(d)]
+
+    cache = BuildCache()
+    paths, results = [], []
+    for directory in dirs:
+        for path in find_pngs(directory):
+            if cache.marked(MARK, path):
+                size = os.path.getsize(path)
+                results.append((path, size, size, 'already optimized'))
+            else:
+                paths.append(path)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for result in pool.map(optimize_file, paths, [args.dry_run] * len(paths)):
+            results.append(result)
+            path = result[0]
+            if not args.dry_run:
+                # Keep the producing stage's cache entry valid after the rewrite
+                cache.refresh(path)
+                cache.mark(MARK, path)
+    cache.save()
+
+    over = report(results, budgets)
+    if over and args.strict:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
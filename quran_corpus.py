@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Bundle alquran.cloud JSON dumps into a compact offline corpus, and read
+single verses back out of it by seeking straight to them.
+
+The corpus is one file holding every edition:
+  - each surah of each edition is cut into blocks of 8 ayahs, and each
+    block is zlib-compressed on its own, its ayah texts concatenated as
+    UTF-8
+  - every block of an edition is compressed against that edition's
+    preset dictionary (16 KB sampled from its own ayahs), so small blocks
+    still compress as well as whole surahs did
+  - a fixed-width index with one record per (edition, global ayah number)
+    gives the ayah's surah and its byte range inside the decompressed block
+  - a small compressed JSON block holds the surah metadata (names,
+    revelation type), the same fields the API returns
+Looking up ayah n of edition e is two positioned reads, one of a 7-byte
+index record at a computed offset and one of its block, and the
+decompression of at most 8 ayahs, however long the surah; no JSON is
+parsed.
+
+Dumps are the API's own responses saved to disk: a whole edition
+(/v1/quran/{edition}), a single surah (/v1/surah/{n}/{edition}) or a
+directory of single-surah dumps.
+
+    python3 quran_corpus.py build dumps/ar.json dumps/en.sahih.json dumps/fr.hamidullah.json
+    python3 quran_corpus.py get 262 en.sahih
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import zlib
+from collections import OrderedDict
+
+DEFAULT_CORPUS = 'assets/quran_corpus.bin'
+
+# Editions the app requests (LanguageService.getApiEdition)
+DEFAULT_EDITIONS = ('ar', 'en.sahih', 'fr.hamidullah')
+
+SURAH_AYAH_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128,
+    111, 110, 98, 135, 112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73,
+    54, 45, 83, 182, 88, 75, 85, 54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60,
+    49, 62, 55, 78, 96, 29, 22, 24, 13, 14, 11, 11, 18, 12, 12, 30, 52, 52,
+    44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42, 29, 19, 36, 25, 22, 17, 19,
+    26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11, 11, 8, 3, 9, 5, 4, 7, 3,
+    6, 3, 5, 4, 5, 6,
+)
+SURAH_COUNT = len(SURAH_AYAH_COUNTS)
+TOTAL_AYAHS = sum(SURAH_AYAH_COUNTS)  # 6236
+
+# Surah fields kept from the API response
+SURAH_FIELDS = ('number', 'name', 'englishName', 'englishNameTranslation',
+                'revelationType', 'numberOfAyahs')
+
+MAGIC = b'AYQC'
+VERSION = 2
+HEADER = struct.Struct('<4sHHHI')        # magic, version, editions, surahs, ayahs
+EDITION = struct.Struct('<32s')          # identifier, NUL padded
+SURAH = struct.Struct('<HH')             # first global ayah number, ayah count
+BLOCK = struct.Struct('<II')             # offset, compressed length
+RECORD = struct.Struct('<BHI')           # surah, byte length, start in its block
+
+BLOCK_AYAHS = 8                          # ayahs per compressed block
+DICTIONARY_STRIDE = 20                   # the dictionary samples every 20th ayah...
+DICTIONARY_BYTES = 16384                 # ...and keeps the last 16 KB of the sample
+
+
+def surah_starts(counts=SURAH_AYAH_COUNTS):
+    """Global number of the first ayah of each surah."""
+    starts, number = [], 1
+    for count in counts:
+        starts.append(number)
+        number += count
+    return starts
+
+
+def block_starts(counts=SURAH_AYAH_COUNTS):
+    """(index of each surah's first block within an edition, blocks per edition)."""
+    starts, index = [], 0
+    for count in counts:
+        starts.append(index)
+        index += -(-count // BLOCK_AYAHS)
+    return starts, index
+
+
+# --- dumps --------------------------------------------------------------------
+
+def _surahs_from_json(doc):
+    data = doc.get('data', doc)
+    if 'surahs' in data:
+        return data.get('edition', {}).get('identifier'), data['surahs']
+    return data.get('edition', {}).get('identifier'), [data]
+
+
+def load_dump(path):
+    """
+    (edition identifier, surahs) from a dump file or directory. The
+    identifier comes from the response's `edition` block, falling back to
+    the file or directory name.
+    """
+    if os.path.isdir(path):
+        edition, surahs = None, []
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                found, part = load_dump(os.path.join(path, name))
+                edition = edition or found
+                surahs.extend(part)
+        fallback = os.path.basename(os.path.normpath(path))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            edition, surahs = _surahs_from_json(json.load(f))
+        fallback = os.path.splitext(os.path.basename(path))[0]
+    return edition or fallback, sorted(surahs, key=lambda s: s['number'])
+
+
+def validate(edition, surahs):
+    """Raise ValueError unless `surahs` is a complete, consistently numbered edition."""
+    if len(surahs) != SURAH_COUNT:
+        raise ValueError(f"{edition}: expected {SURAH_COUNT} surahs, got {len(surahs)}")
+    for surah, first in zip(surahs, surah_starts()):
+        ayahs = surah['ayahs']
+        expected = SURAH_AYAH_COUNTS[surah['number'] - 1]
+        if len(ayahs) != expected:
+            raise ValueError(f"{edition}: surah {surah['number']} has {len(ayahs)} ayahs, "
+                             f"expected {expected}")
+        for i, ayah in enumerate(ayahs):
+            if ayah['number'] != first + i or ayah['numberInSurah'] != i + 1:
+                raise ValueError(f"{edition}: surah {surah['number']} ayah {i + 1} is "
+                                 f"numbered {ayah['number']}")
+
+
+# --- writing ------------------------------------------------------------------
+
+def build_corpus(editions, out_path=DEFAULT_CORPUS, level=9):
+    """
+    Write the corpus for `editions`, a list of (identifier, surahs) pairs.
+    Surah metadata is taken from the first edition. Returns the file size.
+    """
+    for edition, surahs in editions:
+        validate(edition, surahs)
+
+    meta = [{field: surah.get(field) for field in SURAH_FIELDS} for surah in editions[0][1]]
+    meta_blob = zlib.compress(json.dumps(meta, ensure_ascii=False).encode('utf-8'), level)
+
+    dictionaries, blocks, records = [], [], []
+    for _, surahs in editions:
+        texts = [ayah['text'] for surah in surahs for ayah in surah['ayahs']]
+        zdict = make_dictionary(texts[::DICTIONARY_STRIDE])
+        dictionaries.append(zlib.compress(zdict, level))
+        for surah in surahs:
+            surah_records, surah_blocks = pack_blocks(
+                surah['number'], [a['text'] for a in surah['ayahs']], zdict, level)
+            records.append(surah_records)
+            blocks += surah_blocks
+    return write_corpus(out_path, [edition for edition, _ in editions], meta_blob, dictionaries,
+                        blocks, records)
+
+
+def make_dictionary(sample):
+    """An edition's preset zlib dictionary from `sample`, every DICTIONARY_STRIDE-th ayah text."""
+    return b''.join(text.encode('utf-8') for text in sample)[-DICTIONARY_BYTES:]
+
+
+def pack_blocks(surah, texts, zdict, level=9):
+    """(index records, compressed blocks) for the ayah `texts` of one surah."""
+    records, blocks = [], []
+    for i in range(0, len(texts), BLOCK_AYAHS):
+        parts, start = [], 0
+        for text in texts[i:i + BLOCK_AYAHS]:
+            data = text.encode('utf-8')
+            records.append(RECORD.pack(surah, len(data), start))
+            parts.append(data)
+            start += len(data)
+        compressor = zlib.compressobj(level, zdict=zdict)
+        blocks.append(compressor.compress(b''.join(parts)) + compressor.flush())
+    return b''.join(records), blocks
+
+
+def pack_identifier(edition, size=EDITION.size):
+    """`edition` as bytes for a NUL-padded `size`-byte field; ValueError if it does not fit."""
+    try:
+        data = edition.encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError(f"edition identifier {edition!r} is not ASCII")
+    if len(data) > size:
+        raise ValueError(f"edition identifier {edition!r} is longer than {size} bytes")
+    return data
+
+
+def write_corpus(out_path, editions, meta_blob, dictionaries, blocks, records):
+    """
+    Lay out a corpus file from its parts: a compressed dictionary per
+    edition, and blocks and records in edition then surah order. Returns
+    the file size.
+    """
+    identifiers = [pack_identifier(edition) for edition in editions]
+    records = b''.join(records)
+    data_start = (HEADER.size + EDITION.size * len(editions) + SURAH.size * SURAH_COUNT
+                  + BLOCK.size * (1 + len(dictionaries) + len(blocks)) + len(records))
+    offset = data_start + len(meta_blob)
+    block_table = []
+    for block in dictionaries + blocks:
+        block_table.append(BLOCK.pack(offset, len(block)))
+        offset += len(block)
+
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(editions), SURAH_COUNT, TOTAL_AYAHS))
+        for identifier in identifiers:
+            f.write(EDITION.pack(identifier))
+        for first, count in zip(surah_starts(), SURAH_AYAH_COUNTS):
+            f.write(SURAH.pack(first, count))
+        f.write(BLOCK.pack(data_start, len(meta_blob)))
+        f.write(b''.join(block_table))
+        f.write(records)
+        f.write(meta_blob)
+        for block in dictionaries + blocks:
+            f.write(block)
+    os.replace(tmp_path, out_path)
+    return os.path.getsize(out_path)
+
+
+def rewrite_corpus(corpus, replacements, out_path, level=9):
+    """
+    Write `corpus` with some ayah texts replaced, {edition: {number: text}}.
+    Only the blocks of surahs with a replaced ayah are recompressed (every
+    surah of the edition when a replaced ayah is part of its dictionary
+    sample); the rest are copied as they are, so the result matches a
+    fresh build when `corpus` was built at the same `level`. `out_path`
+    may be corpus.path.
+    """
+    unknown = set(replacements) - set(corpus.editions)
+    if unknown:
+        raise KeyError(f"edition {sorted(unknown)[0]!r} is not in {corpus.path}")
+    meta_blob = corpus._read(*corpus._meta_block)
+    dictionaries, blocks, records = [], [], []
+    for e, edition in enumerate(corpus.editions):
+        changed = replacements.get(edition, {})
+        touched = {corpus._record(e, number)[0] for number in changed}
+        zdict = corpus._dictionary(e)
+        if any(number % DICTIONARY_STRIDE == 1 for number in changed):
+            sample = [changed[number] if number in changed else corpus.text(number, edition)
+                      for number in range(1, corpus.ayah_count + 1, DICTIONARY_STRIDE)]
+            zdict = make_dictionary(sample)
+        if zdict != corpus._dictionary(e):
+            dictionaries.append(zlib.compress(zdict, level))
+            touched = set(range(1, corpus.surah_count + 1))
+        else:
+            dictionaries.append(corpus._read(*corpus.dictionary_table[e]))
+        for surah, (first, count) in enumerate(corpus.surah_table, 1):
+            if surah in touched:
+                texts = [changed.get(ayah['number'], ayah['text']) for ayah in corpus.surah(surah, edition)]
+                surah_records, surah_blocks = pack_blocks(surah, texts, zdict, level)
+            else:
+                start = e * corpus.edition_blocks + corpus.block_starts[surah - 1]
+                surah_blocks = [corpus._read(*corpus._block_entry(index))
+                                for index in range(start, start + -(-count // BLOCK_AYAHS))]
+                surah_records = corpus._read(
+                    corpus._records_start + RECORD.size * (e * corpus.ayah_count + first - 1),
+                    RECORD.size * count)
+            records.append(surah_records)
+            blocks += surah_blocks
+    return write_corpus(out_path, corpus.editions, meta_blob, dictionaries, blocks, records)
+
+
+# --- reading ------------------------------------------------------------------
+
+class Corpus:
+    """
+    Random access to a corpus file. Only the fixed tables are read on
+    open; ayah records and blocks are read on demand, and the most
+    recently used decompressed blocks are kept (`cache_blocks`).
+    """
+
+    def __init__(self, path=DEFAULT_CORPUS, cache_blocks=16):
+        self.path = path
+        self.cache_blocks = cache_blocks
+        self._blocks = OrderedDict()
+        self._dictionaries = {}
+        self._meta = None
+        self.file = open(path, 'rb')
+
+        magic, version, n_editions, n_surahs, n_ayahs = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} corpus")
+        self.ayah_count = n_ayahs
+        self.surah_count = n_surahs
+
+        raw = self.file.read(EDITION.size * n_editions)
+        self.editions = [name.rstrip(b'\0').decode('ascii')
+                         for (name,) in EDITION.iter_unpack(raw)]
+        self._edition_index = {name: i for i, name in enumerate(self.editions)}
+        self.surah_table = list(SURAH.iter_unpack(self.file.read(SURAH.size * n_surahs)))
+        self.block_starts, self.edition_blocks = block_starts([count for _, count in self.surah_table])
+        self._meta_block = BLOCK.unpack(self.file.read(BLOCK.size))
+        self.dictionary_table = list(BLOCK.iter_unpack(self.file.read(BLOCK.size * n_editions)))
+        self._block_table = self.file.read(BLOCK.size * n_editions * self.edition_blocks)
+        self._records_start = self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, offset, length):
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def _edition(self, edition):
+        try:
+            return self._edition_index[edition]
+        except KeyError:
+            raise KeyError(f"edition {edition!r} is not in {self.path}") from None
+
+    def _record(self, e, number):
+        if not 1 <= number <= self.ayah_count:
+            raise IndexError(f"ayah number must be 1..{self.ayah_count}, got {number}")
+        offset = self._records_start + RECORD.size * (e * self.ayah_count + number - 1)
+        return RECORD.unpack(self._read(offset, RECORD.size))
+
+    def _dictionary(self, e):
+        zdict = self._dictionaries.get(e)
+        if zdict is None:
+            zdict = self._dictionaries[e] = zlib.decompress(self._read(*self.dictionary_table[e]))
+        return zdict
+
+    def _block_entry(self, index):
+        """(offset, compressed length) of block `index` of the file."""
+        return BLOCK.unpack_from(self._block_table, BLOCK.size * index)
+
+    def _decompress(self, e, data):
+        return zlib.decompressobj(zdict=self._dictionary(e)).decompress(data)
+
+    def _block(self, e, surah, number):
+        """The decompressed block holding global ayah `number` of `surah`."""
+        first, _ = self.surah_table[surah - 1]
+        index = e * self.edition_blocks + self.block_starts[surah - 1] + (number - first) // BLOCK_AYAHS
+        data = self._blocks.get(index)
+        if data is not None:
+            self._blocks.move_to_end(index)
+            return data
+        data = self._decompress(e, self._read(*self._block_entry(index)))
+        self._blocks[index] = data
+        if len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return data
+
+    def surah_meta(self, surah):
+        if self._meta is None:
+            self._meta = json.loads(zlib.decompress(self._read(*self._meta_block)))
+        return self._meta[surah - 1]
+
+    def text(self, number, edition='ar'):
+        """Text of global ayah `number` (1..6236) in `edition`."""
+        e = self._edition(edition)
+        surah, length, start = self._record(e, number)
+        return self._block(e, surah, number)[start:start + length].decode('utf-8')
+
+    def ayah(self, number, edition='ar'):
+        """The ayah shaped like the API's /ayah/{number}/{edition} `data`."""
+        e = self._edition(edition)
+        surah, length, start = self._record(e, number)
+        text = self._block(e, surah, number)[start:start + length].decode('utf-8')
+        first, _ = self.surah_table[surah - 1]
+        return {'number': number, 'text': text, 'numberInSurah': number - first + 1,
+                'surah': self.surah_meta(surah)}
+
+    def surah(self, surah, edition='ar'):
+        """All ayahs of `surah`, shaped like the API's /surah/{n}/{edition} `ayahs`."""
+        e = self._edition(edition)
+        first, count = self.surah_table[surah - 1]
+        offset = self._records_start + RECORD.size * (e * self.ayah_count + first - 1)
+        index = e * self.edition_blocks + self.block_starts[surah - 1]
+        ayahs = []
+        for i, (_, length, start) in enumerate(
+                RECORD.iter_unpack(self._read(offset, RECORD.size * count))):
+            if i % BLOCK_AYAHS == 0:
+                data = self._decompress(e, self._read(*self._block_entry(index + i // BLOCK_AYAHS)))
+            ayahs.append({'number': first + i, 'numberInSurah': i + 1,
+                          'text': data[start:start + length].decode('utf-8')})
+        return ayahs
+
+
+def open_corpus(dumps=None, corpus_path=DEFAULT_CORPUS, tmp=None):
+    """A Corpus from a corpus file, or built into `tmp` from edition dumps."""
+    if dumps:
+        corpus_path = os.path.join(tmp, 'quran_corpus.bin')
+        build_corpus([load_dump(path) for path in dumps], corpus_path)
+    if not os.path.exists(corpus_path):
+        raise SystemExit(f"{corpus_path} not found; build it with quran_corpus.py build, or pass --dumps")
+    return Corpus(corpus_path)
+
+
+# --- command line -------------------------------------------------------------
+
+def parse_dump_arg(item):
+    """`PATH` or `EDITION=PATH`."""
+    edition, sep, path = item.partition('=')
+    if not sep:
+        return None, item
+    return edition, path
+
+
+def dump_size(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Quran corpus bundler and reader.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='bundle JSON dumps into a corpus')
+    build.add_argument('dumps', nargs='+', metavar='[EDITION=]PATH',
+                       help='edition dump file or directory of surah dumps')
+    build.add_argument('-o', '--output', default=DEFAULT_CORPUS)
+    build.add_argument('--level', type=int, default=9, help='zlib level (default 9)')
+
+    get = sub.add_parser('get', help='print one ayah from a corpus')
+    get.add_argument('number', type=int, help='global ayah number, 1..6236')
+    get.add_argument('edition', nargs='?', default='ar')
+    get.add_argument('--corpus', default=DEFAULT_CORPUS)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        editions, json_bytes = [], 0
+        for item in args.dumps:
+            edition, path = parse_dump_arg(item)
+            found, surahs = load_dump(path)
+            editions.append((edition or found, surahs))
+            json_bytes += dump_size(path)
+        try:
+            size = build_corpus(editions, args.output, args.level)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Wrote {args.output}: {len(editions)} editions "
+              f"({', '.join(name for name, _ in editions)}), "
+              f"{size:,} bytes from {json_bytes:,} bytes of JSON")
+    else:
+        with Corpus(args.corpus) as corpus:
+            print(json.dumps(corpus.ayah(args.number, args.edition), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Deterministic, synthetic alquran.cloud payloads for benchmarks and local
+servers, so nothing has to talk to the live API.
+
+The shape matches the real responses: 114 surahs with their real ayah
+counts and global numbering, surah metadata, and ayah texts whose length
+varies the way real ones do (long in the early surahs, short at the end).
+The texts themselves are random words.
+
+Per-ayah recitation MP3s are synthesized too: silent Layer III frames
+behind an ID3v2 tag and a LAME-style Info frame, named SSSAAA.mp3 like
+the everyayah.com files Reciter.audioUrlPattern points at.
+
+    python3 quran_fixtures.py fixtures/      # one /quran/{edition} dump per edition
+    python3 quran_fixtures.py fixtures/ --audio 1 2 112 113 114
+"""
+import argparse
+import json
+import os
+import random
+
+from mp3_frames import MONO, info_frame, make_header, parse_header
+from quran_corpus import DEFAULT_EDITIONS, SURAH_AYAH_COUNTS, surah_starts
+
+ARABIC_LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+WORDS = {
+    'en': ['the', 'Lord', 'of', 'worlds', 'mercy', 'guidance', 'those', 'who', 'believe',
+           'and', 'do', 'righteous', 'deeds', 'indeed', 'Allah', 'is', 'Knowing', 'Wise',
+           'say', 'day', 'judgement', 'patience', 'prayer', 'charity', 'earth', 'heavens'],
+    'fr': ['le', 'Seigneur', 'des', 'mondes', 'miséricorde', 'guidée', 'ceux', 'qui',
+           'croient', 'et', 'font', 'bonnes', 'œuvres', 'certes', 'Allah', 'est',
+           'Omniscient', 'Sage', 'dis', 'jour', 'jugement', 'patience', 'prière', 'terre'],
+}
+
+EDITION_INFO = {
+    'ar': ('ar', 'القرآن الكريم', 'Quran', 'quran', 'rtl'),
+    'en.sahih': ('en', 'Saheeh International', 'Saheeh International', 'translation', 'ltr'),
+    'fr.hamidullah': ('fr', 'Hamidullah', 'Muhammad Hamidullah', 'translation', 'ltr'),
+}
+
+
+def _words(rng, language, count):
+    if language == 'ar':
+        return ' '.join(''.join(rng.choice(ARABIC_LETTERS) for _ in range(rng.randint(2, 7)))
+                        for _ in range(count))
+    return ' '.join(rng.choice(WORDS[language]) for _ in range(count))
+
+
+def edition_info(identifier):
+    language, name, english_name, kind, direction = EDITION_INFO.get(
+        identifier, (identifier.split('.')[0], identifier, identifier, 'translation', 'ltr'))
+    return {'identifier': identifier, 'language': language, 'name': name,
+            'englishName': english_name, 'format': 'text', 'type': kind,
+            'direction': direction}
+
+
+def surah_meta(number):
+    return {
+        'number': number,
+        'name': f'سورة {number}',
+        'englishName': f'Surah {number}',
+        'englishNameTranslation': f'Chapter {number}',
+        'revelationType': 'Meccan' if number % 3 else 'Medinan',
+        'numberOfAyahs': SURAH_AYAH_COUNTS[number - 1],
+    }
+
+
+def make_surahs(identifier, seed=0):
+    """The `surahs` list of a /quran/{edition} response."""
+    rng = random.Random(f'{identifier}:{seed}')
+    language = edition_info(identifier)['language']
+    surahs = []
+    for number, (first, count) in enumerate(zip(surah_starts(), SURAH_AYAH_COUNTS), 1):
+        # Early surahs have long ayahs, the last ones short
+        mean = 8 + 40 * (1 - number / len(SURAH_AYAH_COUNTS))
+        ayahs = []
+        for i in range(count):
+            words = max(3, int(rng.gauss(mean, mean / 3)))
+            ayahs.append({'number': first + i, 'text': _words(rng, language, words),
+                          'numberInSurah': i + 1, 'juz': 1 + (first + i - 1) * 30 // 6236,
+                          'page': 1 + (first + i - 1) * 604 // 6236, 'sajda': False})
+        surahs.append(dict(surah_meta(number), ayahs=ayahs))
+    return surahs
+
+
+def make_edition(identifier, seed=0):
+    """A complete /quran/{edition} response."""
+    return {'code': 200, 'status': 'OK',
+            'data': {'surahs': make_surahs(identifier, seed), 'edition': edition_info(identifier)}}
+
+
+def write_dumps(directory, editions=DEFAULT_EDITIONS, seed=0):
+    """Write one {edition}.json dump per edition; return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for identifier in editions:
+        path = os.path.join(directory, f'{identifier}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_edition(identifier, seed), f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def synthetic_mp3(seconds, rng, bitrate=32000, sample_rate=44100, vbr=False, mode=MONO,
+                  info=True):
+    """
+    An MP3 of about `seconds` of silence. With `vbr`, every frame picks its
+    own bitrate between 32 and 128 kbps; without `info` there is no Info frame.
+    """
+    frames = []
+    for _ in range(max(1, round(seconds * sample_rate / 1152))):
+        rate = rng.choice((32000, 48000, 64000, 96000, 128000)) if vbr else bitrate
+        header = make_header(sample_rate=sample_rate, bitrate=rate, mode=mode)
+        frames.append(header + bytes(parse_header(header).length - 4))
+    audio = b''.join(frames)
+    head = info_frame(parse_header(frames[0]), len(frames), len(audio)) if info else b''
+    title = b'\x00synthetic'
+    frame = b'TIT2' + len(title).to_bytes(4, 'big') + b'\x00\x00' + title
+    tag = b'ID3\x03\x00\x00' + len(frame).to_bytes(4, 'big') + frame
+    return tag + head + audio
+
+
+def write_ayah_audio(directory, surahs=None, seed=0, vbr=False, info=True):
+    """
+    Write SSSAAA.mp3 for every ayah of `surahs` (default: all 114); return
+    the number of files. Durations follow the text lengths above.
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for number in surahs or range(1, len(SURAH_AYAH_COUNTS) + 1):
+        rng = random.Random(f'audio:{seed}:{number}')
+        mean = 2 + 10 * (1 - number / len(SURAH_AYAH_COUNTS))
+        for ayah in range(1, SURAH_AYAH_COUNTS[number - 1] + 1):
+            seconds = max(1.0, rng.gauss(mean, mean / 3))
+            with open(os.path.join(directory, f'{number:03d}{ayah:03d}.mp3'), 'wb') as f:
+                f.write(synthetic_mp3(seconds, rng, vbr=vbr, info=info))
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic alquran.cloud dumps.')
+    parser.add_argument('directory')
+    parser.add_argument('--editions', nargs='+', default=list(DEFAULT_EDITIONS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--audio', type=int, nargs='*', metavar='SURAH',
+                        help='write per-ayah MP3s instead, for these surahs (default: all)')
+    parser.add_argument('--vbr', action='store_true', help='variable bitrate MP3s')
+    args = parser.parse_args()
+
+    if args.audio is not None:
+        count = write_ayah_audio(args.directory, args.audio, args.seed, args.vbr)
+        print(f"Wrote {count} ayah MP3s to {args.directory}")
+        return
+    for path in write_dumps(args.directory, args.editions, args.seed):
+        print(f"Wrote {path} ({os.path.getsize(path):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Generate lib/generated/quran_tables.dart: const lookup tables for the
+static data the app otherwise rebuilds or fetches at runtime.
+
+  - surahs: the 114 entries of /surah, with the names the app shows in
+    each language (name for ar, englishName for en, frenchName for fr)
+    and toJson() in the /surah shape, so getSurahs needs neither a
+    request nor a cache per AppLanguage
+  - firstAyah: the global number of each surah's first ayah, plus a
+    sentinel 6237. (surah, numberInSurah) -> global is one addition, and
+    global -> (surah, numberInSurah) is a binary search over 115 entries,
+    with no metadata from the network
+  - arabicNumerals: 0..6236 in Arabic-Indic digits, so a verse or surah
+    number is an index instead of QuranApiService.toArabicNumerals' ten
+    replaceAll passes; toArabicDigits() does any other string in one pass
+
+Surah metadata comes from the ar, en.sahih and fr.hamidullah edition
+dumps, or a corpus (quran_corpus.py). alquran.cloud has no French surah
+names. A dump whose surahs carry frenchName / frenchNameTranslation
+supplies them; otherwise they fall back to the English fields, as
+Verse.frenchReference does. The file is only rewritten when its content
+changes.
+
+Like lib/generated/edition_catalog.dart, the output is not committed:
+it is generated from the dumps or corpus of the build. Run without
+arguments and with no assets/quran_corpus.bin, it writes nothing and
+exits 0; a corpus or dump named on the command line must exist.
+
+    python3 quran_tables.py
+    python3 quran_tables.py --dumps dumps/ar.json dumps/en.sahih.json dumps/fr.hamidullah.json
+    python3 quran_tables.py --corpus assets/quran_corpus.bin
+"""
+import argparse
+import bisect
+import os
+
+from common_io import write_if_changed
+from edition_catalog import dart_literal
+from quran_corpus import (DEFAULT_CORPUS, SURAH_AYAH_COUNTS, SURAH_COUNT, TOTAL_AYAHS, Corpus,
+                          load_dump, surah_starts)
+from verse_schedule import LANGUAGES
+
+DEFAULT_OUTPUT = 'lib/generated/quran_tables.dart'
+
+ARABIC_DIGITS = str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')
+FIELDS = (('number', 'int'), ('name', 'String'), ('englishName', 'String'),
+          ('englishNameTranslation', 'String'), ('frenchName', 'String'),
+          ('frenchNameTranslation', 'String'), ('revelationType', 'String'),
+          ('numberOfAyahs', 'int'))
+NUMERALS_PER_LINE = 16
+
+
+def first_ayahs():
+    """Global number of each surah's first ayah, then TOTAL_AYAHS + 1."""
+    return surah_starts() + [TOTAL_AYAHS + 1]
+
+
+def arabic_numerals(limit=TOTAL_AYAHS):
+    return [str(n).translate(ARABIC_DIGITS) for n in range(limit + 1)]
+
+
+def global_ayah(surah, number_in_surah, firsts):
+    return firsts[surah - 1] + number_in_surah - 1
+
+
+def surah_ayah(number, firsts):
+    """(surah, number in surah) of global ayah `number`."""
+    surah = bisect.bisect_right(firsts, number)
+    return surah, number - firsts[surah - 1] + 1
+
+
+def surah_table(metas):
+    """
+    The 114 table entries from {language: [surah metadata]}; a language
+    without metadata uses the first one given.
+    """
+    fallback = next(iter(metas.values()))
+    ar, en, fr = (metas.get(language) or fallback for language in ('ar', 'en', 'fr'))
+    table = []
+    for number, (a, e, f) in enumerate(zip(ar, en, fr), 1):
+        if a['number'] != number or a['numberOfAyahs'] != SURAH_AYAH_COUNTS[number - 1]:
+            raise ValueError(f"surah {number}: metadata says number {a['number']} with "
+                             f"{a['numberOfAyahs']} ayahs")
+        table.append({
+            'number': number,
+            'name': a['name'],
+            'englishName': e['englishName'],
+            'englishNameTranslation': e['englishNameTranslation'],
+            'frenchName': f.get('frenchName') or f['englishName'],
+            'frenchNameTranslation': f.get('frenchNameTranslation') or f['englishNameTranslation'],
+            'revelationType': a['revelationType'],
+            'numberOfAyahs': a['numberOfAyahs'],
+        })
+    if len(table) != SURAH_COUNT:
+        raise ValueError(f"expected {SURAH_COUNT} surahs, got {len(table)}")
+    return table
+
+
+def metas_from_dumps(paths):
+    languages = {edition: language for language, edition in LANGUAGES}
+    metas = {}
+    for path in paths:
+        edition, surahs = load_dump(path)
+        metas[languages.get(edition, edition)] = surahs
+    return metas
+
+
+def metas_from_corpus(path):
+    with Corpus(path) as corpus:
+        return {'ar': [corpus.surah_meta(n) for n in range(1, SURAH_COUNT + 1)]}
+
+
+def render_dart(table, sources):
+    firsts = first_ayahs()
+    numerals = arabic_numerals()
+    lines = [
+        '// GENERATED CODE - DO NOT MODIFY BY HAND.',
+        f"// Generated by quran_tables.py from {', '.join(sources)}.",
+        '',
+        "import '../services/language_service.dart';",
+        '',
+        '/// Static metadata of one surah, with its name in each app language.',
+        'class SurahInfo {',
+    ]
+    for field, kind in FIELDS:
+        lines.append(f'  final {kind} {field};')
+    lines += ['', '  const SurahInfo({']
+    for field, _ in FIELDS:
+        lines.append(f'    required this.{field},')
+    lines += [
+        '  });',
+        '',
+        '  /// The name Verse.arabicReference, englishReference and frenchReference use.',
+        '  String nameFor(AppLanguage language) {',
+        '    switch (language) {',
+        '      case AppLanguage.arabic:',
+        '        return name;',
+        '      case AppLanguage.english:',
+        '        return englishName;',
+        '      case AppLanguage.french:',
+        '        return frenchName;',
+        '    }',
+        '  }',
+        '',
+        '  /// The entry as /surah returns it (plus the French names), for code written against getSurahs.',
+        '  Map<String, dynamic> toJson() => {',
+    ]
+    for field, _ in FIELDS:
+        lines.append(f"        '{field}': {field},")
+    lines += [
+        '      };',
+        '}',
+        '',
+        'class QuranTables {',
+        f'  static const int totalAyahs = {TOTAL_AYAHS};',
+        '',
+        '  static const List<SurahInfo> surahs = [',
+    ]
+    for entry in table:
+        args = ', '.join(f'{field}: {dart_literal(entry[field])}' for field, _ in FIELDS)
+        lines.append(f'    SurahInfo({args}),')
+    lines += [
+        '  ];',
+        '',
+        '  /// firstAyah[s - 1] is the global number of ayah 1 of surah s; firstAyah[114] is totalAyahs + 1.',
+        '  static const List<int> firstAyah = [',
+    ]
+    for i in range(0, len(firsts), NUMERALS_PER_LINE):
+        lines.append(f"    {', '.join(map(str, firsts[i:i + NUMERALS_PER_LINE]))},")
+    lines += [
+        '  ];',
+        '',
+        '  /// arabicNumerals[n] is n in Arabic-Indic digits, for 0..totalAyahs.',
+        '  static const List<String> arabicNumerals = [',
+    ]
+    for i in range(0, len(numerals), NUMERALS_PER_LINE):
+        lines.append(f"    {', '.join(dart_literal(n) for n in numerals[i:i + NUMERALS_PER_LINE])},")
+    lines += [
+        '  ];',
+        '',
+        '  /// The /surah list, built once for every language.',
+        '  static final List<Map<String, dynamic>> surahJson = [for (final s in surahs) s.toJson()];',
+        '',
+        '  static SurahInfo surah(int number) => surahs[number - 1];',
+        '',
+        '  static int globalAyah(int surah, int numberInSurah) => firstAyah[surah - 1] + numberInSurah - 1;',
+        '',
+        '  /// (surah, numberInSurah) of a global ayah number, by binary search over firstAyah.',
+        '  static (int, int) surahAyah(int globalNumber) {',
+        '    var lo = 0;',
+        f'    var hi = {SURAH_COUNT - 1};',
+        '    while (lo < hi) {',
+        '      final mid = (lo + hi + 1) >> 1;',
+        '      if (firstAyah[mid] <= globalNumber) {',
+        '        lo = mid;',
+        '      } else {',
+        '        hi = mid - 1;',
+        '      }',
+        '    }',
+        '    return (lo + 1, globalNumber - firstAyah[lo] + 1);',
+        '  }',
+        '',
+        '  /// [n] in Arabic-Indic digits: a table lookup for 0..totalAyahs.',
+        '  static String arabicNumber(int n) =>',
+        "      n >= 0 && n < arabicNumerals.length ? arabicNumerals[n] : toArabicDigits('$n');",
+        '',
+        '  /// Every ASCII digit of [input] in Arabic-Indic digits, in one pass.',
+        '  static String toArabicDigits(String input) => String.fromCharCodes(',
+        '      [for (final c in input.codeUnits) c >= 0x30 && c <= 0x39 ? c + 0x630 : c]);',
+        '}',
+        '',
+    ]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the Dart const tables for surahs, '
+                                                 'ayah offsets and Arabic-Indic numerals.')
+    parser.add_argument('--dumps', nargs='+', help='ar / en.sahih / fr.hamidullah edition dumps')
+    parser.add_argument('--corpus', help=f'corpus to read surah metadata from when no dumps are '
+                                         f'given (default: {DEFAULT_CORPUS}, skipped if missing)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    corpus = args.corpus or DEFAULT_CORPUS
+    missing = [p for p in args.dumps or [args.corpus] if p and not os.path.exists(p)]
+    if missing:
+        raise SystemExit(f"Error: {', '.join(missing)} not found")
+    if not args.dumps and not os.path.exists(corpus):
+        print(f"Skipped {args.output}: no {corpus} (build it with quran_corpus.py build) "
+              f"and no --dumps")
+        return
+    try:
+        if args.dumps:
+            metas, sources = metas_from_dumps(args.dumps), args.dumps
+        else:
+            metas, sources = metas_from_corpus(corpus), [corpus]
+        table = surah_table(metas)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+    dart = render_dart(table, sources)
+    changed = write_if_changed(args.output, dart.encode('utf-8'))
+    french = sum(1 for entry in table if entry['frenchName'] != entry['englishName'])
+    print(f"{'Wrote' if changed else 'Unchanged'} {args.output}: {len(table)} surahs "
+          f"({french} with French names), {len(first_ayahs())} offsets, "
+          f"{len(arabic_numerals())} numerals, {len(dart.encode('utf-8')):,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Render store screenshots for every device profile from one table.
+
+Each profile fits the source to its width and centers it vertically on the
+app background (#0D1B2A), padding or cropping the height. Work is grouped
+by (source, target width): every group decodes its source once, resamples
+it once, and composes all profiles sharing that width (the 6.5" and 5.5"
+iPhones both use 1242 px). Groups run in parallel on a process pool.
+
+    python3 screenshot_renderer.py                      # every profile
+    python3 screenshot_renderer.py --profiles ipad_12.9 ipad_13
+"""
+from PIL import Image
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import stage_trace
+from build_cache import BuildCache
+
+PHONE_SOURCES = [
+    'assets/screenshot_welcome.png',
+    'assets/screenshot_home.png',
+    'assets/screenshot_surah_list.png',
+    'assets/screenshot_settings.png',
+    'assets/screenshot_picker.png',
+]
+
+TABLET_SOURCES = [
+    'assets/tablet_screenshot_welcome.png',
+    'assets/tablet_screenshot_home.png',
+    'assets/tablet_screenshot_surah_list.png',
+    'assets/tablet_screenshot_settings.png',
+    'assets/tablet_screenshot_reader.png',
+]
+
+SOURCES = {
+    'phone': PHONE_SOURCES,
+    'tablet': TABLET_SOURCES,
+}
+
+# Background color #0D1B2A from app theme
+BACKGROUND = (13, 27, 42)
+
+# `output` is formatted with the source basename (minus any "tablet_" prefix)
+DEVICE_PROFILES = {
+    # 6.5 inch (iPhone 11 Pro Max, XS Max, 14 Plus)
+    'iphone_6.5': {'size': (1242, 2688), 'sources': 'phone',
+                   'output': 'ios_screenshots/{name}_iphone_6.5.png'},
+    # 5.5 inch (iPhone 8 Plus)
+    'iphone_5.5': {'size': (1242, 2208), 'sources': 'phone',
+                   'output': 'ios_screenshots/{name}_iphone_5.5.png'},
+    # 6.7 inch (iPhone 14 Pro Max, 15 Plus)
+    'iphone_6.7': {'size': (1290, 2796), 'sources': 'phone',
+                   'output': 'ios_screenshots/{name}_iphone_6.7.png'},
+    # 12.9 inch iPad Pro (2nd/3rd Gen)
+    'ipad_12.9': {'size': (2048, 2732), 'sources': 'tablet',
+                  'output': 'ios_screenshots/{name}_ipad_12.9.png'},
+    # 13 inch iPad Pro (M4)
+    'ipad_13': {'size': (2064, 2752), 'sources': 'tablet',
+                'output': 'ios_screenshots/{name}_ipad_13.png'},
+    # Google Play phone and 10 inch tablet
+    'play_phone': {'size': (1080, 1920), 'sources': 'phone',
+                   'output': 'play_screenshots/{name}_phone.png'},
+    'play_tablet': {'size': (1600, 2560), 'sources': 'tablet',
+                    'output': 'play_screenshots/{name}_tablet.png'},
+}
+
+
+def output_path(profile, src):
+    name = os.path.basename(src).replace('.png', '').replace('tablet_', '')
+    return DEVICE_PROFILES[profile]['output'].format(name=name)
+
+
+def stage_params(profile):
+    return {'stage': 'fit_width', 'size': DEVICE_PROFILES[profile]['size'],
+            'background': BACKGROUND, 'resample': 'LANCZOS'}
+
+
+def fit_width(resized, target_size, background=BACKGROUND):
+    """Center an already width-fitted image vertically on a background canvas."""
+    target_w, target_h = target_size
+    canvas = Image.new('RGB', (target_w, target_h), background)
+    y_offset = (target_h - resized.height) // 2
+    canvas.paste(resized, (0, y_offset))
+    return canvas
+
+
+def resample_to_width(img, width):
+    ratio = width / img.width
+    return img.resize((width, int(img.height * ratio)), Image.Resampling.LANCZOS)
+
+
+def render_group(src, width, profiles):
+    """
+    Worker: decode `src`, resample it to `width` once, and write the canvas
+    for every profile in `profiles`. Returns the paths written.
+    """
+    with stage_trace.span('render_group', source=os.path.basename(src), width=width):
+        resized = resample_to_width(Image.open(src).convert('RGB'), width)
+
+        written = []
+        for profile in profiles:
+            outfile = output_path(profile, src)
+            os.makedirs(os.path.dirname(outfile), exist_ok=True)
+            fit_width(resized, DEVICE_PROFILES[profile]['size']).save(outfile)
+            written.append((profile, outfile))
+        return src, written
+
+
+def plan(profiles, cache):
+    """Group stale (source, profile) pairs by (source, target width)."""
+    groups = {}
+    for profile in profiles:
+        spec = DEVICE_PROFILES[profile]
+        for src in SOURCES[spec['sources']]:
+            if not os.path.exists(src):
+                print(f"Warning: {src} not found")
+                continue
+            if cache.up_to_date([output_path(profile, src)], [src], stage_params(profile)):
+                continue
+            groups.setdefault((src, spec['size'][0]), []).append(profile)
+    return groups
+
+
+def render(profiles=None, workers=None, force=False):
+    profiles = profiles or list(DEVICE_PROFILES)
+    cache = BuildCache(force=force)
+    groups = plan(profiles, cache)
+
+    if not groups:
+        print("All screenshots are up to date.")
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_group, src, width, group_profiles)
+                   for (src, width), group_profiles in groups.items()]
+        for future in futures:
+            src, written = future.result()
+            for profile, outfile in written:
+                cache.record([outfile], [src], stage_params(profile))
+                print(f'Generated {outfile}')
+
+    cache.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render store screenshots for device profiles.')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(DEVICE_PROFILES),
+                        help='profiles to render (default: all)')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache')
+    args = parser.parse_args()
+
+    render(args.profiles, workers=args.workers, force=args.force)
+
+
+if __name__ == '__main__':
+    with stage_trace.session('screenshot_renderer'):
+        main()
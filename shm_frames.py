@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Decoded images handed between pipeline stages through shared memory
+instead of PNG files.
+
+put() copies an image's pixels once into a named shared memory block
+and returns a small, picklable FrameRef. get() in any process on the
+machine maps the block and wraps it as a PIL image without copying
+(for the 1-byte and 4-byte-per-pixel modes: L, LA, RGBA, RGBX, ...; RGB
+is padded to 4 bytes per pixel by PIL and so is copied once). The
+process that runs the pipeline owns every block and release()s it at
+the end; workers only create and map.
+
+load() and save() accept either a path or a frame, so a stage function
+is written once and the scheduler decides whether an intermediate goes
+through a PNG file or shared memory (asset_graph.py, handoff='shm').
+STATS counts the encode/decode time and bytes of whichever route is
+taken, per process, for bench_handoff.py.
+"""
+from PIL import Image
+import hashlib
+import os
+import time
+from collections import Counter, namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# digest: SHA-256 of mode, size and pixels, so downstream cache keys
+# don't depend on how the frame was handed over
+FrameRef = namedtuple('FrameRef', 'name mode size digest')
+
+# Output placeholder: a stage saving to one gets a FrameRef back in OUTPUTS
+FrameSlot = namedtuple('FrameSlot', 'index')
+
+ZERO_COPY_MODES = ('L', 'LA', 'RGBA', 'RGBX', 'CMYK', 'I', 'F')
+
+STATS = Counter()
+OUTPUTS = {}
+_attached = {}
+
+
+def _untrack(block):
+    # Ownership passes to the pipeline process; without this the worker's
+    # resource tracker would unlink the block when the worker exits
+    resource_tracker.unregister(block._name, 'shared_memory')
+
+
+def frame_digest(img):
+    h = hashlib.sha256(f'{img.mode}:{img.width}x{img.height}:'.encode('ascii'))
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def put(img):
+    """Copy `img` into a new shared memory block and return its FrameRef."""
+    start = time.perf_counter()
+    data = img.tobytes()
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    _untrack(block)
+    block.buf[:len(data)] = data
+    ref = FrameRef(block.name, img.mode, img.size, frame_digest(img))
+    block.close()
+    STATS['shm_put_seconds'] += time.perf_counter() - start
+    STATS['shm_bytes'] += len(data)
+    STATS['shm_frames'] += 1
+    return ref
+
+
+def _map(ref):
+    block = _attached.get(ref.name)
+    if block is None:
+        block = shared_memory.SharedMemory(name=ref.name)
+        _untrack(block)
+        _attached[ref.name] = block
+    return block
+
+
+def get(ref):
+    """A PIL image over the frame's shared memory; read-only by convention."""
+    start = time.perf_counter()
+    block = _map(ref)
+    if ref.mode in ZERO_COPY_MODES:
+        img = Image.frombuffer(ref.mode, ref.size, block.buf, 'raw', ref.mode, 0, 1)
+    else:
+        length = len(Image.new(ref.mode, (1, 1)).tobytes()) * ref.size[0] * ref.size[1]
+        img = Image.frombytes(ref.mode, ref.size, bytes(block.buf[:length]))
+    STATS['shm_get_seconds'] += time.perf_counter() - start
+    STATS['shm_maps'] += 1
+    return img
+
+
+def view(ref):
+    """The frame as a read-only (H, W, bands) uint8 array over the shared memory."""
+    block = _map(ref)
+    width, height = ref.size
+    bands = Image.getmodebands(ref.mode)
+    array = np.ndarray((height, width, bands), dtype=np.uint8, buffer=block.buf)
+    array.flags.writeable = False
+    STATS['shm_maps'] += 1
+    return array
+
+
+def rgba(source):
+    """`source` as an RGBA image, without a copy when it already is one."""
+    img = load(source)
+    return img if img.mode == 'RGBA' else img.convert('RGBA')
+
+
+def rgba_array(source):
+    """`source` as an (H, W, 4) uint8 array; a zero-copy view for RGBA frames."""
+    if isinstance(source, FrameRef) and source.mode == 'RGBA':
+        return view(source)
+    return np.asarray(rgba(source))
+
+
+def detach():
+    """Unmap every frame this process mapped (once no image uses them)."""
+    for name, block in list(_attached.items()):
+        try:
+            block.close()
+        except BufferError:
+            continue
+        del _attached[name]
+
+
+def release(ref):
+    """Free a frame's shared memory; only the owning pipeline process calls this."""
+    try:
+        block = shared_memory.SharedMemory(name=ref.name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()  # also drops the tracker registration attaching made
+
+
+def load(source):
+    """Image from a path (decoded now) or a FrameRef (mapped)."""
+    if isinstance(source, FrameRef):
+        return get(source)
+    start = time.perf_counter()
+    img = Image.open(source)
+    img.load()
+    STATS['png_decode_seconds'] += time.perf_counter() - start
+    STATS['png_decode_bytes'] += os.path.getsize(source)
+    STATS['png_decodes'] += 1
+    return img
+
+
+def save(img, target):
+    """Write `img` to a path as PNG, or into shared memory for a FrameSlot."""
+    if isinstance(target, FrameSlot):
+        OUTPUTS[target.index] = put(img)
+        return
+    start = time.perf_counter()
+    img.save(target)
+    STATS['png_encode_seconds'] += time.perf_counter() - start
+    STATS['png_encode_bytes'] += os.path.getsize(target)
+    STATS['png_encodes'] += 1
@@ -1,4 +1,64 @@
+#!/usr/bin/env python3
+"""
+Compile every release_notes_v*.txt into the fastlane metadata trees.
+
+All notes files are read in one pass into a version x locale index, then:
+  - android/fastlane/metadata/android/<lang>/changelogs/<code>.txt is
+    emitted for every version with a known version code
+  - ios/fastlane/metadata/<lang>/release_notes.txt is emitted for the
+    current pubspec.yaml version
+  - every note is checked against the store character limits
+A file is only written when its content differs from what is on disk, so
+mtimes stay stable and fastlane only sees real changes.
+
+The notes files have used several layouts over time; all of them are
+understood: `en-US` / `en-US:` / `<en-US>` / `[EN]` / `English` /
+`العربية (Arabic)` locale headers, `--- Google Play ... ---` and
+`--- App Store ... ---` store sections, and single-language files with
+no header at all (taken as en-US).
+
+    python3 split_release_notes.py              # compile and write
+    python3 split_release_notes.py --dry-run --strict
+"""
+import argparse
 import os
+import re
+import sys
+
+import stage_trace
+from common_io import write_if_changed
+
+ANDROID_DIR = "android/fastlane/metadata/android"
+IOS_DIR = "ios/fastlane/metadata"
+
+DEFAULT_LOCALE = 'en-US'
+
+# Header spellings seen in the notes files -> fastlane folder name
+LOCALE_ALIASES = {
+    'en-us': 'en-US', 'en': 'en-US', 'english': 'en-US',
+    'en-gb': 'en-GB',
+    'ar-sa': 'ar-SA', 'ar': 'ar-SA', 'arabic': 'ar-SA', 'العربية': 'ar-SA',
+    'fr-fr': 'fr-FR', 'fr': 'fr-FR', 'french': 'fr-FR', 'français': 'fr-FR',
+}
+
+# Version codes of releases made before the notes files were compiled in
+# bulk. The current version's code always comes from pubspec.yaml.
+VERSION_CODES = {
+    '1.0.6': '10',
+    '1.0.7': '11',
+}
+
+# Store character limits; a `(Max N chars)` store header overrides these
+PLAY = 'play'
+APP_STORE = 'app_store'
+CHAR_LIMITS = {PLAY: 500, APP_STORE: 4000}
+
+NOTES_FILE = re.compile(r'^release_notes_v(\d+(?:\.\d+)*)\.txt$', re.IGNORECASE)
+STORE_HEADER = re.compile(r'^-{2,}\s*(google play|app store)\b(.*?)-*$', re.IGNORECASE)
+MAX_CHARS = re.compile(r'max\s+(\d+)\s+chars', re.IGNORECASE)
+CLOSING_TAG = re.compile(r'^</[^>]+>$')
+DECORATION = re.compile(r'^[-=_*#~]{3,}$')
+
 
 def get_version_info():
     """Extracts version name and code from pubspec.yaml"""
@@ -18,94 +78,196 @@ def get_version_info():
         return None, None
     return None, None
 
-def split_release_notes():
+
+def version_key(version):
+    return tuple(int(part) for part in version.split('.'))
+
+
+def find_notes_files(directory='.'):
+    """{version: path} for every release_notes_v*.txt, any capitalization."""
+    found = {}
+    for name in sorted(os.listdir(directory)):
+        match = NOTES_FILE.match(name)
+        if match:
+            found[match.group(1)] = os.path.join(directory, name)
+    return found
+
+
+def parse_locale(line):
+    """Fastlane locale named by a header line, or None if it is not a header."""
+    name = line.strip().strip('<>[]').rstrip(':').strip().lower()
+    if not name or len(name) > 40:
+        return None
+    if name in LOCALE_ALIASES:
+        return LOCALE_ALIASES[name]
+    # "العربية (Arabic)", "Français (French)"
+    outer, _, inner = name.partition('(')
+    for candidate in (outer.strip(), inner.rstrip(')').strip()):
+        if candidate in LOCALE_ALIASES:
+            return LOCALE_ALIASES[candidate]
+    return None
+
+
+def is_title(line, version):
+    """Preamble lines like "Ayaat Version 1.1.2" or "Release Notes:"."""
+    return version in line or line.lower().rstrip(':') == 'release notes'
+
+
+def parse_notes(lines, version):
+    """
+    Stream the lines of one notes file. Yields (locale, store, text, limit)
+    where store is PLAY, APP_STORE or None for notes meant for both.
+    """
+    store, limit = None, None
+    locale, body = None, []
+    seen_header = False
+
+    def flush():
+        if body:
+            yield locale or DEFAULT_LOCALE, store, '\n'.join(body), limit
+
+    for raw in lines:
+        line = raw.strip()
+        if not line or CLOSING_TAG.match(line):
+            continue
+
+        store_match = STORE_HEADER.match(line)
+        if store_match:
+            yield from flush()
+            locale, body = None, []
+            store = PLAY if store_match.group(1).lower() == 'google play' else APP_STORE
+            max_match = MAX_CHARS.search(store_match.group(2))
+            limit = int(max_match.group(1)) if max_match else None
+            continue
+        if DECORATION.match(line):
+            continue
+
+        header = parse_locale(line)
+        if header:
+            yield from flush()
+            locale, body = header, []
+            seen_header = True
+            continue
+
+        if not body and not seen_header and is_title(line, version):
+            continue
+        body.append(line)
+
+    yield from flush()
+
+
+def build_index(files):
+    """{version: {locale: {store: (text, limit)}}} from {version: path}."""
+    index = {}
+    for version, path in files.items():
+        stage_trace.count(read=os.path.getsize(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            for locale, store, text, limit in parse_notes(f, version):
+                index.setdefault(version, {}).setdefault(locale, {})[store] = (text, limit)
+    return index
+
+
+def note_for(variants, store):
+    """The store-specific note if there is one, else the shared one."""
+    return variants.get(store) or variants.get(None) or next(iter(variants.values()))
+
+
+def check_limits(index):
+    """Return (version, locale, store, length, limit) for every over-long note."""
+    problems = []
+    for version in sorted(index, key=version_key):
+        for locale, variants in sorted(index[version].items()):
+            for store in (PLAY, APP_STORE):
+                text, limit = note_for(variants, store)
+                if variants.get(store) is None or limit is None:
+                    limit = CHAR_LIMITS[store]
+                if len(text) > limit:
+                    problems.append((version, locale, store, len(text), limit))
+    return problems
+
+
+def plan_outputs(index, codes, current_version):
+    """(path, text) for every Android changelog and the current iOS notes."""
+    outputs = []
+    for version in sorted(index, key=version_key):
+        code = codes.get(version)
+        if code is None:
+            continue
+        for locale, variants in sorted(index[version].items()):
+            # Fastlane structure: android/fastlane/metadata/android/[lang]/changelogs/[version_code].txt
+            path = os.path.join(ANDROID_DIR, locale, 'changelogs', f'{code}.txt')
+            outputs.append((path, note_for(variants, PLAY)[0]))
+
+    for locale, variants in sorted(index.get(current_version, {}).items()):
+        # Fastlane structure: ios/fastlane/metadata/[lang]/release_notes.txt
+        path = os.path.join(IOS_DIR, locale, 'release_notes.txt')
+        outputs.append((path, note_for(variants, APP_STORE)[0]))
+    return outputs
+
+
+def split_release_notes(directory='.', dry_run=False, extra_codes=None):
+    """Compile all notes files; return the list of over-limit notes."""
     version_name, version_code = get_version_info()
-    
     if not version_name:
         print("Error: Could not determine version from pubspec.yaml")
-        return
-
-    input_file = f"release_notes_v{version_name}.txt"
-    
-    if not os.path.exists(input_file):
-        print(f"Error: Release notes file '{input_file}' not found.")
-        print(f"Please create {input_file} before running this script.")
-        # Fallback to play store notes if specific version not found?
-        # No, better to fail loud so we know something is wrong.
-        return
-
-    print(f"Processing release notes for version {version_name} (Code: {version_code}) from {input_file}...")
-
-    with open(input_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Split by language headers
-    # release_notes_v1.0.7.txt format is:
-    # en-US
-    # Notes...
-    #
-    # ar-SA
-    # Notes...
-    
-    sections = content.split('\n\n')
-    current_lang = None
-    note_content = []
-
-    # Map language codes to Android Fastlane folder names if needed
-    # Default matching is usually fine (en-US, ar-SA, fr-FR)
-
-    base_dir = "android/fastlane/metadata/android"
-    
-    # Use version code for Android changelogs if available, otherwise just print warning
-    if not version_code:
+        return []
+
+    codes = dict(VERSION_CODES)
+    if version_code:
+        codes[version_name] = version_code
+    else:
         print("Warning: No version code found. Android changelogs require a version code.")
-        version_code = "1" # Fallback
-
-    lines = content.splitlines()
-    for i, line in enumerate(lines):
-        line = line.strip()
-        
-        # Check if line is a language code
-        if line in ['en-US', 'ar-SA', 'fr-FR', 'en-GB']:
-            # Save previous language if exists
-            if current_lang and note_content:
-                save_note(base_dir, current_lang, version_code, '\n'.join(note_content))
-                save_ios_note(current_lang, '\n'.join(note_content)) # Save IOS too
-            
-            current_lang = line
-            note_content = []
-        elif line:
-            # Append non-empty lines to content
-            note_content.append(line)
-            
-    # Save last one
-    if current_lang and note_content:
-        full_text = '\n'.join(note_content)
-        save_note(base_dir, current_lang, version_code, full_text)
-        save_ios_note(current_lang, full_text)
-
-def save_note(base_dir, lang, version, text):
-    # Fastlane structure: android/fastlane/metadata/android/[lang]/changelogs/[version_code].txt
-    path = os.path.join(base_dir, lang, 'changelogs')
-    os.makedirs(path, exist_ok=True)
-    
-    file_path = os.path.join(path, f"{version}.txt")
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(text)
-    print(f"Created Android note for {lang}: {file_path}")
-
-def save_ios_note(lang, text):
-    # Fastlane structure: ios/fastlane/metadata/[lang]/release_notes.txt
-    # Map Android lang codes to iOS if needed (usually similar)
-    ios_base_dir = "ios/fastlane/metadata"
-    path = os.path.join(ios_base_dir, lang)
-    os.makedirs(path, exist_ok=True)
-    
-    file_path = os.path.join(path, "release_notes.txt")
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(text)
-    print(f"Created iOS note for {lang}: {file_path}")
+    codes.update(extra_codes or {})
+
+    with stage_trace.span('index notes'):
+        index = build_index(find_notes_files(directory))
+    if version_name not in index:
+        print(f"Error: Release notes file 'release_notes_v{version_name}.txt' not found.")
+        print("Please create it before running this script; iOS notes are left unchanged.")
+
+    print(f"Indexed {len(index)} versions; current is {version_name} (Code: {version_code})")
+    for version in sorted(index, key=version_key):
+        if version not in codes:
+            print(f"  {version}: no version code, Android changelog skipped")
+
+    written = unchanged = 0
+    with stage_trace.span('write outputs', dry_run=dry_run):
+        for path, text in plan_outputs(index, codes, version_name):
+            if write_if_changed(path, text, dry_run):
+                written += 1
+                print(f"{'Would update' if dry_run else 'Updated'} {path}")
+            else:
+                unchanged += 1
+    print(f"{written} written, {unchanged} unchanged")
+
+    with stage_trace.span('check limits'):
+        problems = check_limits(index)
+    for version, locale, store, length, limit in problems:
+        print(f"Over limit: v{version} {locale} {store}: {length} chars (max {limit})")
+    return problems
 
-if __name__ == "__main__":
-    split_release_notes()
 
+def parse_codes(items):
+    codes = {}
+    for item in items or []:
+        version, _, code = item.partition('=')
+        codes[version] = code
+    return codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile release notes into fastlane metadata.')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing files')
+    parser.add_argument('--strict', action='store_true', help='exit 1 when a note exceeds a store limit')
+    parser.add_argument('--code', action='append', metavar='VERSION=CODE',
+                        help='version code for an older release (repeatable)')
+    args = parser.parse_args()
+
+    problems = split_release_notes(dry_run=args.dry_run, extra_codes=parse_codes(args.code))
+    if problems and args.strict:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with stage_trace.session('split_release_notes'):
+        main()
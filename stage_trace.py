@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Per-stage tracing for the asset and release tools. Each stage records
+wall time, CPU time, pixels processed, bytes read and written, and peak
+RSS. A run writes a Chrome trace (open it in chrome://tracing or
+ui.perfetto.dev) and prints a summary table.
+
+Tracing is off unless AYAAT_TRACE names the trace file, or a tool's
+--trace flag sets it. When it is off, span() returns one shared no-op
+context manager and count() returns at once, so the calls can stay in
+per-image code.
+
+    AYAAT_TRACE=trace.json python3 generate_icon.py
+    python3 ayaat_assets.py --trace trace.json all
+    python3 stage_trace.py trace.json            # summary of a saved trace
+
+When tracing is on, PIL is hooked so every decode (ImageFile.load),
+encode (Image.save) and resize is a span of its own, with its pixels
+and file bytes. A span's counters include the counters of the spans
+inside it. Pool workers inherit AYAAT_TRACE and append their spans to
+<trace>.events, which the session merges, so each worker shows as its
+own row. Peak RSS is the process's high-water mark (ru_maxrss) when the
+span ends.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENV = 'AYAAT_TRACE'
+
+_path = None
+_stack = []
+_fd = None
+_hooked = False
+_NULL = contextlib.nullcontext()
+
+
+def enabled():
+    return _path is not None
+
+
+def enable(path):
+    """Trace to `path` from now on, in this process and the workers it starts."""
+    global _path
+    _path = os.path.abspath(path)
+    os.environ[ENV] = _path
+    _hook_pil()
+
+
+def _peak_rss():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _emit(event):
+    global _fd
+    if _fd is None:
+        _fd = os.open(_path + '.events', os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    os.write(_fd, (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+class _Span:
+    __slots__ = ('name', 'cat', 'args', 'start', 'cpu', 'children', 'children_cpu', 'pixels', 'read',
+                 'written')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.children = self.children_cpu = self.pixels = self.read = self.written = 0
+
+    def __enter__(self):
+        _stack.append(self)
+        self.cpu = time.process_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter_ns() - self.start
+        cpu = time.process_time_ns() - self.cpu
+        _stack.pop()
+        if _stack:
+            parent = _stack[-1]
+            parent.children += duration
+            parent.children_cpu += cpu
+            parent.pixels += self.pixels
+            parent.read += self.read
+            parent.written += self.written
+        _emit({'name': self.name, 'cat': self.cat, 'ph': 'X', 'ts': self.start / 1000,
+               'dur': duration / 1000, 'pid': os.getpid(), 'tid': threading.get_native_id(),
+               'args': dict(self.args, cpu_ms=cpu / 1e6, self_ms=(duration - self.children) / 1e6,
+                            self_cpu_ms=(cpu - self.children_cpu) / 1e6, pixels=self.pixels, bytes_read=self.read, bytes_written=self.written,
+                            peak_rss=_peak_rss())})
+        return False
+
+
+def span(name, cat='stage', **args):
+    """Context manager timing one stage; `args` are shown with it in the trace."""
+    if _path is None:
+        return _NULL
+    return _Span(name, cat, args)
+
+
+def count(pixels=0, read=0, written=0):
+    """Add work done to the innermost open span."""
+    if _stack:
+        current = _stack[-1]
+        current.pixels += pixels
+        current.read += read
+        current.written += written
+
+
+def _reset_after_fork():
+    # A forked worker starts with no open spans of its own and its own descriptor
+    global _fd
+    _stack.clear()
+    _fd = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# --- PIL hooks ----------------------------------------------------------------
+
+def _file_size(fp):
+    try:
+        return os.path.getsize(fp)
+    except (TypeError, OSError):
+        return 0
+
+
+def _hook_pil():
+    global _hooked
+    if _hooked:
+        return
+    try:
+        from PIL import Image, ImageFile
+    except ImportError:
+        return
+    _hooked = True
+    load, save, resize = ImageFile.ImageFile.load, Image.Image.save, Image.Image.resize
+
+    def traced_load(self):
+        if not self.tile:  # already decoded; load() is called on every pixel access
+            return load(self)
+        filename = getattr(self, 'filename', '')
+        with span('decode', 'pil', file=os.path.basename(filename), format=self.format):
+            count(pixels=self.width * self.height, read=_file_size(filename))
+            return load(self)
+
+    def traced_save(self, fp, format=None, **params):
+        path = isinstance(fp, (str, os.PathLike))
+        name = os.path.basename(os.fspath(fp)) if path else type(fp).__name__
+        with span('encode', 'pil', file=name, format=format or os.path.splitext(name)[1][1:]):
+            start = 0 if path else fp.tell()
+            result = save(self, fp, format, **params)
+            written = _file_size(fp) if path else fp.tell() - start
+            count(pixels=self.width * self.height, written=written)
+            return result
+
+    def traced_resize(self, size, resample=None, *args, **kwargs):
+        method = getattr(resample, 'name', resample)
+        with span('resize', 'pil', resample=method, size=f'{size[0]}x{size[1]}'):
+            count(pixels=size[0] * size[1])
+            return resize(self, size, resample, *args, **kwargs)
+
+    ImageFile.ImageFile.load = traced_load
+    Image.Image.save = traced_save
+    Image.Image.resize = traced_resize
+
+
+# --- sessions -----------------------------------------------------------------
+
+def read_events(path):
+    """Events appended to <path>.events by every traced process."""
+    try:
+        with open(path + '.events', 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def summarize(events):
+    """
+    Rows of (cat, name, calls, wall ms, self ms, cpu ms, self cpu ms,
+    pixels, bytes read, bytes written, peak RSS), most self CPU first.
+    """
+    rows = {}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        args = event['args']
+        row = rows.setdefault((event['cat'], event['name']), [0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0])
+        row[0] += 1
+        row[1] += event['dur'] / 1000
+        row[2] += args['self_ms']
+        row[3] += args['cpu_ms']
+        row[4] += args['self_cpu_ms']
+        row[5] += args['pixels']
+        row[6] += args['bytes_read']
+        row[7] += args['bytes_written']
+        row[8] = max(row[8], args['peak_rss'])
+    return sorted(((cat, name, *row) for (cat, name), row in rows.items()), key=lambda r: -r[6])
+
+
+def print_summary(events):
+    rows = summarize(events)
+    processes = len({event['pid'] for event in events})
+    print(f"\n{'stage':<40} {'calls':>5} {'wall':>9} {'self':>9} {'cpu':>9} {'self cpu':>9} "
+          f"{'Mpixels':>8} {'read':>9} {'written':>9} {'peak RSS':>9}")
+    for cat, name, calls, wall, own, cpu, own_cpu, pixels, read, written, peak in rows:
+        label = name if cat == 'stage' else f'{cat}:{name}'
+        print(f"{label[:40]:<40} {calls:>5} {wall:>7.0f}ms {own:>7.0f}ms {cpu:>7.0f}ms {own_cpu:>7.0f}ms "
+              f"{pixels / 1e6:>8.1f} {read / 1e6:>7.2f}MB {written / 1e6:>7.2f}MB {peak / 1e6:>7.0f}MB")
+    print(f"{len(events)} spans from {processes} process{'es' if processes != 1 else ''}; "
+          f"wall and cpu include nested spans, self does not (a span waiting on pool "
+          f"workers has self wall but little self cpu)")
+
+
+@contextlib.contextmanager
+def session(name, path=None):
+    """
+    Trace a whole tool run, then write the Chrome trace and print the
+    summary. `path` defaults to $AYAAT_TRACE; with neither, or inside
+    another session, this is a plain span.
+    """
+    path = path or os.environ.get(ENV)
+    if not path or _stack:
+        with span(name, 'tool'):
+            yield
+        return
+    enable(path)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_path + '.events')
+    try:
+        with span(name, 'tool'):
+            yield
+    finally:
+        global _fd
+        if _fd is not None:
+            os.close(_fd)
+            _fd = None
+        events = read_events(_path)
+        with open(_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        os.remove(_path + '.events')
+        print_summary(events)
+        print(f"Trace written to {_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a saved stage trace.')
+    parser.add_argument('trace', help='Chrome trace JSON written by a traced tool')
+    args = parser.parse_args()
+    with open(args.trace, 'r', encoding='utf-8') as f:
+        print_summary(json.load(f)['traceEvents'])
+
+
+if os.environ.get(ENV) and _path is None:
+    enable(os.environ[ENV])
+
+if __name__ == '__main__':
+    main()
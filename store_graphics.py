@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Compose localized store graphics from templates: the Play feature graphic
+(1024x500) and a captioned frame of every store screenshot, for each
+locale in store_graphics.json and each device profile.
+
+    feature                 android/fastlane/metadata/android/<locale>/images/featureGraphic.png
+    play_phone, play_tablet ...android/<locale>/images/{phone,tenInch}Screenshots/<n>_<name>.png
+    iPhone and iPad         ios/fastlane/screenshots/<locale>/<n>_<name>_<profile>.png
+
+Captions are wrapped (and shrunk to fit two lines) and drawn from shaped,
+rasterized runs cached by (font, size, text) -- icon_text.text_run, the
+cache the launcher icon renderer uses -- so each caption is shaped once
+per pixel size, and profiles sharing a width (the 6.5" and 5.5"
+iPhones) share every run. Arabic is shaped and laid out right to left
+by Pillow's libraqm layout; without it the captions come out unjoined,
+and a warning is printed.
+
+Every locale x profile pair is one job on a process pool. Outputs are
+tracked in the build cache by source, font, caption and layout, so
+adding a locale or a device, or editing one caption, only renders the
+images that change.
+
+    python3 store_graphics.py
+    python3 store_graphics.py --locales ar-SA --profiles feature play_phone
+    python3 store_graphics.py --force --workers 4
+"""
+from PIL import Image, ImageDraw, features
+import argparse
+import functools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import stage_trace
+from build_cache import BuildCache
+from icon_text import FONT_PATHS, GOLDEN_COLOR, find_font, load_font, text_run
+from screenshot_renderer import BACKGROUND, DEVICE_PROFILES, SOURCES
+from split_release_notes import ANDROID_DIR
+
+TEMPLATES_PATH = 'store_graphics.json'
+SOURCE_ICON = 'assets/icon.png'
+IOS_SCREENSHOTS = 'ios/fastlane/screenshots'
+PLAY_FOLDERS = {'play_phone': 'phoneScreenshots', 'play_tablet': 'tenInchScreenshots'}
+FEATURE = 'feature'
+
+LATIN_FONT_PATHS = [
+    '/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+]
+RTL_LANGUAGES = ('ar', 'fa', 'he', 'ur')
+
+TEXT_COLOR = (240, 240, 240)
+
+# Proportions of the canvas; recorded in the build cache with each output
+SCREENSHOT_LAYOUT = {
+    'caption_band': 0.2,     # share of the height above the screen
+    'caption_size': 0.06,    # font size as a share of the width
+    'margin': 0.06,          # side margin as a share of the width
+    'screen_width': 0.84,
+    'max_lines': 2,
+}
+FEATURE_LAYOUT = {
+    'size': (1024, 500),
+    'icon': 300,
+    'icon_radius': 0.2,
+    'margin': 70,
+    'title_size': 110,
+    'tagline_size': 40,
+    'gap': 24,
+}
+LINE_SPACING = 1.15
+MIN_FONT_SIZE = 12
+
+
+def load_templates(path=TEMPLATES_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_rtl(locale):
+    return locale.split('-')[0].lower() in RTL_LANGUAGES
+
+
+def locale_font(locale):
+    return find_font(FONT_PATHS if is_rtl(locale) else LATIN_FONT_PATHS)
+
+
+def source_name(src):
+    """'assets/tablet_screenshot_home.png' -> 'home', the caption key."""
+    return os.path.basename(src).replace('.png', '').replace('tablet_', '').replace('screenshot_', '')
+
+
+def output_path(locale, profile, src=None, index=0):
+    if profile == FEATURE:
+        return f'{ANDROID_DIR}/{locale}/images/featureGraphic.png'
+    if profile in PLAY_FOLDERS:
+        return f'{ANDROID_DIR}/{locale}/images/{PLAY_FOLDERS[profile]}/{index}_{source_name(src)}.png'
+    return f'{IOS_SCREENSHOTS}/{locale}/{index}_{source_name(src)}_{profile}.png'
+
+
+@functools.lru_cache(maxsize=None)
+def run_width(font_path, size, text):
+    """Advance width of `text`; shaped but not rasterized, for line wrapping."""
+    return load_font(font_path, size).getlength(text)
+
+
+def wrap(font_path, size, text, max_width):
+    lines, line = [], ''
+    for word in text.split():
+        candidate = f'{line} {word}' if line else word
+        if line and run_width(font_path, size, candidate) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + [line] if line else lines
+
+
+def fit_text(font_path, text, max_width, size, max_lines):
+    """(font size, lines): `size`, shrunk 10% at a time until `text` fits."""
+    while True:
+        lines = wrap(font_path, size, text, max_width)
+        fits = len(lines) <= max_lines and all(run_width(font_path, size, line) <= max_width
+                                               for line in lines)
+        if fits or size <= MIN_FONT_SIZE:
+            return size, lines
+        size = max(MIN_FONT_SIZE, int(size * 0.9))
+
+
+def line_height(font_path, size):
+    ascent, descent = load_font(font_path, size).getmetrics()
+    return round((ascent + descent) * LINE_SPACING)
+
+
+def draw_lines(canvas, font_path, size, lines, left, top, width, color, align='center'):
+    """Paste the cached run of each line; returns the y below the last one."""
+    step = line_height(font_path, size)
+    for line in lines:
+        mask, bbox = text_run(font_path, size, line)
+        ink = bbox[2] - bbox[0]
+        if align == 'center':
+            x = left + (width - ink) // 2
+        elif align == 'right':
+            x = left + width - ink
+        else:
+            x = left
+        canvas.paste(color, (x, top + bbox[1]), mask)
+        top += step
+    return top
+
+
+@functools.lru_cache(maxsize=16)
+def fitted_screen(src, box):
+    """`src` scaled to fit `box` (w, h); cached for the other locales of a profile."""
+    img = Image.open(src).convert('RGB')
+    scale = min(box[0] / img.width, box[1] / img.height)
+    return img.resize((round(img.width * scale), round(img.height * scale)),
+                      Image.Resampling.LANCZOS)
+
+
+def compose_screenshot(src, size, font_path, caption, layout=SCREENSHOT_LAYOUT):
+    width, height = size
+    canvas = Image.new('RGB', size, BACKGROUND)
+    band = int(height * layout['caption_band'])
+    margin = int(width * layout['margin'])
+
+    font_size, lines = fit_text(font_path, caption, width - 2 * margin,
+                                round(width * layout['caption_size']), layout['max_lines'])
+    text_height = line_height(font_path, font_size) * len(lines)
+    draw_lines(canvas, font_path, font_size, lines, margin, (band - text_height) // 2,
+               width - 2 * margin, GOLDEN_COLOR[:3])
+
+    screen = fitted_screen(src, (int(width * layout['screen_width']), height - band - margin))
+    canvas.paste(screen, ((width - screen.width) // 2, band))
+    return canvas
+
+
+@functools.lru_cache(maxsize=None)
+def rounded_icon(icon_path, size, radius):
+    icon = Image.open(icon_path).convert('RGBA').resize((size, size), Image.Resampling.LANCZOS)
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, size - 1, size - 1), round(size * radius), fill=255)
+    return icon, mask
+
+
+def compose_feature(icon_path, font_path, title, tagline, rtl, layout=FEATURE_LAYOUT):
+    width, height = layout['size']
+    margin, icon_size = layout['margin'], layout['icon']
+    canvas = Image.new('RGB', (width, height), BACKGROUND)
+
+    # The icon leads the text: on the left, or on the right for RTL locales
+    icon, mask = rounded_icon(icon_path, icon_size, layout['icon_radius'])
+    icon_x = width - margin - icon_size if rtl else margin
+    canvas.paste(icon, (icon_x, (height - icon_size) // 2), mask)
+
+    text_left = margin if rtl else 2 * margin + icon_size
+    text_width = width - 3 * margin - icon_size
+    title_size, title_lines = fit_text(font_path, title, text_width, layout['title_size'], 1)
+    tag_size, tag_lines = fit_text(font_path, tagline, text_width, layout['tagline_size'], 2)
+    block = (line_height(font_path, title_size) * len(title_lines) + layout['gap']
+             + line_height(font_path, tag_size) * len(tag_lines))
+
+    align = 'right' if rtl else 'left'
+    y = draw_lines(canvas, font_path, title_size, title_lines, text_left, (height - block) // 2,
+                   text_width, GOLDEN_COLOR[:3], align)
+    draw_lines(canvas, font_path, tag_size, tag_lines, text_left, y + layout['gap'],
+               text_width, TEXT_COLOR, align)
+    return canvas
+
+
+def select(templates, locales=None, profiles=None):
+    """Validated (locales, profiles), defaulting to every one."""
+    locales = locales or list(templates)
+    profiles = profiles or [FEATURE] + list(DEVICE_PROFILES)
+    unknown = [locale for locale in locales if locale not in templates]
+    unknown += [profile for profile in profiles if profile != FEATURE and profile not in DEVICE_PROFILES]
+    if unknown:
+        raise SystemExit(f"Unknown locales or profiles: {', '.join(unknown)}")
+    return locales, profiles
+
+
+def plan(templates, locales, profiles, cache=None):
+    """
+    Outputs grouped into jobs: {(locale, profile): [(path, inputs, params,
+    text)]}, profile-major so one worker tends to get every locale of a
+    profile (and its decoded sources). With a `cache`, only stale ones.
+    """
+    jobs = {}
+    for profile in profiles:
+        for locale in locales:
+            font = locale_font(locale)
+            fonts = [font] if font else []
+            template = templates[locale]
+            if profile == FEATURE:
+                text = (template['feature']['title'], template['feature']['tagline'])
+                items = [(output_path(locale, FEATURE), [SOURCE_ICON] + fonts,
+                          {'stage': 'store_graphics', 'text': text, 'rtl': is_rtl(locale),
+                           'layout': FEATURE_LAYOUT}, text)]
+            else:
+                size = DEVICE_PROFILES[profile]['size']
+                items = []
+                for index, src in enumerate(SOURCES[DEVICE_PROFILES[profile]['sources']], 1):
+                    caption = template['captions'].get(source_name(src))
+                    if not os.path.exists(src):
+                        print(f"Warning: {src} not found")
+                        continue
+                    if caption is None:
+                        print(f"Warning: no {locale} caption for {source_name(src)}")
+                        continue
+                    items.append((output_path(locale, profile, src, index), [src] + fonts,
+                                  {'stage': 'store_graphics', 'size': size, 'caption': caption,
+                                   'layout': SCREENSHOT_LAYOUT}, caption))
+            stale = [item for item in items
+                     if cache is None or not cache.up_to_date([item[0]], item[1], item[2])]
+            if stale:
+                jobs[(locale, profile)] = stale
+    return jobs
+
+
+def render_job(job):
+    """
+    Worker: compose every output of one (locale, profile). Returns the
+    job, the paths written and this job's text run cache (hits, misses).
+    """
+    (locale, profile), items = job
+    font = locale_font(locale)
+    before = text_run.cache_info()
+    written = []
+    for path, inputs, params, text in items:
+        with stage_trace.span('compose', locale=locale, profile=profile,
+                              source=os.path.basename(inputs[0])):
+            if profile == FEATURE:
+                img = compose_feature(inputs[0], font, text[0], text[1], is_rtl(locale))
+            else:
+                img = compose_screenshot(inputs[0], DEVICE_PROFILES[profile]['size'], font, text)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            img.save(path)
+        written.append(path)
+    after = text_run.cache_info()
+    return job, written, (after.hits - before.hits, after.misses - before.misses)
+
+
+def compose(locales=None, profiles=None, workers=None, force=False, templates_path=TEMPLATES_PATH):
+    templates = load_templates(templates_path)
+    locales, profiles = select(templates, locales, profiles)
+    if any(is_rtl(locale) for locale in locales) and not features.check('raqm'):
+        print("Warning: Pillow was built without libraqm; RTL captions will not be shaped")
+
+    cache = BuildCache(force=force)
+    jobs = plan(templates, locales, profiles, cache)
+    if not jobs:
+        print("All store graphics are up to date.")
+        return
+
+    start = time.perf_counter()
+    count, hits, misses = 0, 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ((locale, profile), items), written, (job_hits, job_misses) in pool.map(
+                render_job, jobs.items(), chunksize=max(1, len(locales))):
+            for path, inputs, params, _ in items:
+                cache.record([path], inputs, params)
+            for path in written:
+                print(f"Generated {path}")
+            count += len(written)
+            hits += job_hits
+            misses += job_misses
+    cache.save()
+
+    seconds = time.perf_counter() - start
+    print(f"\n{count} images for {len(jobs)} locale x profile jobs in {seconds:.2f}s; "
+          f"caption runs: {misses} shaped, {hits} reused")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compose localized feature graphics and captioned screenshots.')
+    parser.add_argument('--locales', nargs='+', help='locales from store_graphics.json (default: all)')
+    parser.add_argument('--profiles', nargs='+', help=f'{FEATURE} and/or device profiles (default: all)')
+    parser.add_argument('--templates', default=TEMPLATES_PATH, help='caption and title templates')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache')
+    args = parser.parse_args()
+
+    compose(args.locales, args.profiles, args.workers, args.force, args.templates)
+
+
+if __name__ == '__main__':
+    with stage_trace.session('store_graphics'):
+        main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Concatenate a reciter's per-ayah MP3s into one MP3 per surah, frame by
+frame and without re-encoding, with an index of where every ayah starts.
+
+For each ayah file the ID3 tags and the encoder's Xing/Info/VBRI frame
+are dropped and the audio frames are appended as they are. The surah file
+gets a fresh Xing/Info frame (frame count, byte count and a seek TOC) so
+players report the right duration and seek accurately. It is tagged
+Xing when the frame bitrates differ (a VBR reciter, or ayahs encoded at
+different bitrates) and Info, LAME's tag for CBR, when they are all the
+same: players that see Info may assume a constant bitrate and seek by
+byte ratio instead of by the TOC. All inputs of a surah must share MPEG
+version, sample rate and channel mode, since changing them mid-stream
+would need re-encoding.
+
+Next to each SSS.mp3 an SSS.idx is written:
+    header  '<4sHHHI'  magic b'AYAX', version, surah, ayah count, sample rate
+    records '<II'      byte offset, first sample; one per ayah plus a final
+                       record holding the file size and total samples
+so playback can fetch ayah k with one ranged read of
+[offset(k), offset(k + 1)) and seek to sample / sample_rate seconds.
+
+Inputs are named SSSAAA.mp3 (everyayah.com) or N.mp3 by global ayah
+number (cdn.islamic.network). Surahs are processed in parallel and skipped
+when their inputs are unchanged.
+
+    python3 surah_audio.py audio/alafasy/ surah_audio/alafasy/
+    python3 surah_audio.py audio/alafasy/ surah_audio/alafasy/ --surahs 1 36 67
+"""
+import argparse
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from build_cache import BuildCache
+from mp3_frames import info_frame, iter_frames, parse_info_frame, seek_toc
+from quran_corpus import SURAH_AYAH_COUNTS, surah_starts
+
+INDEX_MAGIC = b'AYAX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sHHHI')
+INDEX_RECORD = struct.Struct('<II')
+
+SURAH_AYAH_NAME = re.compile(r'^(\d{3})(\d{3})\.mp3$')
+GLOBAL_NAME = re.compile(r'^(\d{1,4})\.mp3$')
+
+
+def find_ayah_files(directory):
+    """{(surah, ayah): path} for every recognized per-ayah file in `directory`."""
+    starts = surah_starts()
+    found = {}
+    for name in os.listdir(directory):
+        match = SURAH_AYAH_NAME.match(name)
+        if match:
+            surah, ayah = int(match.group(1)), int(match.group(2))
+        else:
+            match = GLOBAL_NAME.match(name)
+            if not match:
+                continue
+            number = int(match.group(1))
+            surah = next((s for s in range(len(starts), 0, -1) if starts[s - 1] <= number), 0)
+            ayah = number - starts[surah - 1] + 1 if surah else 0
+        if 1 <= surah <= len(SURAH_AYAH_COUNTS) and 1 <= ayah <= SURAH_AYAH_COUNTS[surah - 1]:
+            found[surah, ayah] = os.path.join(directory, name)
+    return found
+
+
+def ayah_files(directory):
+    """{surah: [path of ayah 1, 2, ...]} for the surahs whose files are all present."""
+    found = {}
+    for (surah, ayah), path in find_ayah_files(directory).items():
+        found.setdefault(surah, {})[ayah] = path
+
+    complete = {}
+    for surah, ayahs in sorted(found.items()):
+        if len(ayahs) == SURAH_AYAH_COUNTS[surah - 1]:
+            complete[surah] = [ayahs[i] for i in range(1, len(ayahs) + 1)]
+        else:
+            print(f"Surah {surah}: {len(ayahs)} of {SURAH_AYAH_COUNTS[surah - 1]} ayahs, skipped")
+    return complete
+
+
+def output_paths(out_dir, surah):
+    return (os.path.join(out_dir, f'{surah:03d}.mp3'),
+            os.path.join(out_dir, f'{surah:03d}.idx'))
+
+
+def concat_surah(surah, paths, out_dir):
+    """Worker: write SSS.mp3 and SSS.idx; returns (surah, bytes, seconds)."""
+    chunks, frame_offsets, starts = [], [], []
+    template = None
+    bitrates = set()
+    size = samples = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        starts.append((size, samples))
+        frames = len(frame_offsets)
+        for i, (offset, header) in enumerate(iter_frames(data)):
+            if i == 0 and parse_info_frame(data, offset, header) is not None:
+                continue
+            if template is None:
+                template = header
+            elif (header.version, header.sample_rate, header.mode) != \
+                    (template.version, template.sample_rate, template.mode):
+                raise ValueError(f"{path}: {header.sample_rate} Hz mode {header.mode} does not "
+                                 f"match {template.sample_rate} Hz mode {template.mode}")
+            bitrates.add(header.bitrate)
+            chunks.append(data[offset:offset + header.length])
+            frame_offsets.append(size)
+            size += header.length
+            samples += header.samples
+        if len(frame_offsets) == frames:
+            raise ValueError(f"{path}: no MPEG audio frames found")
+
+    # The Info frame's length depends only on the stream parameters
+    tag = b'Xing' if len(bitrates) > 1 else b'Info'
+    head = len(info_frame(template, 0, 0, toc=bytes(100), tag=tag))
+    total = head + size
+    toc = seek_toc([head + offset for offset in frame_offsets], total)
+    info = info_frame(template, len(frame_offsets), size, toc=toc, tag=tag)
+
+    mp3_path, idx_path = output_paths(out_dir, surah)
+    index = [INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, surah, len(paths), template.sample_rate)]
+    index += [INDEX_RECORD.pack(head + offset, first) for offset, first in starts]
+    index.append(INDEX_RECORD.pack(total, samples))
+
+    for path, parts in ((mp3_path, [info] + chunks), (idx_path, index)):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(parts)
+        os.replace(tmp_path, path)
+    return surah, total, samples / template.sample_rate
+
+
+def read_index(path):
+    """(surah, sample rate, [(byte offset, first sample), ...]) including the end record."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, surah, count, sample_rate = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION:
+        raise ValueError(f"{path}: not a version {INDEX_VERSION} ayah index")
+    records = list(INDEX_RECORD.iter_unpack(data[INDEX_HEADER.size:]))
+    if len(records) != count + 1:
+        raise ValueError(f"{path}: expected {count + 1} records, found {len(records)}")
+    return surah, sample_rate, records
+
+
+def ayah_range(records, ayah):
+    """Byte range [start, end) of ayah `ayah` (1-based) in the surah file."""
+    return records[ayah - 1][0], records[ayah][0]
+
+
+def build(in_dir, out_dir, surahs=None, workers=None, force=False):
+    files = ayah_files(in_dir)
+    if surahs:
+        files = {s: files[s] for s in surahs if s in files}
+    os.makedirs(out_dir, exist_ok=True)
+
+    cache = BuildCache(force=force)
+    params = {'stage': 'surah_audio', 'index_version': INDEX_VERSION}
+    stale = {surah: paths for surah, paths in files.items()
+             if not cache.up_to_date(list(output_paths(out_dir, surah)), paths,
+                                     dict(params, surah=surah))}
+    if not stale:
+        print("All surah audio is up to date.")
+        return
+
+    # Longest surahs first so the pool is not left waiting on Al-Baqarah
+    order = sorted(stale, key=lambda s: -len(stale[s]))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(concat_surah, surah, stale[surah], out_dir) for surah in order]
+        for future in futures:
+            surah, size, seconds = future.result()
+            cache.record(list(output_paths(out_dir, surah)), stale[surah], dict(params, surah=surah))
+            print(f"Surah {surah:3d}: {len(stale[surah]):3d} ayahs, {size:,} bytes, {seconds:.1f}s")
+    cache.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concatenate per-ayah MP3s into indexed surah files.')
+    parser.add_argument('input', help='directory of per-ayah MP3s for one reciter')
+    parser.add_argument('output', help='directory for SSS.mp3 and SSS.idx files')
+    parser.add_argument('--surahs', type=int, nargs='+', help='surahs to build (default: all complete)')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='ignore the build cache')
+    args = parser.parse_args()
+
+    try:
+        build(args.input, args.output, args.surahs, args.workers, args.force)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
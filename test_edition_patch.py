@@ -0,0 +1,152 @@
+"""Tests for edition_patch.py on a corpus built from the synthetic fixtures."""
+import pytest
+
+from edition_patch import (HEADER, MAGIC, VERSION, apply_patches, corpus_texts, edition_digest,
+                           make_patch, patched, read_patch)
+from quran_corpus import TOTAL_AYAHS, Corpus, build_corpus
+from quran_fixtures import make_surahs
+
+EDITIONS = ('en.sahih', 'fr.hamidullah')
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return {edition: [ayah['text'] for surah in make_surahs(edition) for ayah in surah['ayahs']]
+            for edition in EDITIONS}
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = str(tmp_path / 'corpus.bin')
+    build_corpus([(edition, make_surahs(edition)) for edition in EDITIONS], path)
+    return path
+
+
+def edited(texts, changes):
+    texts = list(texts)
+    for number, text in changes.items():
+        texts[number - 1] = text
+    return texts
+
+
+def read_texts(path, edition):
+    with Corpus(path) as corpus:
+        return corpus_texts(corpus, edition)
+
+
+def test_empty_diff(texts, corpus_path):
+    old = texts['en.sahih']
+    patch = read_patch(make_patch('en.sahih', old, old))
+    assert patch.changes == {}
+    assert patch.base == patch.target == edition_digest(old)
+    assert patched(old, patch) == old
+
+    assert apply_patches(corpus_path, [patch])[0] == {'en.sahih': 0}
+    assert read_texts(corpus_path, 'en.sahih') == old
+
+
+def test_single_ayah_change(texts, corpus_path):
+    old = texts['en.sahih']
+    new = edited(old, {255: 'Allah - there is no deity except Him, the Ever-Living.'})
+    data = make_patch('en.sahih', old, new)
+    patch = read_patch(data)
+    assert patch.edition == 'en.sahih'
+    assert patch.changes == {255: new[254]}
+    assert (patch.base, patch.target) == (edition_digest(old), edition_digest(new))
+    assert len(data) < HEADER.size + 100
+
+    out_path = corpus_path + '.patched'
+    assert apply_patches(corpus_path, [patch], out_path)[0] == {'en.sahih': 1}
+    assert read_texts(out_path, 'en.sahih') == new
+    assert read_texts(out_path, 'fr.hamidullah') == texts['fr.hamidullah']
+    assert read_texts(corpus_path, 'en.sahih') == old
+
+
+def test_patches_apply_in_sequence(texts, corpus_path):
+    first = texts['en.sahih']
+    second = edited(first, {1: 'one'})
+    third = edited(second, {1: 'One', TOTAL_AYAHS: 'last'})
+    patches = [read_patch(make_patch('en.sahih', first, second)),
+               read_patch(make_patch('en.sahih', second, third))]
+
+    with pytest.raises(ValueError):
+        apply_patches(corpus_path, patches[::-1])
+    apply_patches(corpus_path, patches)
+    assert read_texts(corpus_path, 'en.sahih') == third
+
+
+def test_wrong_base(texts, corpus_path):
+    old = texts['en.sahih']
+    patch = read_patch(make_patch('en.sahih', old, edited(old, {7: 'changed'})))
+    with pytest.raises(ValueError, match='does not match'):
+        patched(edited(old, {8: 'already edited'}), patch)
+
+    apply_patches(corpus_path, [read_patch(make_patch('en.sahih', old, edited(old, {8: 'edited'})))])
+    with open(corpus_path, 'rb') as f:
+        before = f.read()
+    with pytest.raises(ValueError, match='does not match'):
+        apply_patches(corpus_path, [patch])
+    with open(corpus_path, 'rb') as f:
+        assert f.read() == before
+
+
+def test_wrong_edition(texts, corpus_path):
+    # A patch made from en.sahih but labelled fr.hamidullah: the base digest catches it
+    old = texts['en.sahih']
+    patch = read_patch(make_patch('fr.hamidullah', old, edited(old, {3: 'changed'})))
+    with pytest.raises(ValueError, match='fr.hamidullah'):
+        apply_patches(corpus_path, [patch])
+
+    missing = read_patch(make_patch('ar', old, edited(old, {3: 'changed'})))
+    with pytest.raises(KeyError, match="'ar'"):
+        apply_patches(corpus_path, [missing])
+    assert read_texts(corpus_path, 'fr.hamidullah') == texts['fr.hamidullah']
+
+
+def test_snapshot_length_is_checked(texts):
+    with pytest.raises(ValueError, match=str(TOTAL_AYAHS)):
+        make_patch('en.sahih', texts['en.sahih'][:-1], texts['en.sahih'][:-1])
+
+
+@pytest.mark.parametrize('field, value', [(0, b'AYQC'), (1, VERSION + 1)])
+def test_header_mismatch(texts, field, value):
+    old = texts['en.sahih']
+    data = make_patch('en.sahih', old, edited(old, {2: 'changed'}))
+    header = list(HEADER.unpack_from(data))
+    assert header[:2] == [MAGIC, VERSION]
+    header[field] = value
+    with pytest.raises(ValueError, match=f'not a version {VERSION} edition patch'):
+        read_patch(HEADER.pack(*header) + data[HEADER.size:])
+
+
+@pytest.mark.parametrize('cut', [0, 4, HEADER.size - 1, HEADER.size, HEADER.size + 3, -1])
+def test_truncated_patch(texts, cut):
+    old = texts['en.sahih']
+    data = make_patch('en.sahih', old, edited(old, {2: 'changed', 40: 'also changed'}))
+    with pytest.raises(ValueError, match='shorter than its header|header says'):
+        read_patch(data[:cut])
+
+
+def test_corrupt_body(texts):
+    old = texts['en.sahih']
+    data = bytearray(make_patch('en.sahih', old, edited(old, {2: 'changed', 40: 'also changed'})))
+    data[HEADER.size + 5] ^= 0xff
+    with pytest.raises(ValueError, match='corrupt'):
+        read_patch(bytes(data))
+
+
+def test_count_disagrees_with_body(texts):
+    old = texts['en.sahih']
+    data = make_patch('en.sahih', old, edited(old, {2: 'changed', 40: 'also changed'}))
+    header = list(HEADER.unpack_from(data))
+    for count in (1, 3):
+        header[5] = count
+        with pytest.raises(ValueError, match='corrupt'):
+            read_patch(HEADER.pack(*header) + data[HEADER.size:])
+
+
+def test_extra_bytes_are_rejected(texts):
+    old = texts['en.sahih']
+    data = make_patch('en.sahih', old, edited(old, {2: 'changed'}))
+    with pytest.raises(ValueError, match='header says'):
+        read_patch(data + b'\0')
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Tiled, bounded-memory versions of the keying, zoom-crop and fit-and-pad
+stages, for print-resolution (8K-16K) masters.
+
+Images are processed as full-width bands of rows. Each output band reads
+only the source rows its resample kernel touches (the band plus the LANCZOS
+support on either side) and is written straight to the output, so nothing
+image-sized is ever allocated:
+  - .npy sources are read with positioned reads, only the rows needed
+  - .npy outputs are appended band by band
+  - .png outputs are streamed: rows are filtered and deflated band by band
+
+PNG sources still have to be decoded whole by Pillow; for the biggest
+masters convert them once with `to-npy` on a machine that can hold them,
+then run the pipeline from the .npy on the small runner. Results match the
+in-memory stages to within one level in a fraction of a percent of pixels
+(LANCZOS weights are recomputed per band in floating point).
+
+    python3 tiled.py key master.npy calligraphy.png --soft
+    python3 tiled.py zoom master.npy icon.png --zoom 1.6 --background 25,34,124
+    python3 tiled.py fit shot.npy shot_6.5.png --size 1242x2688
+"""
+from PIL import Image
+import argparse
+import math
+import resource
+import struct
+import zlib
+
+import numpy as np
+
+from chroma_key import key_array
+
+DEFAULT_BAND_ROWS = 256
+
+# Half-width of the LANCZOS kernel in source pixels at scale 1
+LANCZOS_SUPPORT = 3.0
+
+PNG_COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+PNG_MODES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+class TileSource:
+    """
+    Row-band access to a source image. .npy files are read a band at a
+    time (plain reads rather than a memory map, so pages already processed
+    do not stay resident); other formats are decoded whole by Pillow.
+    """
+
+    def __init__(self, path):
+        self.array = None
+        if path.endswith('.npy'):
+            self.f = open(path, 'rb')
+            major, _ = np.lib.format.read_magic(self.f)
+            read_header = (np.lib.format.read_array_header_1_0 if major == 1
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran, dtype = read_header(self.f)
+            if fortran or dtype != np.uint8 or len(shape) not in (2, 3):
+                raise ValueError(f"{path}: expected a C-ordered uint8 image array")
+            self.offset = self.f.tell()
+            shape = shape if len(shape) == 3 else shape + (1,)
+        else:
+            img = Image.open(path)
+            if img.mode not in ('L', 'RGB', 'RGBA'):
+                img = img.convert('RGBA')
+            self.array = np.asarray(img)
+            if self.array.ndim == 2:
+                self.array = self.array[..., None]
+            shape = self.array.shape
+        self.height, self.width, self.channels = shape
+
+    def rows(self, y0, y1):
+        """Copy of source rows [y0, y1), clipped to the image."""
+        y0, y1 = max(0, y0), min(self.height, y1)
+        if self.array is not None:
+            return np.array(self.array[y0:y1])
+        row_bytes = self.width * self.channels
+        self.f.seek(self.offset + y0 * row_bytes)
+        data = np.fromfile(self.f, dtype=np.uint8, count=(y1 - y0) * row_bytes)
+        return data.reshape(y1 - y0, self.width, self.channels)
+
+    def band_image(self, y0, y1, mode=None):
+        """Rows [y0, y1) as an image, converted to `mode` if given."""
+        band = self.rows(y0, y1)
+        img = Image.fromarray(band[..., 0] if self.channels == 1 else band, PNG_MODES[self.channels])
+        return img.convert(mode) if mode and mode != img.mode else img
+
+
+class PngWriter:
+    """
+    Streaming PNG encoder: rows go through per-row adaptive filtering
+    (None/Sub/Up, chosen by the usual minimum-sum heuristic) and an
+    incremental deflate stream, and IDAT chunks are flushed as they fill.
+    """
+
+    def __init__(self, path, width, height, channels, level=6, chunk_size=1 << 18):
+        self.f = open(path, 'wb')
+        self.width, self.height, self.channels = width, height, channels
+        self.compressor = zlib.compressobj(level)
+        self.chunk_size = chunk_size
+        self.pending = []
+        self.pending_size = 0
+        self.prior = np.zeros((width * channels,), dtype=np.uint8)
+        self.rows_written = 0
+
+        self.f.write(b'\x89PNG\r\n\x1a\n')
+        ihdr = struct.pack('>IIBBBBB', width, height, 8, PNG_COLOR_TYPES[channels], 0, 0, 0)
+        self._chunk(b'IHDR', ihdr)
+
+    def _chunk(self, kind, data):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    def _emit(self, data):
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= self.chunk_size:
+            self._chunk(b'IDAT', b''.join(self.pending))
+            self.pending, self.pending_size = [], 0
+
+    def write(self, band):
+        """Append a (rows, width, channels) uint8 band."""
+        rows = np.ascontiguousarray(band, dtype=np.uint8).reshape(len(band), -1)
+        bpp = self.channels
+
+        priors = np.vstack([self.prior[None, :], rows[:-1]])
+        sub = rows.copy()
+        sub[:, bpp:] = rows[:, bpp:] - rows[:, :-bpp]
+        up = rows - priors
+
+        # Minimum sum of absolute differences, treating bytes as signed
+        candidates = np.stack([rows, sub, up])
+        cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+        choice = cost.argmin(axis=0)
+
+        out = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+        out[:, 0] = choice
+        out[:, 1:] = candidates[choice, np.arange(len(rows))]
+
+        self._emit(self.compressor.compress(out.tobytes()))
+        self.prior = rows[-1].copy()
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"wrote {self.rows_written} rows, expected {self.height}")
+        self._emit(self.compressor.flush())
+        if self.pending:
+            self._chunk(b'IDAT', b''.join(self.pending))
+        self._chunk(b'IEND', b'')
+        self.f.close()
+
+
+class NpyWriter:
+    """Band writer producing a .npy file the tiled stages can read back."""
+
+    def __init__(self, path, width, height, channels):
+        self.f = open(path, 'wb')
+        self.height = height
+        header = {'descr': '|u1', 'fortran_order': False, 'shape': (height, width, channels)}
+        np.lib.format.write_array_header_1_0(self.f, header)
+        self.rows_written = 0
+
+    def write(self, band):
+        self.f.write(np.ascontiguousarray(band, dtype=np.uint8).tobytes())
+        self.rows_written += len(band)
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"wrote {self.rows_written} rows, expected {self.height}")
+        self.f.close()
+
+
+def open_writer(path, width, height, channels):
+    if path.endswith('.npy'):
+        return NpyWriter(path, width, height, channels)
+    return PngWriter(path, width, height, channels)
+
+
+def kernel_margin(scale):
+    """Source rows the LANCZOS kernel reaches beyond a band at this scale."""
+    return int(math.ceil(LANCZOS_SUPPORT * max(scale, 1.0))) + 1
+
+
+def resample_band(source, out_width, out_rows, box, mode=None):
+    """
+    Resample the source region `box` (x0, y0, x1, y1 in source pixels) to
+    `out_width` x `out_rows`, reading only the rows the kernel needs and
+    converting them to `mode` first if given.
+    """
+    x0, y0, x1, y1 = box
+    margin = kernel_margin((y1 - y0) / out_rows)
+    first = max(0, int(math.floor(y0)) - margin)
+    last = min(source.height, int(math.ceil(y1)) + margin)
+    band = source.band_image(first, last, mode)
+    return band.resize((out_width, out_rows), Image.Resampling.LANCZOS,
+                       box=(x0, y0 - first, x1, y1 - first))
+
+
+def composite(band_img, background):
+    """Flatten an RGBA band onto a solid background, as paste(img, mask=img) does."""
+    canvas = Image.new('RGB', band_img.size, background)
+    if band_img.mode == 'RGBA':
+        canvas.paste(band_img, (0, 0), band_img)
+    else:
+        canvas.paste(band_img.convert('RGB'), (0, 0))
+    return np.asarray(canvas)
+
+
+def key_tiled(src, dst, soft=False, band_rows=DEFAULT_BAND_ROWS):
+    """Chroma-key `src` into `dst`; keying is per pixel, so bands need no overlap."""
+    source = TileSource(src)
+    if source.channels not in (3, 4):
+        raise ValueError("keying needs an RGB or RGBA source")
+    writer = open_writer(dst, source.width, source.height, 4)
+    for y in range(0, source.height, band_rows):
+        band = source.rows(y, y + band_rows)
+        if source.channels == 3:
+            opaque = np.full(band.shape[:2] + (1,), 255, dtype=np.uint8)
+            band = np.concatenate([band, opaque], axis=2)
+        writer.write(key_array(band, soft=soft))
+    writer.close()
+
+
+def zoom_crop_tiled(src, dst, zoom=1.6, background=(25, 34, 124), band_rows=DEFAULT_BAND_ROWS):
+    """
+    Tiled zoom_ios_icon: scale by `zoom`, keep the centered source-sized
+    square and flatten it onto `background`, without the zoomed image.
+    """
+    source = TileSource(src)
+    size = source.width
+    zoomed = int(size * zoom)
+    offset = (zoomed - size) // 2
+    # Zoomed pixel z maps to source coordinate z * scale
+    scale_x = source.width / zoomed
+    scale_y = source.height / zoomed
+
+    writer = open_writer(dst, size, size, 3)
+    for y in range(0, size, band_rows):
+        rows = min(band_rows, size - y)
+        box = (offset * scale_x, (offset + y) * scale_y,
+               (offset + size) * scale_x, (offset + y + rows) * scale_y)
+        writer.write(composite(resample_band(source, size, rows, box), background))
+    writer.close()
+
+
+def fit_pad_tiled(src, dst, target_size, background=(13, 27, 42), band_rows=DEFAULT_BAND_ROWS):
+    """
+    Tiled screenshot_renderer fit: scale to the target width, center
+    vertically on `background`, pad or crop the height. Like the renderer,
+    the source is converted to RGB first, so any alpha is dropped rather
+    than composited.
+    """
+    source = TileSource(src)
+    target_w, target_h = target_size
+    new_h = int(source.height * target_w / source.width)
+    y_offset = (target_h - new_h) // 2
+    scale_y = source.height / new_h
+
+    writer = open_writer(dst, target_w, target_h, 3)
+    for y in range(0, target_h, band_rows):
+        rows = min(band_rows, target_h - y)
+        band = np.empty((rows, target_w, 3), dtype=np.uint8)
+        band[:] = background
+
+        # Rows of the resized image that land in this output band
+        r0 = max(y - y_offset, 0)
+        r1 = min(y + rows - y_offset, new_h)
+        if r0 < r1:
+            box = (0, r0 * scale_y, source.width, r1 * scale_y)
+            resized = resample_band(source, target_w, r1 - r0, box, 'RGB')
+            band[r0 + y_offset - y:r1 + y_offset - y] = np.asarray(resized)
+        writer.write(band)
+    writer.close()
+
+
+def to_npy(src, dst):
+    """Decode an image once into a .npy file the tiled stages read a band at a time."""
+    img = Image.open(src)
+    if img.mode not in ('L', 'RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    np.save(dst, np.asarray(img))
+
+
+def parse_color(text):
+    return tuple(int(c) for c in text.split(','))
+
+
+def parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bounded-memory image stages.')
+    parser.add_argument('--band-rows', type=int, default=DEFAULT_BAND_ROWS,
+                        help='rows per band; sets peak memory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    key = sub.add_parser('key', help='extract the gold calligraphy')
+    key.add_argument('src')
+    key.add_argument('dst')
+    key.add_argument('--soft', action='store_true')
+
+    zoom = sub.add_parser('zoom', help='zoom-crop the iOS icon')
+    zoom.add_argument('src')
+    zoom.add_argument('dst')
+    zoom.add_argument('--zoom', type=float, default=1.6)
+    zoom.add_argument('--background', type=parse_color, default=(25, 34, 124))
+
+    fit = sub.add_parser('fit', help='fit a screenshot to a device canvas')
+    fit.add_argument('src')
+    fit.add_argument('dst')
+    fit.add_argument('--size', type=parse_size, required=True, help='WxH')
+    fit.add_argument('--background', type=parse_color, default=(13, 27, 42))
+
+    npy = sub.add_parser('to-npy', help='convert an image to a .npy the stages read in bands')
+    npy.add_argument('src')
+    npy.add_argument('dst')
+
+    args = parser.parse_args()
+    if args.command == 'key':
+        key_tiled(args.src, args.dst, soft=args.soft, band_rows=args.band_rows)
+    elif args.command == 'zoom':
+        zoom_crop_tiled(args.src, args.dst, args.zoom, args.background, band_rows=args.band_rows)
+    elif args.command == 'fit':
+        fit_pad_tiled(args.src, args.dst, args.size, args.background, band_rows=args.band_rows)
+    else:
+        to_npy(args.src, args.dst)
+
+    # ru_maxrss is in KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {args.dst} (peak RSS {peak:.0f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Work out which store screenshots and icons actually need uploading.
+
+The resize scripts rewrite every PNG on each run, so byte comparisons
+flag everything. Instead each image gets a perceptual difference hash
+(dHash: brightness gradients of a 17x16 grayscale thumbnail) and average
+hash (aHash: 16x16 thumbnail against its mean), 256 bits each, compared
+with the hashes recorded when the set was last published:
+
+  - byte-identical files are unchanged without being decoded
+  - a new file, or one whose pixel size changed, is uploaded
+  - otherwise it is uploaded when either hash is more than --threshold
+    bits away from the published one
+Files are hashed in parallel. The result is written to upload_delta.json
+for the upload step; after a successful upload, --publish records the
+current hashes in store_published.json. Files left out for being under
+the threshold keep their published hashes, so they are always compared
+with what is live.
+
+    python3 upload_delta.py                     # default deliverable dirs
+    python3 upload_delta.py ios_screenshots --threshold 0
+    python3 upload_delta.py --publish
+"""
+from PIL import Image
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from build_cache import BuildCache
+from png_optimize import DEFAULT_BUDGETS, find_pngs
+
+PUBLISHED_PATH = 'store_published.json'
+DELTA_PATH = 'upload_delta.json'
+HASH_SIZE = 16
+DEFAULT_THRESHOLD = 3
+
+# Transparent icon pixels are hashed as if over this gray, so their
+# (arbitrary) hidden color does not count but alpha changes do
+BACKDROP = (128, 128, 128)
+
+
+def _bits(array):
+    return np.packbits(array.flatten()).tobytes().hex()
+
+
+def image_hashes(path, size=HASH_SIZE):
+    """Worker: (path, [width, height], dHash hex, aHash hex)."""
+    with Image.open(path) as img:
+        img.load()
+        dimensions = list(img.size)
+        if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+            rgba = img.convert('RGBA')
+            flat = Image.new('RGBA', rgba.size, BACKDROP + (255,))
+            flat.alpha_composite(rgba)
+            img = flat
+        gray = img.convert('L')
+
+    # Shrink by an integer factor first (cheap box filter) so the final
+    # resamples only see a small image
+    factor = min(gray.width, gray.height) // (4 * (size + 1))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    wide = np.asarray(gray.resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    square = np.asarray(gray.resize((size, size), Image.BOX), dtype=np.float32)
+    return path, dimensions, _bits(wide[:, 1:] > wide[:, :-1]), _bits(square > square.mean())
+
+
+def distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def load_published(path=PUBLISHED_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get('hash_size') != HASH_SIZE:
+        print(f"{path}: hashed with a different size; treating every file as new")
+        return {}
+    return data.get('files', {})
+
+
+def write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def compare(paths, published, threshold, workers=None):
+    """(current entries by path, delta dict, number of images decoded)."""
+    cache = BuildCache()
+    current, to_hash = {}, []
+    for path in paths:
+        digest = cache.digest(path)
+        old = published.get(path)
+        if old and old['sha256'] == digest:
+            current[path] = old
+        else:
+            current[path] = {'sha256': digest}
+            to_hash.append(path)
+    cache.save()
+
+    # Biggest files first so one large iPad screenshot doesn't finish last
+    to_hash.sort(key=lambda p: -os.path.getsize(p))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, dimensions, dhash, ahash in pool.map(image_hashes, to_hash, chunksize=4):
+            current[path].update(size=dimensions, dhash=dhash, ahash=ahash)
+
+    delta = {'threshold': threshold, 'upload': [], 'unchanged': [],
+             'removed': sorted(set(published) - set(current))}
+    for path in sorted(current):
+        entry, old = current[path], published.get(path)
+        if old is None:
+            delta['upload'].append({'path': path, 'reason': 'new'})
+        elif entry['sha256'] == old['sha256']:
+            delta['unchanged'].append(path)
+        elif entry['size'] != old['size']:
+            delta['upload'].append({'path': path, 'reason': 'resized',
+                                    'from': old['size'], 'to': entry['size']})
+        else:
+            d, a = distance(entry['dhash'], old['dhash']), distance(entry['ahash'], old['ahash'])
+            if max(d, a) > threshold:
+                delta['upload'].append({'path': path, 'reason': 'changed', 'dhash_bits': d,
+                                        'ahash_bits': a})
+            else:
+                delta['unchanged'].append(path)
+    return current, delta, len(to_hash)
+
+
+def published_entries(current, delta, published):
+    """
+    What to record after uploading `delta`: the new entry for uploaded and
+    byte-identical files, but the old one for files kept back as under the
+    threshold, so small edits are measured against what is live and
+    cannot add up unnoticed.
+    """
+    entries = dict(current)
+    for path in delta['unchanged']:
+        if current[path]['sha256'] != published[path]['sha256']:
+            entries[path] = published[path]
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List store images that visibly changed since publishing.')
+    parser.add_argument('dirs', nargs='*', help='directories to check (default: deliverable dirs)')
+    parser.add_argument('--published', default=PUBLISHED_PATH, help='hashes of the published set')
+    parser.add_argument('--output', default=DELTA_PATH, help='delta manifest to write')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help='bits of either hash that may differ for an unchanged image')
+    parser.add_argument('--publish', action='store_true',
+                        help='record the current set as published (run after uploading)')
+    parser.add_argument('--workers', type=int, help='process pool size (default: CPU count)')
+    args = parser.parse_args()
+
+    dirs = args.dirs or [d for d in DEFAULT_BUDGETS if os.path.isdir(d)]
+    paths = [path for directory in dirs for path in find_pngs(directory)]
+    published = load_published(args.published)
+
+    start = time.perf_counter()
+    current, delta, hashed = compare(paths, published, args.threshold, args.workers)
+    seconds = time.perf_counter() - start
+    write_json(args.output, delta)
+
+    for item in delta['upload']:
+        detail = ''
+        if item['reason'] == 'changed':
+            detail = f" (dHash {item['dhash_bits']}, aHash {item['ahash_bits']} bits)"
+        elif item['reason'] == 'resized':
+            detail = f" ({item['from'][0]}x{item['from'][1]} -> {item['to'][0]}x{item['to'][1]})"
+        print(f"upload  {item['path']}: {item['reason']}{detail}")
+    for path in delta['removed']:
+        print(f"removed {path}")
+    print(f"\n{len(paths)} images: {len(delta['upload'])} to upload, {len(delta['unchanged'])} "
+          f"unchanged, {len(delta['removed'])} removed; {hashed} hashed in {seconds:.2f}s"
+          + (f" ({hashed / seconds:.0f}/s)" if hashed else ''))
+    print(f"Wrote {args.output}")
+
+    if args.publish:
+        entries = published_entries(current, delta, published)
+        kept = sum(1 for path in entries if entries[path] is not current[path])
+        write_json(args.published, {'hash_size': HASH_SIZE, 'files': entries})
+        print(f"Recorded {len(entries)} images as published in {args.published}"
+              + (f" ({kept} under the threshold keep their published hashes)" if kept else ''))
+
+
+if __name__ == '__main__':
+    main()
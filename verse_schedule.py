@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Precompute the notification verse schedule, so scheduling is a local
+lookup instead of a round of API calls.
+
+NotificationService.scheduleNotifications fetches days x times random
+verses (35 for a week of five prayer times) with getRandomVerse, in
+batches of 7 with 1.5 s between batches. Every 429 or error costs a
+retry with backoff, and a failure ends on one of the built-in fallback
+verses. This bundles a seeded, year-long rotation instead: a verse for
+each of 366 days x 5 daily slots, no verse repeated within the
+rotation, with its ar/en/fr text and reference (as Verse.arabicReference,
+englishReference and frenchReference format them) taken from the
+offline corpus (quran_corpus.py).
+
+Layout (little-endian):
+  header    'AYNS', version, days, slots per day, languages, verses, seed
+  languages 8-byte codes, NUL padded, each with the (offset, length) of its block
+  rotation  u16 per (day, slot): index into the verse table
+  verses    per verse: global number (u16), surah (u8), number in surah (u16)
+  blocks    per language, zlib: u32 offsets of 2 x verses + 1 strings
+            (text, reference, text, ...), then the UTF-8 strings
+The verse for a date and slot is rotation[(days since 1970-01-01 %
+days) * slots + slot]. Only the app language's block is decompressed.
+
+    python3 verse_schedule.py
+    python3 verse_schedule.py --corpus assets/quran_corpus.bin --seed 7
+    python3 verse_schedule.py --dumps dumps/ar.json dumps/en.sahih.json dumps/fr.hamidullah.json
+    python3 verse_schedule.py show 2026-10-17 --language fr
+"""
+import argparse
+import datetime
+import random
+import struct
+import sys
+import tempfile
+import zlib
+
+from common_io import write_if_changed
+from quran_corpus import DEFAULT_CORPUS, TOTAL_AYAHS, open_corpus
+
+DEFAULT_OUTPUT = 'assets/notification_schedule.bin'
+DEFAULT_DAYS = 366
+DEFAULT_SLOTS = 5  # Fajr, Dhuhr, Asr, Maghrib, Isha
+
+# App language code -> corpus edition (LanguageService.getApiEdition)
+LANGUAGES = (('ar', 'ar'), ('en', 'en.sahih'), ('fr', 'fr.hamidullah'))
+
+MAGIC = b'AYNS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHBBHI')      # magic, version, days, slots, languages, verses, seed
+LANGUAGE = struct.Struct('<8sII')        # code, block offset, compressed length
+VERSE = struct.Struct('<HBH')            # global number, surah, number in surah
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def reference(language, meta, number_in_surah):
+    if language == 'ar':
+        return f"{meta['name']} - {number_in_surah} آية"
+    if language == 'fr':
+        return f"{meta.get('frenchName') or meta['englishName']} - Verset {number_in_surah}"
+    return f"{meta['englishName']} - Verse {number_in_surah}"
+
+
+def rotation(days, slots, seed):
+    """Verse numbers for each (day, slot), distinct until the Quran runs out."""
+    rng = random.Random(seed)
+    picks = []
+    while len(picks) < days * slots:
+        picks += rng.sample(range(1, TOTAL_AYAHS + 1), min(TOTAL_AYAHS, days * slots - len(picks)))
+    return picks
+
+
+def text_block(corpus, language, edition, verses, level=9):
+    strings = []
+    for number, _, number_in_surah, meta in verses:
+        strings.append(corpus.text(number, edition).encode('utf-8'))
+        strings.append(reference(language, meta, number_in_surah).encode('utf-8'))
+    offsets, position = [], 0
+    for data in strings:
+        offsets.append(position)
+        position += len(data)
+    offsets.append(position)
+    return zlib.compress(struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(strings), level)
+
+
+def pack_schedule(corpus, days=DEFAULT_DAYS, slots=DEFAULT_SLOTS, seed=0, languages=LANGUAGES):
+    picks = rotation(days, slots, seed)
+    numbers = sorted(set(picks))
+    index = {number: i for i, number in enumerate(numbers)}
+
+    verses = []
+    for number in numbers:
+        ayah = corpus.ayah(number, languages[0][1])
+        verses.append((number, ayah['surah']['number'], ayah['numberInSurah'], ayah['surah']))
+    blocks = [text_block(corpus, language, edition, verses) for language, edition in languages]
+
+    head = HEADER.size + LANGUAGE.size * len(languages)
+    body = struct.pack(f'<{len(picks)}H', *(index[number] for number in picks))
+    body += b''.join(VERSE.pack(number, surah, in_surah) for number, surah, in_surah, _ in verses)
+    offset = head + len(body)
+    table = []
+    for (language, _), block in zip(languages, blocks):
+        table.append(LANGUAGE.pack(language.encode('ascii'), offset, len(block)))
+        offset += len(block)
+    header = HEADER.pack(MAGIC, VERSION, days, slots, len(languages), len(numbers), seed)
+    return header + b''.join(table) + body + b''.join(blocks)
+
+
+class Schedule:
+    """Lookups in a packed schedule; each language's block is inflated on first use."""
+
+    def __init__(self, data):
+        magic, version, self.days, self.slots, n_languages, self.count, self.seed = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} notification schedule")
+        self.data = data
+        self.blocks = {}
+        position = HEADER.size
+        for _ in range(n_languages):
+            code, offset, length = LANGUAGE.unpack_from(data, position)
+            self.blocks[code.rstrip(b'\0').decode('ascii')] = (offset, length)
+            position += LANGUAGE.size
+        self._rotation = position
+        self._verses = position + 2 * self.days * self.slots
+        self._strings = {}
+
+    @classmethod
+    def open(cls, path=DEFAULT_OUTPUT):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def _language(self, language):
+        strings = self._strings.get(language)
+        if strings is None:
+            offset, length = self.blocks[language]
+            raw = zlib.decompress(self.data[offset:offset + length])
+            n = 2 * self.count + 1
+            strings = self._strings[language] = (struct.unpack_from(f'<{n}I', raw), raw[4 * n:])
+        return strings
+
+    def verse(self, day, slot, language='ar'):
+        """The verse for `day` (days since 1970-01-01) and `slot`."""
+        k = (day % self.days) * self.slots + slot % self.slots
+        (i,) = struct.unpack_from('<H', self.data, self._rotation + 2 * k)
+        number, surah, number_in_surah = VERSE.unpack_from(self.data, self._verses + VERSE.size * i)
+        offsets, blob = self._language(language)
+        text = blob[offsets[2 * i]:offsets[2 * i + 1]].decode('utf-8')
+        ref = blob[offsets[2 * i + 1]:offsets[2 * i + 2]].decode('utf-8')
+        return {'number': number, 'surahNumber': surah, 'numberInSurah': number_in_surah,
+                'text': text, 'reference': ref}
+
+    def week(self, start, days=7, times=DEFAULT_SLOTS, language='ar'):
+        """What scheduleNotifications needs: days x times verses from date `start`."""
+        first = (start - EPOCH).days
+        return [self.verse(first + day, slot, language)
+                for day in range(days) for slot in range(times)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bundle a year of notification verses.')
+    parser.add_argument('command', nargs='?', choices=('build', 'show'), default='build')
+    parser.add_argument('date', nargs='?', help='show: first day (YYYY-MM-DD, default today)')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--dumps', nargs='+', help='edition dumps to read instead of a corpus')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS)
+    parser.add_argument('--slots', type=int, default=DEFAULT_SLOTS, help='notifications per day')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--language', default='ar', choices=[code for code, _ in LANGUAGES])
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        schedule = Schedule.open(args.output)
+        start = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+        for i, verse in enumerate(schedule.week(start, language=args.language)):
+            day, slot = divmod(i, DEFAULT_SLOTS)
+            print(f"{start + datetime.timedelta(days=day)} #{slot} {verse['number']:>4} "
+                  f"{verse['reference']}: {verse['text'][:60]}")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open_corpus(args.dumps, args.corpus, tmp) as corpus:
+            missing = [e for _, e in LANGUAGES if e not in corpus.editions]
+            if missing:
+                print(f"Error: {corpus.path} has no {', '.join(missing)}")
+                sys.exit(1)
+            data = pack_schedule(corpus, args.days, args.slots, args.seed)
+    changed = write_if_changed(args.output, data)
+    schedule = Schedule(data)
+    print(f"{'Wrote' if changed else 'Unchanged'} {args.output}: {args.days} days x {args.slots} slots, "
+          f"{schedule.count} verses in {len(schedule.blocks)} languages, {len(data):,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Full-text verse search index over the offline corpus, for searching all
+6236 verses instead of the 114 surah names.
+
+Text is normalized before indexing, and queries must be normalized the
+same way (normalize() is the reference for the app side):
+  - Arabic: tashkeel and Quranic annotation marks and tatweel removed;
+    alef forms (أ إ آ ٱ) unified to ا, hamza carriers ؤ ئ to و ي, a
+    bare hamza ء dropped (Uthmani ءامنوا matches آمنوا), alef maksura ى
+    to ي and ta marbuta ة to ه
+  - Latin: case-folded, accents stripped (é -> e), œ/æ spelled out
+  - tokens are runs of word characters; apostrophes split (l'avez -> l, avez)
+
+Each edition gets a section of the index: a sorted term dictionary and a
+posting list of global ayah numbers per term. A posting list is
+delta-encoded varints, or a bitmap of every ayah when the varints would
+not be smaller (words like "the" or "et" in a few thousand verses). The
+dictionary is front-coded in blocks of 16 terms, with a block table of
+offsets, so a term or a prefix is found by binary search over the first
+term of each block and a scan of at most one block (a prefix then walks
+forward until the prefix stops matching).
+
+Queries combine posting lists as bitmaps with integer AND / OR, so a
+common word costs one int.from_bytes instead of decoding thousands of
+varints, and the result is expanded to ayah numbers once, at the end.
+A prefix's terms are only merged until they cover every ayah the other
+words of the query leave.
+
+Layout (little-endian):
+  header    'AYSX', version, sections
+  sections  per edition: identifier (32 bytes), terms, blocks, and the
+            offsets of its block table, dictionary and postings
+  block     u32 dictionary offset, u32 postings offset of the block's first term
+  term      varint shared prefix, varint suffix length, suffix, varint
+            posting count, varint posting bytes
+  posting   varint gaps between ascending ayah numbers, or when that is
+            BITMAP_BYTES or more, a BITMAP_BYTES little-endian bitmap
+            (bit n set for ayah n) instead
+
+    python3 verse_search.py build --dumps dumps/ar.json dumps/en.sahih.json dumps/fr.hamidullah.json
+    python3 verse_search.py query "mercy guid"
+    python3 verse_search.py query "الرحمن" --edition ar
+"""
+import argparse
+import bisect
+import itertools
+import operator
+import re
+import struct
+import sys
+import tempfile
+import unicodedata
+
+from common_io import get_varint, put_varint, write_if_changed
+from quran_corpus import DEFAULT_CORPUS, DEFAULT_EDITIONS, TOTAL_AYAHS, open_corpus, pack_identifier
+
+DEFAULT_INDEX = 'assets/verse_search.bin'
+BLOCK_TERMS = 16
+BITMAP_BYTES = TOTAL_AYAHS // 8 + 1     # bits 0..TOTAL_AYAHS; bit 0 is never set
+
+MAGIC = b'AYSX'
+VERSION = 3
+HEADER = struct.Struct('<4sHH')             # magic, version, sections
+SECTION = struct.Struct('<32sIIIII')        # edition, terms, blocks, block table, dictionary, postings
+BLOCK = struct.Struct('<II')                # dictionary offset, postings offset
+
+ARABIC_MARKS = re.compile('[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06dc'
+                          '\u06df-\u06e8\u06ea-\u06ed\u08d3-\u08ff]')
+ARABIC_FOLD = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ؤ': 'و', 'ئ': 'ي',
+                             'ى': 'ي', 'ة': 'ه', 'ء': None})
+LATIN_FOLD = str.maketrans({'œ': 'oe', 'æ': 'ae', 'ß': 'ss'})
+TOKEN = re.compile(r'\w+')
+BIT_FLAGS = bytes.maketrans(b'01', b'\0\1')
+BIT_NUMBERS = list(range(BITMAP_BYTES * 8))
+SPARSE_BITS = 400   # below this many set bits, ayahs() walks the runs of zeros instead
+SHORT_POSTINGS = 32  # below this many ayahs, a varint list becomes a bitmap by shifts, not a bytearray
+
+
+def normalize(text):
+    text = ARABIC_MARKS.sub('', text).translate(ARABIC_FOLD)
+    text = unicodedata.normalize('NFKD', text.casefold().translate(LATIN_FOLD))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def tokens(text):
+    return TOKEN.findall(normalize(text))
+
+
+def decode_postings(data, pos, count):
+    numbers, value = [], 0
+    for _ in range(count):
+        gap = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            gap |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        value += gap
+        numbers.append(value)
+    return numbers
+
+
+def ayahs(bits):
+    """Ascending ayah numbers of the bits set in `bits`, without a Python-level loop."""
+    digits = bin(bits)[:1:-1]
+    if bits.bit_count() < SPARSE_BITS:
+        runs = digits.split('1')
+        runs.pop()
+        return list(map(operator.add, itertools.accumulate(map(len, runs)), itertools.count()))
+    return list(itertools.compress(BIT_NUMBERS, digits.encode('ascii').translate(BIT_FLAGS)))
+
+
+def set_bits(flags, data, pos, count):
+    """Set the bit of every ayah of a varint posting list in the bytearray `flags`."""
+    for number in decode_postings(data, pos, count):
+        flags[number >> 3] |= 1 << (number & 7)
+
+
+# --- building -----------------------------------------------------------------
+
+def invert(texts):
+    """{term: ascending ayah numbers} for {ayah number: text}."""
+    postings = {}
+    for number in sorted(texts):
+        for term in set(tokens(texts[number])):
+            postings.setdefault(term, []).append(number)
+    return postings
+
+
+def pack_section(postings):
+    """(terms, block table, dictionary, postings) bytes for one edition."""
+    table, dictionary, packed = bytearray(), bytearray(), bytearray()
+    previous = b''
+    for i, term in enumerate(sorted(postings, key=lambda t: t.encode('utf-8'))):
+        key = term.encode('utf-8')
+        shared = 0
+        if i % BLOCK_TERMS == 0:
+            table += BLOCK.pack(len(dictionary), len(packed))
+        else:
+            limit = min(len(key), len(previous))
+            while shared < limit and key[shared] == previous[shared]:
+                shared += 1
+        start = len(packed)
+        last = 0
+        for number in postings[term]:
+            put_varint(packed, number - last)
+            last = number
+        if len(packed) - start >= BITMAP_BYTES:
+            bits = sum(1 << number for number in postings[term])
+            packed[start:] = bits.to_bytes(BITMAP_BYTES, 'little')
+        put_varint(dictionary, shared)
+        put_varint(dictionary, len(key) - shared)
+        dictionary += key[shared:]
+        put_varint(dictionary, len(postings[term]))
+        put_varint(dictionary, len(packed) - start)
+        previous = key
+    return len(postings), bytes(table), bytes(dictionary), bytes(packed)
+
+
+def pack_index(sections):
+    """Index bytes for [(edition, {term: ayah numbers})]."""
+    packed = [(edition, pack_section(postings)) for edition, postings in sections]
+    offset = HEADER.size + SECTION.size * len(packed)
+    head, body = [HEADER.pack(MAGIC, VERSION, len(packed))], []
+    for edition, (terms, table, dictionary, postings) in packed:
+        head.append(SECTION.pack(pack_identifier(edition, 32), terms, len(table) // BLOCK.size,
+                                 offset, offset + len(table), offset + len(table) + len(dictionary)))
+        body += [table, dictionary, postings]
+        offset += len(table) + len(dictionary) + len(postings)
+    return b''.join(head + body)
+
+
+def build_index(corpus, editions=DEFAULT_EDITIONS):
+    sections = []
+    for edition in editions:
+        texts = {n: corpus.text(n, edition) for n in range(1, TOTAL_AYAHS + 1)}
+        sections.append((edition, invert(texts)))
+    return pack_index(sections)
+
+
+# --- reading ------------------------------------------------------------------
+
+class Section:
+    def __init__(self, data, terms, blocks, table, dictionary, postings):
+        self.data = data
+        self.terms = terms
+        self.blocks = blocks
+        self.table = table
+        self.dictionary = dictionary
+        self.postings = postings
+        self._firsts = None
+
+    def _block(self, b):
+        return BLOCK.unpack_from(self.data, self.table + BLOCK.size * b)
+
+    def first_terms(self):
+        """First term of each block, decoded once, for the binary search."""
+        if self._firsts is None:
+            firsts = []
+            for b in range(self.blocks):
+                pos = self.dictionary + self._block(b)[0]
+                _, pos = get_varint(self.data, pos)
+                length, pos = get_varint(self.data, pos)
+                firsts.append(self.data[pos:pos + length])
+            self._firsts = firsts
+        return self._firsts
+
+    def scan(self, key):
+        """
+        Yield (term, count, postings offset, postings size) from the block
+        that could hold `key` onwards, in term order.
+        """
+        b = max(0, bisect.bisect_right(self.first_terms(), key) - 1)
+        data = self.data
+        while b < self.blocks:
+            offset, post = self._block(b)
+            pos = self.dictionary + offset
+            term = b''
+            for _ in range(min(BLOCK_TERMS, self.terms - b * BLOCK_TERMS)):
+                shared, pos = get_varint(data, pos)
+                length, pos = get_varint(data, pos)
+                term = term[:shared] + data[pos:pos + length]
+                pos += length
+                count, pos = get_varint(data, pos)
+                size, pos = get_varint(data, pos)
+                yield term, count, self.postings + post, size
+                post += size
+            b += 1
+
+    def _bits(self, count, pos, size):
+        """A term's posting list as a bitmap."""
+        if size == BITMAP_BYTES:
+            return int.from_bytes(self.data[pos:pos + size], 'little')
+        if count < SHORT_POSTINGS:
+            return sum(map((1).__lshift__, decode_postings(self.data, pos, count)))
+        flags = bytearray(BITMAP_BYTES)
+        set_bits(flags, self.data, pos, count)
+        return int.from_bytes(flags, 'little')
+
+    def _find(self, term):
+        """(count, postings offset, postings size) of `term`, or None."""
+        key = term.encode('utf-8')
+        for found, count, pos, size in self.scan(key):
+            if found >= key:
+                return (count, pos, size) if found == key else None
+        return None
+
+    def lookup_bits(self, term):
+        """Bitmap of the ayahs containing the normalized `term` exactly."""
+        found = self._find(term)
+        return self._bits(*found) if found else 0
+
+    def prefix_bits(self, prefix, within=None):
+        """
+        Bitmap of the ayahs containing a term that starts with `prefix`.
+        With `within` (a bitmap), only those ayahs: the scan stops as soon
+        as all of them are found.
+        """
+        key = prefix.encode('utf-8')
+        bits, flags = 0, bytearray(BITMAP_BYTES)
+        for found, count, pos, size in self.scan(key):
+            if found < key:
+                continue
+            if not found.startswith(key):
+                break
+            if size == BITMAP_BYTES:
+                bits |= int.from_bytes(self.data[pos:pos + size], 'little')
+            else:
+                set_bits(flags, self.data, pos, count)
+            if within is not None and (bits | int.from_bytes(flags, 'little')) & within == within:
+                return within
+        bits |= int.from_bytes(flags, 'little')
+        return bits if within is None else bits & within
+
+    def lookup(self, term):
+        """Ayah numbers containing the normalized `term` exactly."""
+        found = self._find(term)
+        if not found:
+            return []
+        count, pos, size = found
+        if size == BITMAP_BYTES:
+            return ayahs(self._bits(count, pos, size))
+        return decode_postings(self.data, pos, count)
+
+    def prefix(self, prefix):
+        """Ayah numbers containing a term that starts with `prefix`; ascending."""
+        return ayahs(self.prefix_bits(prefix))
+
+
+class SearchIndex:
+    def __init__(self, data):
+        magic, version, n_sections = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} verse search index")
+        self.data = data
+        self.sections = {}
+        for i in range(n_sections):
+            edition, terms, blocks, table, dictionary, postings = SECTION.unpack_from(
+                data, HEADER.size + SECTION.size * i)
+            self.sections[edition.rstrip(b'\0').decode('ascii')] = Section(
+                data, terms, blocks, table, dictionary, postings)
+
+    @classmethod
+    def open(cls, path=DEFAULT_INDEX):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def search(self, query, editions=None, prefix=True):
+        """
+        Ayah numbers matching every word of `query` in any of `editions`
+        (default: all). With `prefix` the last word is a prefix, for
+        search as you type; its expansion is only merged over the ayahs
+        the other words leave.
+        """
+        words = tokens(query)
+        if not words:
+            return []
+        matches = 0
+        for edition in editions or self.sections:
+            section = self.sections[edition]
+            within = None
+            for word in words[:-1]:
+                bits = section.lookup_bits(word)
+                within = bits if within is None else within & bits
+                if not within:
+                    break
+            if within == 0:
+                continue
+            if prefix:
+                bits = section.prefix_bits(words[-1], within)
+            else:
+                bits = section.lookup_bits(words[-1])
+                if within is not None:
+                    bits &= within
+            matches |= bits
+        return ayahs(matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the verse search index.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='index every edition of a corpus')
+    build.add_argument('--corpus', default=DEFAULT_CORPUS)
+    build.add_argument('--dumps', nargs='+', help='edition dumps to read instead of a corpus')
+    build.add_argument('-o', '--output', default=DEFAULT_INDEX)
+    query = sub.add_parser('query', help='print the verses matching a query')
+    query.add_argument('text')
+    query.add_argument('--edition', action='append', help='edition to search (repeatable; default all)')
+    query.add_argument('--exact', action='store_true', help='do not treat the last word as a prefix')
+    query.add_argument('--index', default=DEFAULT_INDEX)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                with open_corpus(args.dumps, args.corpus, tmp) as corpus:
+                    data = build_index(corpus, corpus.editions)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        changed = write_if_changed(args.output, data)
+        index = SearchIndex(data)
+        print(f"{'Wrote' if changed else 'Unchanged'} {args.output}: {len(data):,} bytes")
+        for edition, section in index.sections.items():
+            print(f"  {edition:<24} {section.terms:>7,} terms in {section.blocks:,} blocks, "
+                  f"{section.postings - section.dictionary:,} B dictionary")
+        return
+
+    index = SearchIndex.open(args.index)
+    unknown = [e for e in args.edition or [] if e not in index.sections]
+    if unknown:
+        print(f"Error: {args.index} has no {', '.join(unknown)}")
+        sys.exit(1)
+    numbers = index.search(args.text, args.edition, prefix=not args.exact)
+    print(f"{len(numbers)} verses: {' '.join(map(str, numbers[:50]))}"
+          + (' ...' if len(numbers) > 50 else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,19 +2,21 @@
 import os
 from PIL import Image
 
-def zoom_icon():
-    icon_path = 'assets/icon.png'
-    if not os.path.exists(icon_path):
-        print(f"Icon not found at {icon_path}")
-        return
+import fix_ios_icon
+import stage_trace
+from build_cache import BuildCache
 
-    # Open the existing icon (restored original)
-    img = Image.open(icon_path).convert("RGBA")
-    
-    # Aggressive Zoom factor: 1.6x (160%)
-    # This is mathematically enough to push the rounded corners of a full-size rounded box 
-    # completely out of the 1024x1024 square.
-    zoom_factor = 1.6
+ICON_PATH = 'assets/icon.png'
+IOS_ICON_PATH = 'assets/icon_ios.png'
+PARAMS = {'stage': 'zoom_ios_icon', 'size': 1024, 'zoom': 1.6,
+          'background': (25, 34, 124), 'resample': 'LANCZOS', 'flatten': fix_ios_icon.PARAMS}
+
+def stage():
+    """(outputs, inputs, params): icon_ios.png from icon.png, which is only read."""
+    return [IOS_ICON_PATH], [ICON_PATH], PARAMS
+
+def zoom_image(img, zoom_factor=1.6):
+    """`img` (RGBA) scaled by `zoom_factor` and center-cropped to 1024 px, as RGB."""
     new_size = int(1024 * zoom_factor)
     
     # Resize the image
@@ -38,10 +40,40 @@ def zoom_icon():
         background.paste(final_img, (0, 0), final_img)
     else:
         background.paste(final_img, (0, 0))
+    return background
+
+def zoom_icon():
+    icon_path = ICON_PATH
+    if not os.path.exists(icon_path):
+        print(f"Icon not found at {icon_path}")
+        return
+
+    # Zooming is not idempotent, so it always starts from the master:
+    # flatten icon.png as fix_ios_icon.py does, zoom that, and write
+    # icon_ios.png (asset_pipeline.py's ios_master with --zoom).
+    out_path = IOS_ICON_PATH
+    params = PARAMS
+    cache = BuildCache()
+    if cache.up_to_date([out_path], [icon_path], params):
+        print(f"{out_path} is up to date.")
+        return
+
+    with stage_trace.span('flatten_icon'):
+        img = fix_ios_icon.flatten_icon(Image.open(icon_path).convert("RGBA")).convert("RGBA")
+    
+    # Aggressive Zoom factor: 1.6x (160%)
+    # This is mathematically enough to push the rounded corners of a full-size rounded box 
+    # completely out of the 1024x1024 square.
+    zoom_factor = 1.6
+    with stage_trace.span('zoom_image', zoom=zoom_factor):
+        background = zoom_image(img, zoom_factor)
     
     # Save as pure RGB (no alpha) to prevent iOS framing issues
-    background.save(icon_path, "PNG")
-    print(f"Successfully zoomed and updated {icon_path} aggressively. Zoom factor: {zoom_factor}")
+    background.save(out_path, "PNG")
+    cache.record([out_path], [icon_path], params)
+    cache.save()
+    print(f"Successfully wrote {out_path}: {icon_path} flattened and zoomed. Zoom factor: {zoom_factor}")
 
 if __name__ == "__main__":
-    zoom_icon()
+    with stage_trace.session('zoom_ios_icon'):
+        zoom_icon()